@@ -1,6 +1,12 @@
-import numpy as np
 import math
-import random
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from abm_numpy import (ABMKernel, SecondaryField, iter_kernel_ensemble,
+                       simulate_abm_kernel, simulate_kernel_ensemble,
+                       simulate_kernel_macro, simulate_kernel_sensitivities)
 
 
 def forcing_series(steps, base, trend, seasonal_amp, seasonal_period):
@@ -11,105 +17,61 @@ def forcing_series(steps, base, trend, seasonal_amp, seasonal_period):
     return series
 
 
-def simulate_abm(params, steps, seed):
-    random.seed(seed)
-    n = params["grid_size"]
-    diff = params["diffusion"]
-    noise = params["noise"]
-    macro_coupling = params["macro_coupling"]
-    forcing_scale = params.get("forcing_scale", 0.01)
-    damping = params.get("damping", 0.02)
-    assimilation_series = params.get("assimilation_series")
-    assimilation_strength = params.get("assimilation_strength", 0.0)
-    _store_grid = params.get("_store_grid", True)
-
-    # Initialize grid
-    grid = [[params["t0"] + random.uniform(-0.5, 0.5) for _ in range(n)] for _ in range(n)]
-    hum = [[params["h0"] + random.uniform(-0.05, 0.05) for _ in range(n)] for _ in range(n)]
-
-    if "forcing_series" in params:
-        forcing = params["forcing_series"]
-    else:
-        forcing = forcing_series(
+# TRADUCCIÓN PARA INFORMÁTICOS (Dinámica Micro), en el orden en que se suman:
+# 1. DIFUSIÓN: Promedio pesado con vecinos (suavizado espacial).
+# 2. FORZING: Aplicar la tendencia global del mes (estacionalidad).
+# 3. MACRO COUPLING: "Goma elástica" hacia el promedio global actual.
+# 4. DAMPING: Pérdida de energía/calor para evitar que el valor explote.
+# 5. NOISE: Inyección de caos aleatorio para realismo.
+# Humedad: variable secundaria que sigue al forzamiento climático.
+# NUDGING (ASIMILACIÓN): toda la rejilla se acerca a la realidad según el
+# error detectado respecto del promedio previo al paso (target - tbar).
+KERNEL = ABMKernel(
+    "tbar",
+    init_key="t0",
+    init_range=0.5,
+    clip=(-50.0, 50.0),
+    macro="mean",
+    terms=("diffusion", "forcing", "macro", "damping"),
+    secondary=(SecondaryField("hum", "h0", 0.05, relax=0.05, target=0.5,
+                              forcing_gain=0.001),),
+    assimilation="grid",
+    defaults={"forcing_scale": 0.01, "damping": 0.02},
+    rng="legacy",
+)
+
+
+def _with_forcing(params, steps):
+    if "forcing_series" not in params:
+        params = dict(params)
+        params["forcing_series"] = forcing_series(
             steps,
             params["forcing_base"],
             params["forcing_trend"],
             params["forcing_seasonal_amp"],
             params["forcing_seasonal_period"],
         )
+    return params
 
-    tbar_series = []
-    grid_series = [] if _store_grid else None
 
-    for t in range(steps):
-        # Compute macro state
-        total = 0.0
-        for i in range(n):
-            total += sum(grid[i])
-        tbar = total / (n * n)
-
-        # Update grid
-        new_grid = [[0.0 for _ in range(n)] for _ in range(n)]
-        new_hum = [[0.0 for _ in range(n)] for _ in range(n)]
-        f = forcing[t]
-        for i in range(n):
-            for j in range(n):
-                neighbors = []
-                if i > 0:
-                    neighbors.append(grid[i - 1][j])
-                if i < n - 1:
-                    neighbors.append(grid[i + 1][j])
-                if j > 0:
-                    neighbors.append(grid[i][j - 1])
-                if j < n - 1:
-                    neighbors.append(grid[i][j + 1])
-
-                neighbor_mean = sum(neighbors) / len(neighbors)
-
-                # TRADUCCIÓN PARA INFORMÁTICOS (Dinámica Micro):
-                # 1. DIFUSIÓN: Promedio pesado con vecinos (suavizado espacial).
-                # 2. FORZING: Aplicar la tendencia global del mes (estacionalidad).
-                # 3. MACRO COUPLING: "Goma elástica" hacia el promedio global actual.
-                # 4. DAMPING: Pérdida de energía/calor para evitar que el valor explote.
-                # 5. NOISE: Inyección de caos aleatorio para realismo.
-                new_t = (
-                    grid[i][j]
-                    + diff * (neighbor_mean - grid[i][j])
-                    + forcing_scale * f
-                    + macro_coupling * (tbar - grid[i][j])
-                    - damping * grid[i][j]
-                    + random.uniform(-noise, noise)
-                )
-
-                # Humedad: Variable secundaria que sigue al forzamiento climático.
-                new_h = hum[i][j] + 0.05 * (0.5 - hum[i][j]) + 0.001 * f
-
-                new_grid[i][j] = max(-50.0, min(50.0, new_t))
-                new_hum[i][j] = new_h
-
-        # NUDGING (ASIMILACIÓN):
-        # Si tenemos datos reales (target), forzamos a toda la rejilla a 
-        # acercarse a la realidad basándonos en el error detectado (target - tbar).
-        if assimilation_series is not None and t < len(assimilation_series):
-            target = assimilation_series[t]
-            if target is not None:
-                for i in range(n):
-                    for j in range(n):
-                        new_grid[i][j] += assimilation_strength * (target - tbar)
-
-        grid = new_grid
-        hum = new_hum
-
-        # Store snapshot and updated macro state
-        total = 0.0
-        for i in range(n):
-            total += sum(grid[i])
-        tbar_series.append(total / (n * n))
-        if _store_grid:
-            grid_series.append([row[:] for row in grid])
-
-    return {
-        "tbar": tbar_series,
-        "grid": grid_series,
-        "forcing": forcing,
-    }
+def simulate_abm(params, steps, seed):
+    return simulate_abm_kernel(KERNEL, _with_forcing(params, steps), steps, seed)
+
+
+def simulate_abm_ensemble(params_list, steps, seeds):
+    params_list = [_with_forcing(p, steps) for p in params_list]
+    return simulate_kernel_ensemble(KERNEL, params_list, steps, seeds)
+
+
+def simulate_abm_chunks(params_list, steps, seeds, chunk=32):
+    params_list = [_with_forcing(p, steps) for p in params_list]
+    return iter_kernel_ensemble(KERNEL, params_list, steps, seeds, chunk=chunk)
+
+
+def simulate_abm_sensitivities(params, steps, seed):
+    return simulate_kernel_sensitivities(KERNEL, _with_forcing(params, steps), steps, seed)
+
+
+def simulate_abm_macro(params_list, steps, seeds):
+    params_list = [_with_forcing(p, steps) for p in params_list]
+    return simulate_kernel_macro(KERNEL, params_list, steps, seeds)
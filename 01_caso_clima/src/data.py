@@ -1,9 +1,14 @@
 import os
+import sys
 from datetime import datetime
 
 import pandas as pd
 from meteostat import Stations, Monthly
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, write_cache
+
 
 def _conus_bounds():
     # Continental US approximate bounds
@@ -42,8 +47,8 @@ def fetch_regional_monthly(start_date, end_date, max_stations=10, cache_path=Non
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
 
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
+    if cache_path and cache_exists(cache_path):
+        df = read_cache(cache_path)
         return df
 
     stations = _select_stations(start, end, max_stations)
@@ -73,7 +78,6 @@ def fetch_regional_monthly(start_date, end_date, max_stations=10, cache_path=Non
     df = regional.reset_index().rename(columns={"time": "date", 0: "tavg", "tavg": "tavg"})
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        df.to_csv(cache_path, index=False)
+        write_cache(cache_path, df, source="Meteostat")
 
     return df
@@ -1,4 +1,12 @@
 import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from grid_metrics import cell_correlations, neighbor_mean_cube
 
 
 def mean(xs):
@@ -44,31 +52,12 @@ def internal_vs_external_cohesion(grid_series, forcing_series):
     steps = len(grid_series)
     if steps == 0:
         return 0.0, 0.0
-    n = len(grid_series[0])
-
-    internal_corrs = []
-    external_corrs = []
-    for i in range(n):
-        for j in range(n):
-            cell_series = [grid_series[t][i][j] for t in range(steps)]
-            neighbor_series = []
-            for t in range(steps):
-                neighbors = []
-                if i > 0:
-                    neighbors.append(grid_series[t][i - 1][j])
-                if i < n - 1:
-                    neighbors.append(grid_series[t][i + 1][j])
-                if j > 0:
-                    neighbors.append(grid_series[t][i][j - 1])
-                if j < n - 1:
-                    neighbors.append(grid_series[t][i][j + 1])
-                neighbor_series.append(sum(neighbors) / len(neighbors))
-
-            internal_corrs.append(correlation(cell_series, neighbor_series))
-            external_corrs.append(correlation(cell_series, forcing_series))
-
-    internal = mean(internal_corrs)
-    external = mean(external_corrs)
+    cube = np.asarray(grid_series, dtype=np.float64)
+
+    internal = float(cell_correlations(cube, neighbor_mean_cube(cube)).mean())
+    external = 0.0
+    if len(forcing_series) == steps:
+        external = float(cell_correlations(cube, forcing_series).mean())
     return internal, external
 
 
@@ -77,76 +66,96 @@ def dominance_share(grid_series):
     steps = len(grid_series)
     if steps == 0:
         return 1.0
-    n = len(grid_series[0])
-    regional = []
-    for t in range(steps):
-        total = 0.0
-        for i in range(n):
-            total += sum(grid_series[t][i])
-        regional.append(total / (n * n))
+    cube = np.asarray(grid_series, dtype=np.float64)
+    scores = np.abs(cell_correlations(cube, cube.mean(axis=(1, 2))))
+    return float(scores.max()) / float(scores.sum())
+
+
+def hoel_tpm(series, bins=5):
+    """
+    Matrices de transición (TPM) de Hoel de una o varias series.
+
+    Cada serie se discretiza en 'bins' estados equiespaciados entre su
+    mínimo y su máximo, y los pares (estado_t, estado_t+1) se cuentan de una
+    vez con bincount. Filas sin transiciones quedan uniformes (máxima
+    incertidumbre); una serie constante da la identidad.
+
+    Args:
+        series: array (..., T), p. ej. (celdas, T) o (réplicas, T)
+
+    Returns:
+        ndarray (..., bins, bins)
+    """
+    data = np.asarray(series, dtype=np.float64)
+    batch = data.shape[:-1]
+    data = data.reshape(-1, data.shape[-1])
+    n_series = data.shape[0]
 
-    scores = []
-    for i in range(n):
-        for j in range(n):
-            cell_series = [grid_series[t][i][j] for t in range(steps)]
-            scores.append(abs(correlation(cell_series, regional)))
+    v_min = data.min(axis=1)
+    v_max = data.max(axis=1)
+    edges = np.linspace(v_min, v_max, bins, axis=1)
+    # np.digitize por fila: número de bordes <= x, menos 1
+    digits = (data[:, :, None] >= edges[:, None, :]).sum(axis=2) - 1
 
-    total = sum(scores) if scores else 1.0
-    max_share = max(scores) / total if scores else 1.0
-    return max_share
+    pairs = digits[:, :-1] * bins + digits[:, 1:]
+    pairs += (np.arange(n_series) * bins * bins)[:, None]
+    counts = np.bincount(pairs.ravel(), minlength=n_series * bins * bins)
+    tpm = counts.reshape(n_series, bins, bins).astype(np.float64)
+
+    row_sums = tpm.sum(axis=2, keepdims=True)
+    tpm = np.where(row_sums > 0, tpm / np.where(row_sums > 0, row_sums, 1.0), 1.0 / bins)
+    tpm[v_min == v_max] = np.eye(bins)
+    return tpm.reshape(batch + (bins, bins))
+
+
+def _entropy_bits(p, axis=-1):
+    safe = np.where(p > 0, p, 1.0)
+    return -np.sum(np.where(p > 0, p * np.log2(safe), 0.0), axis=axis)
+
+
+def hoel_ei(tpm):
+    """
+    EI = Determinismo - Degeneración de una o varias TPM (..., bins, bins).
+
+    Determinismo: 1 - entropía media de las filas (normalizada).
+    Degeneración: entropía de la distribución media de salida (normalizada).
+    """
+    tpm = np.asarray(tpm, dtype=np.float64)
+    log_bins = np.log2(tpm.shape[-1])
+    determinism = 1 - _entropy_bits(tpm).mean(axis=-1) / log_bins
+    degeneracy = 1 - _entropy_bits(tpm.mean(axis=-2)) / log_bins
+    return np.maximum(0.0, determinism - (1 - degeneracy))
 
 
 def effective_information(series_macro, series_micro_agg, bins=5):
     """
     Calcula la Información Efectiva (EI = Determinismo - Degeneración)
     basado en el marco de Erik Hoel.
+
+    Acepta pilas de series: series_macro y series_micro_agg de forma
+    (..., T) (compatibles por broadcasting), p. ej. todas las celdas de la
+    historia del grid (cube.reshape(T, -1).T) o réplicas bootstrap. Con
+    bins como secuencia se evalúan todas las resoluciones de una vez.
+
+    Returns:
+        float (EI_macro - EI_micro) para dos series y bins escalar;
+        ndarray (len(bins), ...) o (...) en el caso general
     """
-    import numpy as np
-
-    def get_tpm(data, bins):
-        # Discretizar la serie en 'bins' estados
-        v_min, v_max = min(data), max(data)
-        if v_min == v_max: return np.eye(bins)
-        
-        digits = np.digitize(data, np.linspace(v_min, v_max, bins)) - 1
-        tpm = np.zeros((bins, bins))
-        for t in range(len(digits) - 1):
-            tpm[digits[t], digits[t+1]] += 1
-        
-        # Normalizar filas para obtener probabilidades de transición
-        row_sums = tpm.sum(axis=1)
-        for i in range(bins):
-            if row_sums[i] > 0:
-                tpm[i] /= row_sums[i]
-            else:
-                tpm[i] = np.ones(bins) / bins # Estado de máxima incertidumbre
-        return tpm
-
-    def calculate_ei(tpm):
-        # Determinismo: cuán predecible es el futuro dado el presente (entropía de filas)
-        # Degeneración: cuán solapados están los pasados dado el futuro (entropía de columnas)
-        bins = tpm.shape[0]
-        # H(W_out | do(W_in))
-        row_entropies = []
-        for i in range(bins):
-            p = tpm[i]
-            p = p[p > 0]
-            row_entropies.append(-np.sum(p * np.log2(p)))
-        
-        determinism = 1 - (np.mean(row_entropies) / np.log2(bins))
-        
-        # Degeneración (basada en la especificidad de las columnas)
-        avg_tpm = tpm.mean(axis=0)
-        avg_tpm = avg_tpm[avg_tpm > 0]
-        degeneracy = 1 - (-np.sum(avg_tpm * np.log2(avg_tpm)) / np.log2(bins))
-        
-        return max(0.0, determinism - (1 - degeneracy))
-
-    ei_macro = calculate_ei(get_tpm(series_macro, bins))
-    ei_micro = calculate_ei(get_tpm(series_micro_agg, bins))
-    
-    # La Causal Emergence ocurre si EI_macro > EI_micro
-    return float(ei_macro - ei_micro)
+    data_macro = np.asarray(series_macro, dtype=np.float64)
+    data_micro = np.asarray(series_micro_agg, dtype=np.float64)
+    scalar_bins = np.ndim(bins) == 0
+    bin_counts = [int(bins)] if scalar_bins else [int(b) for b in bins]
+
+    out = []
+    for b in bin_counts:
+        ei_macro = hoel_ei(hoel_tpm(data_macro, b))
+        ei_micro = hoel_ei(hoel_tpm(data_micro, b))
+        # La Causal Emergence ocurre si EI_macro > EI_micro
+        out.append(ei_macro - ei_micro)
+    result = out[0] if scalar_bins else np.stack(out)
+    if np.ndim(result) == 0:
+        return float(result)
+    return result
 
 
 def stationarity_index(series):
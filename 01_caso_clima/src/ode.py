@@ -1,5 +1,10 @@
 import math
-import random
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from ode_ensemble import LinearODE, simulate_linear_ode, simulate_linear_ode_ensemble
 
 
 def forcing_series(steps, base, trend, seasonal_amp, seasonal_period):
@@ -10,45 +15,33 @@ def forcing_series(steps, base, trend, seasonal_amp, seasonal_period):
     return series
 
 
-def simulate_ode(params, steps, seed):
-    random.seed(seed)
-    alpha = params["ode_alpha"]
-    beta = params["ode_beta"]
-    noise = params["ode_noise"]
+# TRADUCCIÓN PARA INFORMÁTICOS (Balance Energético):
+# tbar = tbar + alpha * (input - output) + noise
+# alpha: Velocidad de reacción del sistema.
+# (f - beta * tbar): Diferencia entre energía que entra (f) y la que se disipa (beta * tbar).
+# NUDGING: Si hay datos reales (assimilation_series), se aplica un "ajuste
+# manual" tbar += strength * (target - tbar) para corregir el rumbo.
+MODEL = LinearODE("tbar", state_key="t0")
 
+
+def _with_forcing(params, steps):
     if "forcing_series" in params:
-        forcing = params["forcing_series"]
-    else:
-        forcing = forcing_series(
-            steps,
-            params["forcing_base"],
-            params["forcing_trend"],
-            params["forcing_seasonal_amp"],
-            params["forcing_seasonal_period"],
-        )
-
-    tbar = params["t0"]
-    tbar_series = []
-    assimilation_series = params.get("assimilation_series")
-    assimilation_strength = params.get("assimilation_strength", 0.0)
+        return params
+    forcing = forcing_series(
+        steps,
+        params["forcing_base"],
+        params["forcing_trend"],
+        params["forcing_seasonal_amp"],
+        params["forcing_seasonal_period"],
+    )
+    return dict(params, forcing_series=forcing)
 
-    for t in range(steps):
-        f = forcing[t]
-        
-        # TRADUCCIÓN PARA INFORMÁTICOS (Balance Energético):
-        # tbar = tbar + alpha * (input - output) + noise
-        # alpha: Velocidad de reacción del sistema.
-        # (f - beta * tbar): Diferencia entre energía que entra (f) y la que se disipa (beta * tbar).
-        tbar = tbar + alpha * (f - beta * tbar) + random.uniform(-noise, noise)
-        
-        # NUDGING: Si hay datos reales, aplicamos un "ajuste manual" para corregir el rumbo.
-        if assimilation_series is not None and t < len(assimilation_series):
-            target = assimilation_series[t]
-            if target is not None:
-                tbar = tbar + assimilation_strength * (target - tbar)
-        tbar_series.append(tbar)
-
-    return {
-        "tbar": tbar_series,
-        "forcing": forcing,
-    }
+
+def simulate_ode(params, steps, seed):
+    return simulate_linear_ode(MODEL, _with_forcing(params, steps), steps, seed)
+
+
+def simulate_ode_ensemble(params_list, steps, seeds):
+    return simulate_linear_ode_ensemble(
+        MODEL, [_with_forcing(p, steps) for p in params_list], steps, seeds
+    )
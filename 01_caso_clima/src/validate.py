@@ -12,7 +12,8 @@ import pandas as pd
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
 
-from abm import simulate_abm
+from abm import (simulate_abm, simulate_abm_chunks, simulate_abm_ensemble,
+                 simulate_abm_macro, simulate_abm_sensitivities)
 from data import fetch_regional_monthly
 from ode import simulate_ode
 from hybrid_validator import CaseConfig, run_full_validation, write_outputs
@@ -70,6 +71,10 @@ def main():
     results = run_full_validation(
         config, load_real_data, make_synthetic,
         simulate_abm, simulate_ode,
+        simulate_abm_ensemble_fn=simulate_abm_ensemble,
+        simulate_abm_chunks_fn=simulate_abm_chunks,
+        simulate_abm_sensitivity_fn=simulate_abm_sensitivities,
+        simulate_abm_macro_fn=simulate_abm_macro,
     )
 
     out_dir = os.path.join(os.path.dirname(__file__), "..", "outputs")
@@ -1,25 +1,26 @@
 import os
+import sys
 from datetime import datetime
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, write_cache
+from fetch_client import worldbank_indicator
+
+INDICATOR = "EN.ATM.PM25.MC.M3"
 
 
 def fetch_pm25_worldbank(start_date, end_date, cache_path=None):
     start_year = int(start_date[:4])
     end_year = int(end_date[:4])
 
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
+    if cache_path and cache_exists(cache_path):
+        df = read_cache(cache_path)
         return df
 
-    url = (
-        "https://api.worldbank.org/v2/country/WLD/indicator/"
-        "EN.ATM.PM25.MC.M3?format=json&per_page=2000"
-    )
-    resp = requests.get(url, timeout=30)
-    resp.raise_for_status()
-    payload = resp.json()
+    payload = worldbank_indicator("WLD", INDICATOR, params={"per_page": 2000})
     if not isinstance(payload, list) or len(payload) < 2:
         raise RuntimeError("Unexpected World Bank response")
 
@@ -41,7 +42,6 @@ def fetch_pm25_worldbank(start_date, end_date, cache_path=None):
     df = df.dropna(subset=["date", "pm25"]).sort_values("date")
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        df.to_csv(cache_path, index=False)
+        write_cache(cache_path, df, source="World Bank", indicator=INDICATOR)
 
     return df
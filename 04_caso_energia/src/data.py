@@ -1,43 +1,185 @@
 import os
-import requests
+import sys
+import zipfile
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, read_meta, write_cache
+
+try:
+    import pyarrow  # noqa: F401  (motor de pandas.to_parquet)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
 OPSD_URL = "https://data.open-power-system-data.org/time_series/2020-10-06/time_series_60min_singleindex.csv"
+TIMESTAMP_COL = "utc_timestamp"
+LOAD_COL = "GB_GBN_load_actual_entsoe_transparency"
+
+# Filas por bloque al leer el CSV horario (~200k filas de 2 columnas ≈ 5 MB)
+CHUNK_ROWS = 200_000
+DOWNLOAD_BLOCK = 1 << 20
+
+
+def _download(url, dest):
+    """Descarga url a dest por bloques (sin cargar el cuerpo en memoria)."""
+    import requests
+
+    part = dest + ".part"
+    with requests.get(url, timeout=60, stream=True) as resp:
+        resp.raise_for_status()
+        with open(part, "wb") as f:
+            for block in resp.iter_content(chunk_size=DOWNLOAD_BLOCK):
+                f.write(block)
+    os.replace(part, dest)
+    return dest
+
 
+def _hourly_cache_path(cache_path, col):
+    """Caché columnar de la serie horaria extraída (parquet, o npz sin pyarrow)."""
+    ext = ".parquet" if PARQUET_AVAILABLE else ".npz"
+    return os.path.join(os.path.dirname(cache_path), f"opsd_{col}_hourly{ext}")
 
-def fetch_opsd_load_monthly(start_date, end_date, cache_path=None):
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
-        return df
 
-    resp = requests.get(OPSD_URL, timeout=60)
-    resp.raise_for_status()
-    tmp_path = os.path.join(os.path.dirname(cache_path or "./"), "opsd_time_series.csv")
-    with open(tmp_path, "wb") as f:
-        f.write(resp.content)
+def _tee_hourly(chunks, path):
+    """
+    Reenvía los bloques (date, load) y los escribe uno a uno al caché horario
+    de path (ParquetWriter, o un .npz con un arreglo por bloque), sin juntar
+    la serie en memoria. El caché solo aparece si se consumieron todos.
+    """
+    part = path + ".part"
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
 
-    df = pd.read_csv(tmp_path, parse_dates=["utc_timestamp"], low_memory=False)
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(part, table.schema)
+                writer.write_table(table)
+                yield chunk
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with zipfile.ZipFile(part, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, chunk in enumerate(chunks):
+                columns = {"date": chunk["date"].to_numpy().astype("datetime64[s]").astype(np.int64),
+                           "load": chunk["load"].to_numpy()}
+                for name, values in columns.items():
+                    with zf.open(f"{name}_{i:06d}.npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array(f, values)
+                yield chunk
+    if os.path.exists(part):
+        os.replace(part, path)
 
-    col = "GB_GBN_load_actual_entsoe_transparency"
-    if col not in df.columns:
+
+def _read_hourly(path):
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        with np.load(path) as z:
+            dates = sorted(k for k in z.files if k.startswith("date"))
+            loads = sorted(k for k in z.files if k.startswith("load"))
+            df = pd.DataFrame({"date": np.concatenate([z[k] for k in dates]).astype("datetime64[s]"),
+                               "load": np.concatenate([z[k] for k in loads])})
+    return df
+
+
+def iter_opsd_load(source, col=LOAD_COL, chunksize=CHUNK_ROWS):
+    """
+    Bloques (date UTC sin zona, load) del CSV horario de OPSD, leyendo solo
+    las dos columnas necesarias. source: ruta local o buffer.
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    if col not in header:
         raise RuntimeError(f"Expected column not found: {col}")
+    if hasattr(source, "seek"):
+        source.seek(0)
+    reader = pd.read_csv(source, usecols=[TIMESTAMP_COL, col], chunksize=chunksize,
+                         dtype={col: np.float64})
+    for chunk in reader:
+        dates = pd.to_datetime(chunk[TIMESTAMP_COL], utc=True).dt.tz_convert(None)
+        yield pd.DataFrame({"date": dates, "load": chunk[col].to_numpy()})
 
-    df = df[["utc_timestamp", col]].rename(columns={"utc_timestamp": "date", col: "load"})
-    df = df.dropna()
 
-    df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
-    if df.empty:
+def monthly_mean_load(chunks, start_date, end_date):
+    """
+    Media mensual de la carga en [start_date, end_date], acumulando suma y
+    conteo por mes bloque a bloque.
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    sums, counts = None, None
+    for chunk in chunks:
+        chunk = chunk.dropna()
+        chunk = chunk[(chunk["date"] >= start) & (chunk["date"] <= end)]
+        if chunk.empty:
+            continue
+        month = chunk["date"].dt.to_period("M").dt.to_timestamp()
+        grouped = chunk["load"].groupby(month.to_numpy()).agg(["sum", "count"])
+        if sums is None:
+            sums, counts = grouped["sum"], grouped["count"]
+        else:
+            sums = sums.add(grouped["sum"], fill_value=0.0)
+            counts = counts.add(grouped["count"], fill_value=0)
+    if sums is None:
         raise RuntimeError("No load data for selected period")
+    mean = (sums / counts).sort_index()
+    return pd.DataFrame({"month": mean.index, "load": mean.to_numpy()})
+
+
+def fetch_opsd_load_monthly(start_date, end_date, cache_path=None, source=None,
+                            chunksize=CHUNK_ROWS):
+    """
+    Demanda mensual (log de la carga media) de Gran Bretaña desde OPSD.
+
+    El CSV horario (cientos de MB) se descarga en streaming a disco y se lee
+    por bloques con solo las columnas de fecha y carga; cada bloque se
+    agrega al caché columnar de la serie horaria junto a cache_path, así que
+    las siguientes consultas (otros rangos de fechas) no vuelven a
+    descargar. La serie mensual de cache_path solo se reusa para la misma
+    ventana (start_date, end_date).
+
+    Args:
+        source: URL (default OPSD_URL) o ruta local del CSV horario
+        chunksize: filas por bloque al leer el CSV
+    """
+    window = {"start": str(pd.Timestamp(start_date).date()), "end": str(pd.Timestamp(end_date).date())}
+    if cache_path and cache_exists(cache_path):
+        meta = read_meta(cache_path) or {}
+        if all(meta.get(k) == v for k, v in window.items()):
+            return read_cache(cache_path)
+
+    source = source or OPSD_URL
+    hourly_path = _hourly_cache_path(cache_path, LOAD_COL) if cache_path else None
+    tmp_path = None
+    if hourly_path and os.path.exists(hourly_path):
+        chunks = [_read_hourly(hourly_path)]
+    else:
+        raw_path = source
+        if source.startswith(("http://", "https://")):
+            tmp_path = os.path.join(os.path.dirname(cache_path or "./"), "opsd_time_series.csv")
+            raw_path = _download(source, tmp_path)
+        chunks = iter_opsd_load(raw_path, chunksize=chunksize)
+        if hourly_path:
+            os.makedirs(os.path.dirname(hourly_path), exist_ok=True)
+            chunks = _tee_hourly(chunks, hourly_path)
 
-    df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
-    monthly = df.groupby("month", as_index=False)["load"].mean()
+    try:
+        monthly = monthly_mean_load(chunks, start_date, end_date)
+    finally:
+        # El CSV descargado solo hace falta para extraer la columna
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
     monthly["log_load"] = monthly["load"].apply(lambda x: float(np.log(max(x, 1.0))))
 
     out = monthly[["month", "log_load"]].rename(columns={"month": "date", "log_load": "demand"})
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        out.to_csv(cache_path, index=False)
+        write_cache(cache_path, out, source="OPSD", **window)
 
     return out
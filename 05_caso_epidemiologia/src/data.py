@@ -1,24 +1,169 @@
+import hashlib
+import json
 import os
+import sys
 import pandas as pd
-import requests
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, read_meta, write_cache
+
+try:
+    import pyarrow  # noqa: F401  (motor de pandas.to_parquet)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
 
 OWID_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master/public/data/owid-covid-data.csv"
+SUBSET_COLUMNS = ["location", "date", "new_cases_smoothed"]
+
+# Filas por bloque al leer el CSV global (~67 columnas, ~400k filas)
+CHUNK_ROWS = 100_000
+DOWNLOAD_BLOCK = 1 << 20
+
+
+def _download(url, dest):
+    """Descarga url a dest por bloques; devuelve los validadores HTTP de la respuesta."""
+    import requests
+
+    part = dest + ".part"
+    with requests.get(url, timeout=60, stream=True) as resp:
+        resp.raise_for_status()
+        with open(part, "wb") as f:
+            for block in resp.iter_content(chunk_size=DOWNLOAD_BLOCK):
+                f.write(block)
+        validator = _validator_from_headers(resp.headers)
+    os.replace(part, dest)
+    return validator
+
+
+def _validator_from_headers(headers):
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def _source_validator(source):
+    """
+    Versión actual de la fuente: ETag/Last-Modified (HEAD) para una URL,
+    tamaño y mtime para un archivo local; None si no se puede consultar.
+    """
+    if not source.startswith(("http://", "https://")):
+        st = os.stat(source)
+        return {"size": st.st_size, "mtime": st.st_mtime}
+    try:
+        import requests
+        resp = requests.head(source, timeout=30, allow_redirects=True)
+        resp.raise_for_status()
+    except Exception:
+        return None
+    return _validator_from_headers(resp.headers)
+
 
+def _subset_paths(cache_dir, source):
+    """(subset, metadatos) del caché del subconjunto crudo, por fuente."""
+    key = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+    ext = ".parquet" if PARQUET_AVAILABLE else ".npz"
+    base = os.path.join(cache_dir, f"owid_subset_{key}")
+    return base + ext, base + ".json"
 
-def fetch_owid_world_weekly(start_date, end_date, cache_path=None):
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
+
+def _write_subset(path, df):
+    if path.endswith(".parquet"):
+        df.assign(location=df["location"].astype("category")).to_parquet(path, index=False)
+    else:
+        np.savez_compressed(path, location=df["location"].to_numpy(dtype=str),
+                            date=df["date"].to_numpy().astype("datetime64[D]").astype(np.int64),
+                            new_cases_smoothed=df["new_cases_smoothed"].to_numpy())
+
+
+def _read_subset(path):
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+        df["location"] = df["location"].astype(str)
         return df
+    with np.load(path) as z:
+        return pd.DataFrame({"location": z["location"],
+                             "date": z["date"].astype("datetime64[D]").astype("datetime64[s]"),
+                             "new_cases_smoothed": z["new_cases_smoothed"]})
+
+
+def iter_owid_subset(source, chunksize=CHUNK_ROWS):
+    """
+    Bloques (location, date, new_cases_smoothed) del CSV de OWID, leyendo
+    solo esas columnas y descartando en cada bloque las filas sin casos.
+    """
+    reader = pd.read_csv(source, usecols=SUBSET_COLUMNS, chunksize=chunksize,
+                         dtype={"location": str, "new_cases_smoothed": np.float64})
+    for chunk in reader:
+        chunk = chunk.dropna(subset=["new_cases_smoothed"])
+        chunk["date"] = pd.to_datetime(chunk["date"])
+        yield chunk[SUBSET_COLUMNS]
+
+
+def load_owid_subset(cache_dir, source=None, chunksize=CHUNK_ROWS):
+    """
+    Subconjunto crudo (todas las ubicaciones, solo las columnas de
+    SUBSET_COLUMNS) de la fuente, desde el caché columnar de cache_dir.
+
+    El caché se identifica por la URL (o ruta) y se reusa mientras su
+    ETag/Last-Modified coincida con el de la fuente (o si la fuente no
+    responde); si cambió, se vuelve a descargar y parsear por bloques.
+    """
+    source = source or OWID_URL
+    os.makedirs(cache_dir, exist_ok=True)
+    subset_path, meta_path = _subset_paths(cache_dir, source)
+    current = _source_validator(source)
+    if os.path.exists(subset_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("source") == source and (current is None or meta.get("validator") == current):
+            return _read_subset(subset_path)
+
+    tmp_path = None
+    raw_path = source
+    if source.startswith(("http://", "https://")):
+        tmp_path = os.path.join(cache_dir, "owid_covid.csv")
+        current = _download(source, tmp_path) or current
+        raw_path = tmp_path
+    try:
+        df = pd.concat(list(iter_owid_subset(raw_path, chunksize=chunksize)), ignore_index=True)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _write_subset(subset_path, df)
+    with open(meta_path, "w") as f:
+        json.dump({"source": source, "validator": current, "columns": SUBSET_COLUMNS}, f)
+    return df
+
+
+def fetch_owid_world_weekly(start_date, end_date, cache_path=None, location="World",
+                            source=None, chunksize=CHUNK_ROWS):
+    """
+    Casos semanales (media de new_cases_smoothed) de una ubicación de OWID.
 
-    resp = requests.get(OWID_URL, timeout=60)
-    resp.raise_for_status()
+    El CSV global se lee por bloques con solo las columnas necesarias y se
+    guarda como subconjunto columnar junto a cache_path (ver
+    load_owid_subset), así que otra ventana de fechas u otra ubicación se
+    responde sin volver a descargar ni parsear el archivo completo. La
+    serie semanal de cache_path solo se reusa si fue calculada para la
+    misma (location, start_date, end_date).
 
-    tmp_path = os.path.join(os.path.dirname(cache_path or "./"), "owid_covid.csv")
-    with open(tmp_path, "wb") as f:
-        f.write(resp.content)
+    Args:
+        location: ubicación de OWID ("World", "Spain", ...)
+        source: URL (default OWID_URL) o ruta local del CSV
+        chunksize: filas por bloque al leer el CSV
+    """
+    window = {"location": location, "start": str(pd.Timestamp(start_date).date()),
+              "end": str(pd.Timestamp(end_date).date())}
+    if cache_path and cache_exists(cache_path):
+        meta = read_meta(cache_path) or {}
+        if all(meta.get(k) == v for k, v in window.items()):
+            return read_cache(cache_path)
 
-    df = pd.read_csv(tmp_path, parse_dates=["date"])
-    df = df[df["location"] == "World"]
+    cache_dir = os.path.dirname(cache_path) if cache_path else "./"
+    df = load_owid_subset(cache_dir, source=source, chunksize=chunksize)
+    df = df[df["location"] == location]
     df = df[["date", "new_cases_smoothed"]].dropna()
     df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
 
@@ -30,7 +175,6 @@ def fetch_owid_world_weekly(start_date, end_date, cache_path=None):
     weekly = weekly.rename(columns={"week": "date", "new_cases_smoothed": "cases"})
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        weekly.to_csv(cache_path, index=False)
+        write_cache(cache_path, weekly, source="OWID", **window)
 
     return weekly
@@ -1,12 +1,14 @@
 import os
-import time
+import sys
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-import requests
 
-API_BASE = "https://wikimedia.org/api/rest_v1/metrics/pageviews/per-article"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, write_cache
+from fetch_client import WIKIMEDIA_UA, wikimedia_pageviews
 
 DEFAULT_ARTICLES = [
     "Bitcoin",
@@ -15,30 +17,9 @@ DEFAULT_ARTICLES = [
 ]
 
 
-def _fetch_article_daily(article, start, end, user_agent):
-    url = f"{API_BASE}/en.wikipedia.org/all-access/user/{article}/daily/{start}/{end}"
-    headers = {"User-Agent": user_agent}
-    resp = requests.get(url, headers=headers, timeout=30)
-    if resp.status_code == 429:
-        time.sleep(1)
-        resp = requests.get(url, headers=headers, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    items = data.get("items", [])
-    rows = []
-    for item in items:
-        ts = item.get("timestamp")
-        views = item.get("views")
-        if not ts or views is None:
-            continue
-        date = datetime.strptime(ts[:8], "%Y%m%d")
-        rows.append({"date": date, "views": int(views)})
-    return rows
-
-
 def fetch_crypto_daily(start_date, end_date, articles=None, cache_path=None):
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
+    if cache_path and cache_exists(cache_path):
+        df = read_cache(cache_path)
         return df
 
     articles = articles or DEFAULT_ARTICLES
@@ -47,15 +28,10 @@ def fetch_crypto_daily(start_date, end_date, articles=None, cache_path=None):
     start_ts = start.strftime("%Y%m%d00")
     end_ts = end.strftime("%Y%m%d00")
 
-    user_agent = os.environ.get(
-        "WIKIMEDIA_USER_AGENT",
-        "SimulacionClimatica/1.0 (contact: local@example.com)",
-    )
+    user_agent = os.environ.get("WIKIMEDIA_USER_AGENT", WIKIMEDIA_UA)
 
-    all_rows = []
-    for article in articles:
-        all_rows.extend(_fetch_article_daily(article, start_ts, end_ts, user_agent))
-        time.sleep(0.2)
+    # Artículos en paralelo por el cliente compartido (pool, 429 y caché)
+    all_rows = wikimedia_pageviews(articles, start_ts, end_ts, "daily", user_agent)
 
     df = pd.DataFrame(all_rows)
     if df.empty:
@@ -66,7 +42,6 @@ def fetch_crypto_daily(start_date, end_date, articles=None, cache_path=None):
     out = daily[["date", "log_views"]].rename(columns={"log_views": "attention"})
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        out.to_csv(cache_path, index=False)
+        write_cache(cache_path, out, source="Wikimedia")
 
     return out
@@ -1,19 +1,20 @@
 import os
 import random
+import sys
 from datetime import datetime
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from fetch_client import DEFAULT_UA, default_client
 
 DATA_URL = "https://ourworldindata.org/grapher/happiness-cantril-ladder.csv"
-DEFAULT_UA = "SimulacionClimatica/0.1"
 
 
-def _request(url):
+def _request(url, max_age=None):
     headers = {"User-Agent": os.getenv("OWID_USER_AGENT", DEFAULT_UA)}
-    resp = requests.get(url, headers=headers, timeout=30)
-    resp.raise_for_status()
-    return resp.text
+    return default_client().get_text(url, headers=headers, max_age=max_age)
 
 
 def fetch_sparse_happiness(cache_path, entity="World", fallback_entity="United States", start_year=2011, end_year=2023, drop_rate=0.4, seed=7, refresh=False):
@@ -31,7 +32,7 @@ def fetch_sparse_happiness(cache_path, entity="World", fallback_entity="United S
         }
         return df, meta
 
-    raw_csv = _request(DATA_URL)
+    raw_csv = _request(DATA_URL, max_age=0 if refresh else None)
     os.makedirs(os.path.dirname(cache_path), exist_ok=True)
     with open(cache_path, "w", encoding="utf-8") as f:
         f.write(raw_csv)
@@ -1,17 +1,22 @@
 import os
+import sys
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 import yfinance as yf
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, write_cache
+
 
 def fetch_spy_monthly(start_date, end_date, cache_path=None):
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
 
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
+    if cache_path and cache_exists(cache_path):
+        df = read_cache(cache_path)
         return df
 
     data = yf.download(
@@ -41,7 +46,6 @@ def fetch_spy_monthly(start_date, end_date, cache_path=None):
     df = data[["date", "log_price"]].rename(columns={"log_price": "price"})
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        df.to_csv(cache_path, index=False)
+        write_cache(cache_path, df, source="Yahoo Finance")
 
     return df
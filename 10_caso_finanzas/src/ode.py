@@ -1,28 +1,18 @@
-import random
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from ode_ensemble import LinearODE, simulate_linear_ode, simulate_linear_ode_ensemble
+
+
+# x = x + alpha * (f - beta * x) + ruido
+MODEL = LinearODE("x", state_key="x0")
 
 
 def simulate_ode(params, steps, seed):
-    random.seed(seed)
-    alpha = params["ode_alpha"]
-    beta = params["ode_beta"]
-    noise = params["ode_noise"]
-
-    forcing = params["forcing_series"]
-    x = params["x0"]
-    x_series = []
-    assimilation_series = params.get("assimilation_series")
-    assimilation_strength = params.get("assimilation_strength", 0.0)
-
-    for t in range(steps):
-        f = forcing[t]
-        x = x + alpha * (f - beta * x) + random.uniform(-noise, noise)
-        if assimilation_series is not None and t < len(assimilation_series):
-            target = assimilation_series[t]
-            if target is not None:
-                x = x + assimilation_strength * (target - x)
-        x_series.append(x)
-
-    return {
-        "x": x_series,
-        "forcing": forcing,
-    }
+    return simulate_linear_ode(MODEL, params, steps, seed)
+
+
+def simulate_ode_ensemble(params_list, steps, seeds):
+    return simulate_linear_ode_ensemble(MODEL, params_list, steps, seeds)
@@ -1,34 +1,22 @@
 import os
+import sys
 from datetime import datetime
 
 import pandas as pd
-import requests
 
-API_BASE = "https://api.worldbank.org/v2"
-DEFAULT_UA = "SimulacionClimatica/0.1"
-INDICATOR = "EG.USE.PCAP.KG.OE"  # Energy use per capita (proxy emisiones/acidificación)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
 
+from dataset_store import ANY_AGE, cache_exists, read_cache, write_cache
+from fetch_client import worldbank_indicator
 
-def _request(url, params=None, retries=3):
-    import time as _time
-    headers = {"User-Agent": os.getenv("WORLDBANK_USER_AGENT", DEFAULT_UA)}
-    for attempt in range(retries):
-        try:
-            resp = requests.get(url, params=params, headers=headers, timeout=30)
-            resp.raise_for_status()
-            return resp.json()
-        except (requests.RequestException, ValueError) as e:
-            if attempt == retries - 1:
-                raise
-            _time.sleep(2 ** attempt)
+INDICATOR = "EG.USE.PCAP.KG.OE"  # Energy use per capita (proxy emisiones/acidificación)
 
 
 def fetch_co2_per_capita(cache_path, country="WLD", start_year=1960, end_year=2022, refresh=False):
     """Obtiene CO2 emissions per capita (proxy acidificación) del World Bank."""
     cache_path = os.path.abspath(cache_path)
-    if os.path.exists(cache_path) and not refresh:
-        df = pd.read_csv(cache_path)
-        df["date"] = pd.to_datetime(df["date"])
+    if cache_exists(cache_path) and not refresh:
+        df = read_cache(cache_path)
         meta = {
             "source": "World Bank",
             "country": country,
@@ -39,13 +27,13 @@ def fetch_co2_per_capita(cache_path, country="WLD", start_year=1960, end_year=20
         }
         return df, meta
 
-    url = f"{API_BASE}/country/{country}/indicator/{INDICATOR}"
     try:
-        data = _request(url, params={"format": "json", "per_page": 500, "date": f"{start_year}:{end_year}"})
+        data = worldbank_indicator(country, INDICATOR,
+                                   params={"per_page": 500, "date": f"{start_year}:{end_year}"},
+                                   max_age=0 if refresh else None)
     except Exception:
-        if os.path.exists(cache_path):
-            df = pd.read_csv(cache_path)
-            df["date"] = pd.to_datetime(df["date"])
+        if cache_exists(cache_path, max_age=ANY_AGE):
+            df = read_cache(cache_path)
             return df, {"source": "World Bank", "cached": True, "fallback": True}
         raise
     if not isinstance(data, list) or len(data) < 2 or data[1] is None:
@@ -71,8 +59,7 @@ def fetch_co2_per_capita(cache_path, country="WLD", start_year=1960, end_year=20
     if df.empty:
         raise RuntimeError("No se encontraron datos para el rango solicitado")
 
-    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-    df.to_csv(cache_path, index=False)
+    write_cache(cache_path, df, source="World Bank", indicator=INDICATOR)
 
     meta = {
         "source": "World Bank",
@@ -1,25 +1,19 @@
 import os
+import sys
 from datetime import datetime
 
 import pandas as pd
-import requests
 
-API_BASE = "https://api.worldbank.org/v2"
-DEFAULT_UA = "SimulacionClimatica/0.1"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
 
-
-def _request(url, params=None):
-    headers = {"User-Agent": os.getenv("WORLDBANK_USER_AGENT", DEFAULT_UA)}
-    resp = requests.get(url, params=params, headers=headers, timeout=30)
-    resp.raise_for_status()
-    return resp.json()
+from dataset_store import cache_exists, read_cache, write_cache
+from fetch_client import worldbank_indicator
 
 
 def fetch_rule_of_law(cache_path, country="USA", indicator="RL.EST", start_year=1996, end_year=2023, refresh=False):
     cache_path = os.path.abspath(cache_path)
-    if os.path.exists(cache_path) and not refresh:
-        df = pd.read_csv(cache_path)
-        df["date"] = pd.to_datetime(df["date"])
+    if cache_exists(cache_path) and not refresh:
+        df = read_cache(cache_path)
         meta = {
             "source": "World Bank WGI",
             "country": country,
@@ -30,8 +24,8 @@ def fetch_rule_of_law(cache_path, country="USA", indicator="RL.EST", start_year=
         }
         return df, meta
 
-    url = f"{API_BASE}/country/{country}/indicator/{indicator}"
-    data = _request(url, params={"format": "json", "per_page": 1000})
+    data = worldbank_indicator(country, indicator, params={"per_page": 1000},
+                               max_age=0 if refresh else None)
     if not isinstance(data, list) or len(data) < 2:
         raise RuntimeError("Respuesta inesperada del API World Bank")
 
@@ -59,8 +53,7 @@ def fetch_rule_of_law(cache_path, country="USA", indicator="RL.EST", start_year=
     if df.empty:
         raise RuntimeError("No se encontraron datos para el rango solicitado")
 
-    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-    df.to_csv(cache_path, index=False)
+    write_cache(cache_path, df, source="World Bank WGI")
 
     meta = {
         "source": "World Bank WGI",
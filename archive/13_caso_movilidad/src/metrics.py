@@ -1,4 +1,12 @@
 import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "common"))
+
+from grid_metrics import cell_correlations, neighbor_mean_cube
 
 
 def mean(xs):
@@ -42,31 +50,12 @@ def internal_vs_external_cohesion(grid_series, forcing_series):
     steps = len(grid_series)
     if steps == 0:
         return 0.0, 0.0
-    n = len(grid_series[0])
-
-    internal_corrs = []
-    external_corrs = []
-    for i in range(n):
-        for j in range(n):
-            cell_series = [grid_series[t][i][j] for t in range(steps)]
-            neighbor_series = []
-            for t in range(steps):
-                neighbors = []
-                if i > 0:
-                    neighbors.append(grid_series[t][i - 1][j])
-                if i < n - 1:
-                    neighbors.append(grid_series[t][i + 1][j])
-                if j > 0:
-                    neighbors.append(grid_series[t][i][j - 1])
-                if j < n - 1:
-                    neighbors.append(grid_series[t][i][j + 1])
-                neighbor_series.append(sum(neighbors) / len(neighbors))
-
-            internal_corrs.append(correlation(cell_series, neighbor_series))
-            external_corrs.append(correlation(cell_series, forcing_series))
-
-    internal = mean(internal_corrs)
-    external = mean(external_corrs)
+    cube = np.asarray(grid_series, dtype=np.float64)
+
+    internal = float(cell_correlations(cube, neighbor_mean_cube(cube)).mean())
+    external = 0.0
+    if len(forcing_series) == steps:
+        external = float(cell_correlations(cube, forcing_series).mean())
     return internal, external
 
 
@@ -74,20 +63,6 @@ def dominance_share(grid_series):
     steps = len(grid_series)
     if steps == 0:
         return 1.0
-    n = len(grid_series[0])
-    regional = []
-    for t in range(steps):
-        total = 0.0
-        for i in range(n):
-            total += sum(grid_series[t][i])
-        regional.append(total / (n * n))
-
-    scores = []
-    for i in range(n):
-        for j in range(n):
-            cell_series = [grid_series[t][i][j] for t in range(steps)]
-            scores.append(abs(correlation(cell_series, regional)))
-
-    total = sum(scores) if scores else 1.0
-    max_share = max(scores) / total if scores else 1.0
-    return max_share
+    cube = np.asarray(grid_series, dtype=np.float64)
+    scores = np.abs(cell_correlations(cube, cube.mean(axis=(1, 2))))
+    return float(scores.max()) / float(scores.sum())
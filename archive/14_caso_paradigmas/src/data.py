@@ -1,10 +1,15 @@
 import os
+import sys
 import time
 from datetime import datetime
 
 import pandas as pd
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, write_cache
+
 API_BASE = "https://api.openalex.org"
 DEFAULT_UA = "SimulacionClimatica/0.1 (mailto:contacto@simulacion.local)"
 
@@ -60,9 +65,8 @@ def _counts_by_year(concept_id):
 
 def fetch_openalex_paradigms(cache_path, start_year=1950, end_year=2023, refresh=False):
     cache_path = os.path.abspath(cache_path)
-    if os.path.exists(cache_path) and not refresh:
-        df = pd.read_csv(cache_path)
-        df["date"] = pd.to_datetime(df["date"])
+    if cache_exists(cache_path) and not refresh:
+        df = read_cache(cache_path)
         meta = {
             "source": "OpenAlex",
             "concepts": {},
@@ -102,8 +106,7 @@ def fetch_openalex_paradigms(cache_path, start_year=1950, end_year=2023, refresh
         )
 
     df = pd.DataFrame(rows)
-    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-    df.to_csv(cache_path, index=False)
+    write_cache(cache_path, df, source="OpenAlex")
 
     meta = {
         "source": "OpenAlex",
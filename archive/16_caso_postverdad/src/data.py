@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 from datetime import datetime
 
@@ -6,6 +7,10 @@ import numpy as np
 import pandas as pd
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+
+from dataset_store import cache_exists, read_cache, write_cache
+
 API_BASE = "https://wikimedia.org/api/rest_v1/metrics/pageviews/per-article"
 
 DEFAULT_ARTICLES = [
@@ -39,8 +44,8 @@ def _fetch_article_monthly(article, start, end, user_agent):
 
 
 def fetch_posttruth_monthly(start_date, end_date, articles=None, cache_path=None):
-    if cache_path and os.path.exists(cache_path):
-        df = pd.read_csv(cache_path, parse_dates=["date"])
+    if cache_path and cache_exists(cache_path):
+        df = read_cache(cache_path)
         return df
 
     articles = articles or DEFAULT_ARTICLES
@@ -68,7 +73,6 @@ def fetch_posttruth_monthly(start_date, end_date, articles=None, cache_path=None
     out = monthly[["date", "log_views"]].rename(columns={"log_views": "attention"})
 
     if cache_path:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        out.to_csv(cache_path, index=False)
+        write_cache(cache_path, out, source="Wikimedia")
 
     return out
@@ -12,73 +12,181 @@ La dinámica es idéntica a los ABMs individuales:
     - damping * grid
     + noise
 
-La difusión usa convolución con kernel de vecinos (roll + promedio).
-"""
+La difusión usa un stencil de vecinos por slices sobre buffers
+preasignados (sin temporales por paso); el ruido se genera por bloques de
+pasos antes de usarse.
 
-import numpy as np
+Cada caso describe su variante (cotas de clip, macro = media de la grilla o
+estado aparte, campos secundarios, dónde se aplica la asimilación) con un
+ABMKernel y delega en simulate_abm_kernel:
+
+    KERNEL = ABMKernel("x", init_key="s0", clip=(-1.0, 1.0), macro="state", ...)
+
+    def simulate_abm(params, steps, seed):
+        return simulate_abm_kernel(KERNEL, params, steps, seed)
+"""
 
+import functools
+import math
 
-def _neighbor_mean(grid):
-    """Promedio de vecinos 4-conectados usando np.roll (borde periódico corregido)."""
-    n = grid.shape[0]
-    acc = np.zeros_like(grid)
-    count = np.full_like(grid, 4.0)
+import numpy as np
 
-    acc += np.roll(grid, 1, axis=0)   # arriba
-    acc += np.roll(grid, -1, axis=0)  # abajo
-    acc += np.roll(grid, 1, axis=1)   # izquierda
-    acc += np.roll(grid, -1, axis=1)  # derecha
 
-    # Corregir bordes (no son periódicos en el ABM original)
-    # Fila 0: no tiene vecino arriba
-    acc[0, :] -= np.roll(grid, 1, axis=0)[0, :]
+@functools.lru_cache(maxsize=None)
+def _neighbor_counts(n):
+    """(count, 1 / count) de vecinos 4-conectados por celda (bordes no periódicos)."""
+    count = np.full((n, n), 4.0)
     count[0, :] -= 1
-    # Fila n-1: no tiene vecino abajo
-    acc[-1, :] -= np.roll(grid, -1, axis=0)[-1, :]
     count[-1, :] -= 1
-    # Col 0: no tiene vecino izquierda
-    acc[:, 0] -= np.roll(grid, 1, axis=1)[:, 0]
     count[:, 0] -= 1
-    # Col n-1: no tiene vecino derecha
-    acc[:, -1] -= np.roll(grid, -1, axis=1)[:, -1]
     count[:, -1] -= 1
+    inv_count = 1.0 / count
+    count.flags.writeable = False
+    inv_count.flags.writeable = False
+    return count, inv_count
 
-    return acc / count
 
+def _neighbor_sum(grid, out):
+    """
+    Suma de vecinos 4-conectados escrita en `out`, con stencil por slices
+    sobre los dos últimos ejes ((N, N) o un lote (B, N, N)).
+    El orden de suma (arriba, abajo, izquierda, derecha) es el de los ABMs legacy.
+    """
+    out.fill(0.0)
+    out[..., 1:, :] += grid[..., :-1, :]
+    out[..., :-1, :] += grid[..., 1:, :]
+    out[..., :, 1:] += grid[..., :, :-1]
+    out[..., :, :-1] += grid[..., :, 1:]
+    return out
 
-def simulate_abm_numpy(params, steps, seed=2, series_key="tbar",
-                       init_center=0.0, init_range=0.5,
-                       store_grid=True):
+
+def _neighbor_mean(grid, out=None):
+    """Promedio de vecinos 4-conectados (bordes no periódicos)."""
+    if out is None:
+        out = np.empty_like(grid)
+    _neighbor_sum(grid, out)
+    out *= _neighbor_counts(grid.shape[-1])[1]
+    return out
+
+
+def _neighbor_mean_legacy(grid, out=None):
     """
-    ABM vectorizado. Compatible con la interfaz de todos los casos.
+    Promedio de vecinos idéntico al legacy: sum(neighbors) / len(neighbors)
+    (divide por el conteo en vez de multiplicar por su inverso).
+    """
+    if out is None:
+        out = np.empty_like(grid)
+    _neighbor_sum(grid, out)
+    out /= _neighbor_counts(grid.shape[-1])[0]
+    return out
 
-    Args:
-        params: dict con grid_size, diffusion, noise, macro_coupling,
-                forcing_scale, damping, forcing_series, etc.
-        steps: número de pasos
-        seed: semilla para reproducibilidad
-        series_key: nombre de la serie principal en el resultado
-        init_center: centro de inicialización (default 0.0, clima usa t0)
-        init_range: rango de inicialización uniforme
-        store_grid: si True, almacena grid completo (necesario para métricas)
 
-    Returns:
-        dict con series_key, "grid", "forcing"
+def _mean(grids):
+    """Media de cada grilla de un lote (B, N, N) → (B,); igual a np.mean por grilla."""
+    return grids.reshape(len(grids), -1).mean(axis=1)
+
+
+def _legacy_mean(grids):
+    """
+    Media de cada grilla de un lote (B, N, N) con el orden de suma legacy:
+      total = 0; for fila: total += sum(fila); total / (n * n)
+    np.cumsum acumula de forma secuencial (sin suma por pares), así que su
+    último elemento reproduce exactamente esos loops.
     """
-    rng = np.random.RandomState(seed)
-    n = params.get("grid_size", 20)
-    diff = params.get("diffusion", 0.2)
-    noise_amp = params.get("noise", 0.02)
-    mc = params.get("macro_coupling", 0.3)
-    fs = params.get("forcing_scale", 0.01)
-    dmp = params.get("damping", 0.02)
-    assim_series = params.get("assimilation_series")
-    assim_strength = params.get("assimilation_strength", 0.0)
+    _, n_rows, n_cols = grids.shape
+    row_sums = np.cumsum(grids, axis=2)[:, :, -1]
+    return np.cumsum(row_sums, axis=1)[:, -1] / (n_rows * n_cols)
+
+
+class SecondaryField:
+    """
+    Campo secundario por celda que no realimenta la dinámica principal
+    (p.ej. humedad en caso_clima):
+      h' = h + relax * (target - h) + forcing_gain * f
+    Se inicializa con params[init_key] ± init_range (consume números aleatorios
+    justo después de la grilla principal, como en los ABMs de los casos).
+    """
+    def __init__(self, name, init_key, init_range, relax=0.05, target=0.5,
+                 forcing_gain=0.001):
+        self.name = name
+        self.init_key = init_key
+        self.init_range = init_range
+        self.relax = relax
+        self.target = target
+        self.forcing_gain = forcing_gain
+
+
+class ABMKernel:
+    """
+    Descripción declarativa de la variante ABM de un caso.
+
+    Args:
+        series_key: nombre de la serie macro en el resultado ("tbar", "x", ...)
+        init_key: parámetro con el centro de la grilla inicial (None → init_center)
+        init_center: centro por defecto de la grilla inicial
+        init_range: rango de la inicialización uniforme
+        clip: (lo, hi) aplicado a cada celda tras el update, o None
+        macro: "mean" → la macro es la media de la grilla antes del update;
+               "state" → la macro es un estado aparte (x en finanzas, m en
+               movilidad) que integra la media de la grilla:
+                 x' = x + scale * mean(grid') + forcing_scale * f - damping * x + noise
+        state_key: parámetro con el valor inicial del estado (macro="state")
+        state_scale_key: parámetro con la escala grid → estado
+        state_scale: valor por defecto de esa escala
+        terms: términos del update por celda, en el orden en que se suman:
+               "diffusion", "macro", "forcing", "damping"
+        secondary: tupla de SecondaryField
+        assimilation: dónde se aplica el nudging hacia assimilation_series:
+               "output" → solo a la serie reportada (la grilla no cambia)
+               "state" → al estado macro (macro="state")
+               "grid" → a todas las celdas, con el error respecto de la macro
+                        previa al update
+               "grid_post" → a todas las celdas, con el error respecto de la
+                        media posterior al update
+        defaults: valores por defecto de grid_size, diffusion, noise,
+                  macro_coupling, forcing_scale y damping
+        rng: fuente aleatoria por defecto del caso: "numpy" o "legacy"
+             (mismo flujo y mismo orden de suma que random.seed +
+             random.uniform celda por celda; ver rng_compat)
+    """
+    def __init__(self, series_key, init_key=None, init_center=0.0, init_range=0.2,
+                 clip=(-50.0, 50.0), macro="mean", state_key=None,
+                 state_scale_key=None, state_scale=0.05,
+                 terms=("diffusion", "macro", "forcing", "damping"),
+                 secondary=(), assimilation="output", defaults=None,
+                 rng="numpy"):
+        if macro not in ("mean", "state"):
+            raise ValueError(f"macro desconocido: {macro}")
+        if assimilation not in ("output", "state", "grid", "grid_post"):
+            raise ValueError(f"assimilation desconocida: {assimilation}")
+        self.series_key = series_key
+        self.init_key = init_key
+        self.init_center = init_center
+        self.init_range = init_range
+        self.clip = clip
+        self.macro = macro
+        self.state_key = state_key
+        self.state_scale_key = state_scale_key
+        self.state_scale = state_scale
+        self.terms = tuple(terms)
+        self.secondary = tuple(secondary)
+        self.assimilation = assimilation
+        self.defaults = dict(_KERNEL_DEFAULTS)
+        self.defaults.update(defaults or {})
+        self.rng = rng
+
 
-    # Inicialización
-    center = params.get("t0", init_center)
-    grid = center + rng.uniform(-init_range, init_range, (n, n))
+_KERNEL_DEFAULTS = {
+    "grid_size": 20,
+    "diffusion": 0.2,
+    "noise": 0.02,
+    "macro_coupling": 0.3,
+    "forcing_scale": 0.01,
+    "damping": 0.02,
+}
 
+
+def _resolve_forcing(params, steps):
     forcing = params.get("forcing_series")
     if forcing is None:
         # Generar forcing sinusoidal (caso_clima style)
@@ -86,50 +194,654 @@ def simulate_abm_numpy(params, steps, seed=2, series_key="tbar",
         trend = params.get("forcing_trend", 0.0)
         amp = params.get("forcing_seasonal_amp", 0.0)
         period = params.get("forcing_seasonal_period", 12.0)
-        t_arr = np.arange(steps)
-        forcing = base + trend * t_arr + amp * np.sin(2 * np.pi * t_arr / period)
-        forcing = forcing.tolist()
+        forcing = [base + trend * t + amp * math.sin(2.0 * math.pi * t / period)
+                   for t in range(steps)]
+    return forcing
+
+
+def _make_rng(rng, seed):
+    """
+    Fuente de números aleatorios: "numpy", "legacy" o un objeto con
+    .uniform(lo, hi, size).
+    """
+    if rng is None or rng == "numpy":
+        return np.random.RandomState(seed)
+    if rng == "legacy":
+        from rng_compat import LegacyUniformStream
+        return LegacyUniformStream(seed)
+    if hasattr(rng, "uniform"):
+        return rng
+    raise ValueError(f"rng desconocido: {rng}")
+
+
+def simulate_abm_kernel(kernel, params, steps, seed=2, store_grid=None, rng=None,
+                        noise_chunk=256, observers=None):
+    """
+    Simula el ABM descrito por `kernel` de forma vectorizada.
+
+    Args:
+        kernel: ABMKernel del caso
+        params: dict de parámetros del caso
+        steps: número de pasos
+        seed: semilla para reproducibilidad
+        store_grid: si True, almacena el grid completo; None → params["_store_grid"].
+                    El historial es un GridHistory (T, N, N) preasignado; su
+                    dtype sale de params["_grid_dtype"] (float64 por defecto)
+                    y params["_grid_memmap"] lo respalda con un .npy en disco
+        rng: "numpy" (np.random.RandomState(seed)), "legacy" (flujo y
+             aritmética idénticos a los ABMs originales) o un objeto con
+             uniform(lo, hi, size) ya sembrado; None → params["_rng"] o,
+             si no está, kernel.rng
+        noise_chunk: pasos de ruido generados por bloque
+        observers: observadores del loop de pasos (p. ej.
+                   online_metrics.GridMoments), que acumulan métricas sin
+                   guardar la grilla; None → params["_observers"]
+
+    Returns:
+        dict con kernel.series_key, "grid" (GridHistory o None), "forcing"
+        (y la serie media de cada campo secundario)
+    """
+    if observers is None:
+        observers = params.get("_observers")
+    return _simulate_members(kernel, [(params, seed)], steps, store_grid,
+                             rng, noise_chunk, observers)[0]
+
+
+def simulate_kernel_ensemble(kernel, params_list, steps, seeds, store_grid=None,
+                          rng=None, noise_chunk=256, observers=None):
+    """
+    Simula varias corridas del mismo kernel como un único lote (B, N, N).
+
+    Cada miembro tiene sus propios parámetros, forcing y semilla (y su propia
+    fuente aleatoria), así que su resultado es idéntico al de
+    simulate_abm_kernel(kernel, params_list[b], steps, seeds[b]); el lote
+    solo comparte las operaciones vectorizadas de cada paso.
+
+    Args:
+        kernel: ABMKernel del caso
+        params_list: lista de dicts de parámetros (mismo grid_size)
+        steps: número de pasos
+        seeds: una semilla por miembro
+        store_grid, rng, noise_chunk: como en simulate_abm_kernel; rng debe
+            ser "numpy", "legacy" o None
+        observers: observadores del lote completo; la fila b de cada
+            observador corresponde a params_list[b]
+
+    Returns:
+        lista de dicts de resultado, en el orden de params_list
+    """
+    if len(params_list) != len(seeds):
+        raise ValueError("params_list y seeds deben tener la misma longitud")
+    if not params_list:
+        return []
+    return _simulate_members(kernel, list(zip(params_list, seeds)), steps,
+                             store_grid, rng, noise_chunk, observers)
+
+
+def _simulate_members(kernel, members, steps, store_grid, rng, noise_chunk, observers=None):
+    """Núcleo común: simula los miembros [(params, seed), ...] en un lote (B, N, N)."""
+    lot = _MemberLot(kernel, members, steps, store_grid, rng, noise_chunk, observers)
+    lot.advance(steps)
+    return lot.results()
+
+
+class _MemberLot:
+    """
+    Estado de un lote (B, N, N) de miembros de un kernel, que avanza por
+    tramos de pasos y puede descartar miembros entre tramos (select).
+    Cada miembro conserva sus parámetros, forcing y fuente aleatoria, así
+    que su trayectoria no depende de qué otros miembros sigan en el lote.
+
+    Los observadores reciben al final de cada paso update(grid, forcing,
+    macro) con las filas activas, y select(rows) cuando se descartan.
+    """
+    def __init__(self, kernel, members, steps, store_grid, rng, noise_chunk,
+                 observers=None):
+        d = kernel.defaults
+        B = len(members)
+        ps = [p for p, _ in members]
+        self.kernel = kernel
+        self.steps = steps
+        self.t = 0
+
+        def column(key):
+            return np.array([p.get(key, d[key]) for p in ps], dtype=np.float64)
+
+        sizes = {p.get("grid_size", d["grid_size"]) for p in ps}
+        if len(sizes) != 1:
+            raise ValueError("todos los miembros del lote deben compartir grid_size")
+        n = sizes.pop()
+        self.diff = column("diffusion").reshape(B, 1, 1)
+        self.mc = column("macro_coupling").reshape(B, 1, 1)
+        self.fs = column("forcing_scale")
+        self.dmp = column("damping")
+        self.dmp_grid = self.dmp.reshape(B, 1, 1)
+        self.noise_amps = [p.get("noise", d["noise"]) for p in ps]
+
+        specs = [rng if rng is not None else p.get("_rng", kernel.rng) for p in ps]
+        legacy_flags = {spec == "legacy" for spec in specs}
+        if len(legacy_flags) != 1:
+            raise ValueError("no se pueden mezclar miembros legacy y numpy en un lote")
+        legacy = legacy_flags.pop()
+        self.grid_mean = _legacy_mean if legacy else _mean
+        self.neighbor_mean = _neighbor_mean_legacy if legacy else _neighbor_mean
+        self.rngs = [_make_rng(spec, seed) for spec, (_, seed) in zip(specs, members)]
+
+        # Inicialización por miembro (grilla principal y luego campos secundarios)
+        self.grid = np.empty((B, n, n))
+        self.fields = [np.empty((B, n, n)) for _ in kernel.secondary]
+        for m, (p, r) in enumerate(zip(ps, self.rngs)):
+            center = p.get(kernel.init_key, kernel.init_center) if kernel.init_key else kernel.init_center
+            self.grid[m] = center + r.uniform(-kernel.init_range, kernel.init_range, (n, n))
+            for field, sf in zip(self.fields, kernel.secondary):
+                field[m] = p[sf.init_key] + r.uniform(-sf.init_range, sf.init_range, (n, n))
+        self.is_state = kernel.macro == "state"
+        if self.is_state:
+            self.state = np.array([p[kernel.state_key] for p in ps], dtype=np.float64)
+            self.scale = np.array([p.get(kernel.state_scale_key, kernel.state_scale) for p in ps],
+                                  dtype=np.float64)
+
+        self.forcings = [_resolve_forcing(p, steps) for p in ps]
+        self.forcing = np.empty((B, steps))
+        for m, f in enumerate(self.forcings):
+            if len(f) < steps:
+                raise IndexError("forcing_series más corta que steps")
+            self.forcing[m] = f[:steps]
+
+        # Asimilación: solo los miembros que la tienen activa
+        self.assim = [(m, p["assimilation_series"], p.get("assimilation_strength", 0.0))
+                      for m, p in enumerate(ps) if p.get("assimilation_series") is not None]
+
+        # Buffers preasignados: grilla nueva (se intercambia con la actual),
+        # promedio de vecinos y un temporal para cada término.
+        self._allocate_buffers()
 
-    main_series = []
-    grid_series = [] if store_grid else None
+        # Ruido por bloques de pasos: cada paso consume n*n draws de la grilla
+        # (+1 del estado macro), en el mismo orden que draws paso a paso; cada
+        # miembro lo toma de su propia fuente.
+        self.cells = n * n
+        width = self.cells + (1 if self.is_state else 0)
+        self.chunk = max(1, min(steps, noise_chunk))
+        self.noise_block = np.empty((B, self.chunk, width))
 
+        self.main_series = np.empty((B, steps))
+        self.field_series = [np.empty((B, steps)) for _ in kernel.secondary]
+        if store_grid is None:
+            store = [p.get("_store_grid", True) for p in ps]
+        else:
+            store = [store_grid] * B
+        self.histories = [None] * B
+        if any(store):
+            from grid_history import GridHistory
+            for m, p in enumerate(ps):
+                if store[m]:
+                    self.histories[m] = GridHistory(steps, n,
+                                                    dtype=p.get("_grid_dtype", np.float64),
+                                                    path=p.get("_grid_memmap"))
+        # Índices originales de las filas activas (slice mientras no se descarte)
+        self.members = np.arange(B)
+        self._rows = slice(None)
+        # Sensibilidades forward-mode (ver enable_tangents)
+        self.tangents = None
+        self.observers = list(observers or [])
+
+    def _allocate_buffers(self):
+        self.new_grid = np.empty_like(self.grid)
+        self.nb_mean = np.empty_like(self.grid)
+        self.tmp = np.empty_like(self.grid)
+        self.field_tmp = np.empty_like(self.grid) if self.fields else None
+
+    def enable_tangents(self):
+        """
+        Propaga, junto con la simulación, las derivadas de la grilla (y del
+        estado macro) respecto de (forcing_scale, macro_coupling, damping)
+        con el ruido fijo. La grilla inicial no depende de ellos.
+        """
+        B, n, _ = self.grid.shape
+        self.tangents = np.zeros((3, B, n, n))
+        self.state_tangents = np.zeros((3, B)) if self.is_state else None
+        self.main_tangents = np.empty((3, B, self.steps))
+
+    def _tangent_step(self, f, grid, pull, new_grid):
+        """
+        Un paso de las derivadas: la actualización es lineal en la grilla, así
+        que dg' = L(dg) + ∂(término)/∂θ; el clip anula la derivada de las
+        celdas acotadas (new_grid es la grilla nueva antes del clip).
+        """
+        kernel = self.kernel
+        dg = self.tangents
+        B = dg.shape[1]
+        if self.is_state:
+            dpull = self.state_tangents
+        else:
+            dpull = dg.reshape(3, B, -1).mean(axis=2)
+        new_dg = dg.copy()
+        for term in kernel.terms:
+            if term == "diffusion":
+                nb = _neighbor_mean(dg.reshape(3 * B, *dg.shape[2:])).reshape(dg.shape)
+                new_dg += self.diff * (nb - dg)
+            elif term == "macro":
+                new_dg += self.mc * (dpull[:, :, None, None] - dg)
+                new_dg[1] += pull.reshape(B, 1, 1) - grid
+            elif term == "forcing":
+                new_dg[0] += f.reshape(B, 1, 1)
+            elif term == "damping":
+                new_dg -= self.dmp_grid * dg
+                new_dg[2] -= grid
+        if kernel.clip is not None:
+            inside = (new_grid >= kernel.clip[0]) & (new_grid <= kernel.clip[1])
+            new_dg *= inside
+        self.tangents = new_dg
+        return new_dg
+
+    def select(self, rows):
+        """Conserva solo las filas activas `rows` (posiciones dentro del lote)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        for name in ("diff", "mc", "fs", "dmp", "dmp_grid", "grid", "forcing", "noise_block"):
+            setattr(self, name, getattr(self, name)[rows])
+        self.fields = [field[rows] for field in self.fields]
+        if self.is_state:
+            self.state = self.state[rows]
+            self.scale = self.scale[rows]
+        self.noise_amps = [self.noise_amps[r] for r in rows]
+        self.rngs = [self.rngs[r] for r in rows]
+        position = {int(r): i for i, r in enumerate(rows)}
+        self.assim = [(position[m], series, strength) for m, series, strength in self.assim
+                      if m in position]
+        if self.tangents is not None:
+            self.tangents = self.tangents[:, rows]
+            if self.is_state:
+                self.state_tangents = self.state_tangents[:, rows]
+        for observer in self.observers:
+            observer.select(rows)
+        self.members = self.members[rows]
+        self._rows = self.members
+        self._allocate_buffers()
+
+    def advance(self, t_end):
+        """Simula los pasos [self.t, t_end) de las filas activas."""
+        kernel = self.kernel
+        grid_mean, neighbor_mean = self.grid_mean, self.neighbor_mean
+        grid, new_grid = self.grid, self.new_grid
+        nb_mean, tmp, field_tmp = self.nb_mean, self.tmp, self.field_tmp
+        diff, mc, fs, dmp, dmp_grid = self.diff, self.mc, self.fs, self.dmp, self.dmp_grid
+        noise_block, cells, chunk = self.noise_block, self.cells, self.chunk
+        is_state = self.is_state
+        state = self.state if is_state else None
+        B = len(grid)
+        rows_out = self._rows
+        stored = [(row, self.histories[m]) for row, m in enumerate(self.members)
+                  if self.histories[m] is not None]
+
+        for t in range(self.t, t_end):
+            k = t % chunk
+            if k == 0:
+                rows = min(chunk, self.steps - t)
+                for m, r in enumerate(self.rngs):
+                    noise_block[m, :rows] = r.uniform(-self.noise_amps[m], self.noise_amps[m],
+                                                      (rows, noise_block.shape[2]))
+            f = self.forcing[:, t]
+            macro_pre = grid_mean(grid)
+            pull = (state if is_state else macro_pre).reshape(B, 1, 1)
+
+            neighbor_mean(grid, out=nb_mean)
+            np.copyto(new_grid, grid)
+            for term in kernel.terms:
+                if term == "diffusion":
+                    np.subtract(nb_mean, grid, out=tmp)
+                    tmp *= diff
+                    new_grid += tmp
+                elif term == "macro":
+                    np.subtract(pull, grid, out=tmp)
+                    tmp *= mc
+                    new_grid += tmp
+                elif term == "forcing":
+                    new_grid += (fs * f).reshape(B, 1, 1)
+                elif term == "damping":
+                    np.multiply(grid, dmp_grid, out=tmp)
+                    new_grid -= tmp
+            new_grid += noise_block[:, k, :cells].reshape(B, grid.shape[1], grid.shape[2])
+            if self.tangents is not None:
+                new_dg = self._tangent_step(f, grid, pull, new_grid)
+            if kernel.clip is not None:
+                np.clip(new_grid, kernel.clip[0], kernel.clip[1], out=new_grid)
+
+            for field, sf, series in zip(self.fields, kernel.secondary, self.field_series):
+                np.subtract(sf.target, field, out=field_tmp)
+                field_tmp *= sf.relax
+                field += field_tmp
+                field += (sf.forcing_gain * f).reshape(B, 1, 1)
+                series[rows_out, t] = _mean(field)
+
+            if is_state:
+                if self.tangents is not None:
+                    ds = self.state_tangents
+                    ds_new = ds + self.scale * new_dg.reshape(3, B, -1).mean(axis=2) - dmp * ds
+                    ds_new[0] += f
+                    ds_new[2] -= state
+                    self.state_tangents = ds_new
+                state = (state + self.scale * grid_mean(new_grid) + fs * f - dmp * state
+                         + noise_block[:, k, cells])
+
+            output_targets = []
+            if self.assim:
+                macro_post = grid_mean(new_grid) if kernel.assimilation == "grid_post" else None
+                for m, series_m, strength in self.assim:
+                    target = series_m[t] if t < len(series_m) else None
+                    if target is None:
+                        continue
+                    if kernel.assimilation == "grid":
+                        new_grid[m] += strength * (target - macro_pre[m])
+                    elif kernel.assimilation == "grid_post":
+                        new_grid[m] += strength * (target - macro_post[m])
+                    elif kernel.assimilation == "state":
+                        state[m] = state[m] + strength * (target - state[m])
+                    else:
+                        output_targets.append((m, target, strength))
+
+            grid, new_grid = new_grid, grid
+            if self.tangents is not None:
+                self.main_tangents[:, rows_out, t] = (
+                    self.state_tangents if is_state
+                    else self.tangents.reshape(3, B, -1).mean(axis=2))
+            if is_state:
+                self.main_series[rows_out, t] = state
+            else:
+                values = grid_mean(grid)
+                for m, target, strength in output_targets:
+                    values[m] = values[m] + strength * (target - values[m])
+                self.main_series[rows_out, t] = values
+
+            for row, history in stored:
+                history.append(grid[row])
+            for observer in self.observers:
+                observer.update(grid, f, self.main_series[rows_out, t])
+
+        self.grid, self.new_grid = grid, new_grid
+        if is_state:
+            self.state = state
+        self.t = max(self.t, t_end)
+
+    def results(self):
+        """Dicts de resultado de todos los miembros (en el orden original)."""
+        results = []
+        for m, f in enumerate(self.forcings):
+            result = {
+                self.kernel.series_key: self.main_series[m].tolist(),
+                "grid": self.histories[m],
+                "forcing": f if isinstance(f, list) else list(f),
+            }
+            for sf, series in zip(self.kernel.secondary, self.field_series):
+                result[sf.name] = series[m].tolist()
+            results.append(result)
+        return results
+
+
+def simulate_kernel_sensitivities(kernel, params, steps, seed=2, rng=None):
+    """
+    Serie principal y su jacobiano respecto de (forcing_scale,
+    macro_coupling, damping), con el ruido de la semilla fijo.
+
+    Las derivadas se propagan en forward-mode junto con la simulación (tres
+    grillas tangentes), así que el costo es ~4 simulaciones y el jacobiano
+    es exacto salvo en los pasos donde una celda toca el clip. La
+    asimilación no se diferencia (la calibración la desactiva).
+
+    Returns:
+        (series (steps,), jac (steps, 3))
+    """
+    lot = _MemberLot(kernel, [(params, seed)], steps, False, rng, 256)
+    lot.enable_tangents()
+    lot.advance(steps)
+    return lot.main_series[0].copy(), lot.main_tangents[:, 0, :].T.copy()
+
+
+def _term_coef(kernel, p, key, term):
+    """Coeficiente del término `term` en la grilla (0 si el kernel no lo usa)."""
+    return float(p.get(key, kernel.defaults[key])) if term in kernel.terms else 0.0
+
+
+def _noise_source(kernel, spec, seed, amp, n, steps):
+    """
+    Grilla inicial (sin centro) y ruido (steps, n*n [+1]) del flujo de una
+    semilla, consumidos en el mismo orden que _MemberLot.
+    """
+    r = _make_rng(spec, seed)
+    init = r.uniform(-kernel.init_range, kernel.init_range, (n, n))
+    for sf in kernel.secondary:
+        r.uniform(-sf.init_range, sf.init_range, (n, n))
+    width = n * n + (1 if kernel.macro == "state" else 0)
+    return init, r.uniform(-amp, amp, (steps, width))
+
+
+def _fluctuation_paths(groups, sources, n, steps):
+    """
+    Simula la fluctuación h (media cero) de cada grupo (source, diff, s),
+    s = macro_coupling + damping, todos en un lote (G, N, N):
+        w = (1 - s) h + diff (vecinos(h) - h) + ruido;  q = mean(w);  h' = w - q
+    Returns: (q, h_max, h_min), cada uno (G, steps)
+    """
+    G = len(groups)
+    src = [sources[key] for key, _, _ in groups]
+    diff = np.array([d for _, d, _ in groups]).reshape(G, 1, 1)
+    keep = np.array([1.0 - s for _, _, s in groups]).reshape(G, 1, 1)
+    h = np.stack([init - init.mean() for init, _ in src])
+    noise = [xi for _, xi in src]
+    nb = np.empty_like(h)
+    w = np.empty_like(h)
+    q = np.empty((G, steps))
+    h_max = np.empty((G, steps))
+    h_min = np.empty((G, steps))
+    cells = n * n
     for t in range(steps):
-        f = forcing[t]
-        macro = grid.mean()
-
-        # Difusión vectorizada
-        nb_mean = _neighbor_mean(grid)
-
-        # Update vectorizado completo
-        noise_matrix = rng.uniform(-noise_amp, noise_amp, (n, n))
-        grid = (
-            grid
-            + diff * (nb_mean - grid)
-            + fs * f
-            + mc * (macro - grid)
-            - dmp * grid
-            + noise_matrix
-        )
+        _neighbor_mean(h, out=nb)
+        nb -= h
+        nb *= diff
+        np.multiply(h, keep, out=w)
+        w += nb
+        w += np.stack([xi[t, :cells] for xi in noise]).reshape(G, n, n)
+        q[:, t] = _mean(w)
+        np.subtract(w, q[:, t].reshape(G, 1, 1), out=h)
+        flat = h.reshape(G, -1)
+        h_max[:, t] = flat.max(axis=1)
+        h_min[:, t] = flat.min(axis=1)
+    return q, h_max, h_min
+
+
+def mean_field_macro(kernel, params_list, steps, seeds, rng=None):
+    """
+    Serie principal de un ensemble por la reducción de campo medio, sin
+    simular la grilla de cada miembro.
 
-        # Nudging
-        if assim_series is not None and t < len(assim_series):
-            target = assim_series[t]
-            if target is not None:
-                macro_post = grid.mean()
-                grid += assim_strength * (target - macro_post)
-
-        macro_final = float(grid.mean())
-        main_series.append(macro_final)
-
-        if store_grid:
-            grid_series.append(grid.tolist())
-
-    result = {
-        series_key: main_series,
-        "forcing": forcing if isinstance(forcing, list) else forcing.tolist(),
-    }
-    if store_grid:
-        result["grid"] = grid_series
+    Con g = m + h (h de media cero) y sin clip, la actualización se separa:
+        h' = w - mean(w),  w = (1 - mc - dmp) h + diff (vecinos(h) - h) + ruido
+        m' = m + mc (pull - m) + fs f - dmp m + q,  q = mean(w)
+    (la difusión con bordes no periódicos no conserva la media: su aporte
+    entra en q junto con la media del ruido). h, q y los extremos de h solo
+    dependen de (diffusion, mc + dmp) y del ruido de la semilla, así que se
+    simulan una vez por grupo; cada miembro es una recurrencia escalar O(T)
+    (más el estado macro si macro="state").
+
+    Un miembro es exacto (salvo redondeo) si ninguna celda m' + h' toca el
+    clip en ningún paso; los que lo tocan, los que tienen asimilación o una
+    fuente aleatoria propia quedan marcados para simular con la grilla.
+
+    Returns:
+        (series (B, steps), exact (B,) bool); las filas no exactas son NaN
+    """
+    if len(params_list) != len(seeds):
+        raise ValueError("params_list y seeds deben tener la misma longitud")
+    d = kernel.defaults
+    B = len(params_list)
+    series = np.full((B, steps), np.nan)
+    exact = np.zeros(B, dtype=bool)
+    is_state = kernel.macro == "state"
+
+    sources, groups, members = {}, {}, []
+    for b, (p, seed) in enumerate(zip(params_list, seeds)):
+        spec = rng if rng is not None else p.get("_rng", kernel.rng)
+        if not isinstance(spec, str) or p.get("assimilation_series") is not None:
+            continue
+        n = p.get("grid_size", d["grid_size"])
+        diff = _term_coef(kernel, p, "diffusion", "diffusion")
+        mc = _term_coef(kernel, p, "macro_coupling", "macro")
+        dmp = _term_coef(kernel, p, "damping", "damping")
+        src_key = (spec, seed, float(p.get("noise", d["noise"])), n)
+        if src_key not in sources:
+            sources[src_key] = _noise_source(kernel, spec, seed, src_key[2], n, steps)
+        group = groups.setdefault((src_key, diff, round(mc + dmp, 12)),
+                                  (len(groups), mc + dmp))[0]
+        members.append((b, p, group, mc, dmp))
+    if not members:
+        return series, exact
+
+    # Fluctuación por grupo (un lote por tamaño de grilla)
+    G = len(groups)
+    q = np.empty((G, steps))
+    h_max = np.empty((G, steps))
+    h_min = np.empty((G, steps))
+    by_size = {}
+    for (src_key, diff, _), (g, s) in groups.items():
+        by_size.setdefault(src_key[3], []).append((g, (src_key, diff, s)))
+    for n, entries in by_size.items():
+        idx = [g for g, _ in entries]
+        q[idx], h_max[idx], h_min[idx] = _fluctuation_paths(
+            [spec for _, spec in entries], sources, n, steps)
+    src_of_group = {g: src_key for (src_key, _, _), (g, _) in groups.items()}
+
+    # Recurrencia escalar de cada miembro
+    rows = np.array([b for b, *_ in members])
+    grp = np.array([g for _, _, g, _, _ in members])
+    ps = [p for _, p, _, _, _ in members]
+    mc = np.array([m[3] for m in members])
+    dmp = np.array([m[4] for m in members])
+    fs_raw = np.array([p.get("forcing_scale", d["forcing_scale"]) for p in ps], dtype=np.float64)
+    fs_grid = fs_raw if "forcing" in kernel.terms else np.zeros_like(fs_raw)
+    forcing = np.empty((len(ps), steps))
+    for i, p in enumerate(ps):
+        f = _resolve_forcing(p, steps)
+        if len(f) < steps:
+            raise IndexError("forcing_series más corta que steps")
+        forcing[i] = f[:steps]
+    center = np.array([p.get(kernel.init_key, kernel.init_center) if kernel.init_key
+                       else kernel.init_center for p in ps], dtype=np.float64)
+    m = center + np.array([sources[src_of_group[g]][0].mean() for g in grp])
+    if is_state:
+        state = np.array([p[kernel.state_key] for p in ps], dtype=np.float64)
+        scale = np.array([p.get(kernel.state_scale_key, kernel.state_scale) for p in ps],
+                         dtype=np.float64)
+        dmp_state = np.array([p.get("damping", d["damping"]) for p in ps], dtype=np.float64)
+        eta = np.stack([sources[src_of_group[g]][1][:, -1] for g in range(G)])[grp]
+
+    ok = np.ones(len(ps), dtype=bool)
+    if kernel.clip is not None:
+        lo, hi = kernel.clip
+        tol_lo = 1e-9 * max(1.0, abs(lo))
+        tol_hi = 1e-9 * max(1.0, abs(hi))
+    out = np.empty((len(ps), steps))
+    for t in range(steps):
+        f = forcing[:, t]
+        pull = state if is_state else m
+        m = m + mc * (pull - m) + fs_grid * f - dmp * m + q[grp, t]
+        if kernel.clip is not None:
+            ok &= (m + h_max[grp, t] < hi - tol_hi) & (m + h_min[grp, t] > lo + tol_lo)
+        if is_state:
+            state = state + scale * m + fs_raw * f - dmp_state * state + eta[:, t]
+            out[:, t] = state
+        else:
+            out[:, t] = m
+
+    series[rows[ok]] = out[ok]
+    exact[rows[ok]] = True
+    return series, exact
+
+
+def simulate_kernel_macro(kernel, params_list, steps, seeds, rng=None):
+    """
+    Serie principal (B, steps) de un ensemble, por campo medio donde es
+    exacto (ver mean_field_macro) y con la grilla completa en el resto.
+    Pensado para la calibración, que solo usa la serie macro.
+    """
+    series, exact = mean_field_macro(kernel, params_list, steps, seeds, rng=rng)
+    rest = np.flatnonzero(~exact)
+    if len(rest):
+        lot = _MemberLot(kernel, [(params_list[b], seeds[b]) for b in rest], steps,
+                         False, rng, 256)
+        lot.advance(steps)
+        series[rest] = lot.main_series
+    return series
+
+
+def iter_kernel_ensemble(kernel, params_list, steps, seeds, chunk=32, rng=None,
+                         noise_chunk=None):
+    """
+    Simula un ensemble y entrega la serie principal por tramos de `chunk` pasos.
+
+    Generador de (members, block): members son los índices (en params_list)
+    de los miembros que siguen activos y block su serie principal en el
+    tramo, (len(members), pasos del tramo). Enviando con .send(keep) un
+    subconjunto de members, el resto se descarta y deja de simularse; los
+    que siguen producen exactamente la misma serie que sin descartes.
+
+        gen = iter_kernel_ensemble(KERNEL, params_list, steps, seeds)
+        members, block = next(gen)
+        members, block = gen.send(members[:10])   # siguen solo 10
+
+    No almacena la grilla (calibración); el tramo final puede ser más corto.
+    El ruido se genera por bloques de noise_chunk pasos (default: chunk),
+    así el buffer de ruido de lotes grandes queda acotado.
+    """
+    if len(params_list) != len(seeds):
+        raise ValueError("params_list y seeds deben tener la misma longitud")
+    if not params_list:
+        return
+    lot = _MemberLot(kernel, list(zip(params_list, seeds)), steps, False, rng,
+                     noise_chunk or chunk)
+    while lot.t < steps:
+        t0 = lot.t
+        lot.advance(min(steps, t0 + chunk))
+        keep = yield lot.members.copy(), lot.main_series[lot.members, t0:lot.t]
+        if keep is not None:
+            position = {int(m): i for i, m in enumerate(lot.members)}
+            rows = [position[int(m)] for m in keep]
+            if not rows:
+                return
+            lot.select(rows)
+
+
+# Variante usada históricamente por simulate_abm_numpy: sin clip, forcing antes
+# del acoplamiento macro y nudging sobre la grilla con la media posterior.
+_NUMPY_TERMS = ("diffusion", "forcing", "macro", "damping")
+
+
+def simulate_abm_numpy(params, steps, seed=2, series_key="tbar",
+                       init_center=0.0, init_range=0.5,
+                       store_grid=True, observers=None):
+    """
+    ABM vectorizado. Compatible con la interfaz de todos los casos.
+
+    Args:
+        params: dict con grid_size, diffusion, noise, macro_coupling,
+                forcing_scale, damping, forcing_series, etc.
+        steps: número de pasos
+        seed: semilla para reproducibilidad
+        series_key: nombre de la serie principal en el resultado
+        init_center: centro de inicialización (default 0.0, clima usa t0)
+        init_range: rango de inicialización uniforme
+        store_grid: si True, almacena grid completo (necesario para métricas,
+                    salvo las que acumulen los observers)
+        observers: observadores del loop de pasos (ver online_metrics)
+
+    Returns:
+        dict con series_key, "grid", "forcing"
+    """
+    kernel = ABMKernel(series_key, init_key="t0", init_center=init_center,
+                       init_range=init_range, clip=None, terms=_NUMPY_TERMS,
+                       assimilation="grid_post")
+    result = simulate_abm_kernel(kernel, params, steps, seed=seed,
+                                 store_grid=store_grid, observers=observers)
+    if not store_grid:
+        del result["grid"]
     return result
 
 
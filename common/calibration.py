@@ -19,14 +19,31 @@ def _rmse(a, b):
     return math.sqrt(sum((x - y) ** 2 for x, y in zip(a, b)) / len(a))
 
 
+def _grid_params(base_params, fs, mc, dmp):
+    params = dict(base_params)
+    params["forcing_scale"] = fs
+    params["macro_coupling"] = mc
+    params["damping"] = dmp
+    params["assimilation_strength"] = 0.0
+    params["assimilation_series"] = None
+    return params
+
+
+def _grid_error(sim, obs_train):
+    return _rmse(sim["p"], obs_train)
+
+
 def calibrate_abm_grid(obs_train, base_params, steps, simulate_abm_fn,
-                        param_grid=None, seed=2, regularization=0.0):
+                        param_grid=None, seed=2, regularization=0.0,
+                        n_workers=None):
     """
     Grid search sobre parámetros ABM con regularización opcional.
 
     param_grid: dict con listas de valores por parámetro.
         Default: forcing_scale × macro_coupling × damping (150 combos)
     regularization: penalización L2 sobre macro_coupling (evita acoplamiento excesivo)
+    n_workers: si > 1, reparte el grid en un pool de procesos (parallel_grid);
+        el resultado es idéntico al secuencial.
 
     Retorna: (best_params_dict, best_error, search_log)
     """
@@ -37,27 +54,33 @@ def calibrate_abm_grid(obs_train, base_params, steps, simulate_abm_fn,
             "damping": [0.0, 0.01, 0.02, 0.03, 0.05, 0.08, 0.1],
         }
 
+    combos = [(fs, mc, dmp)
+              for fs in param_grid.get("forcing_scale", [0.05])
+              for mc in param_grid.get("macro_coupling", [0.2])
+              for dmp in param_grid.get("damping", [0.02])]
+
+    if n_workers is not None and n_workers > 1:
+        from parallel_grid import parallel_grid_errors
+        errors = parallel_grid_errors(obs_train, base_params, steps, simulate_abm_fn,
+                                      combos, _grid_params, _grid_error,
+                                      seed=seed, n_workers=n_workers)
+    else:
+        errors = []
+        for fs, mc, dmp in combos:
+            sim = simulate_abm_fn(_grid_params(base_params, fs, mc, dmp), steps, seed=seed)
+            errors.append(_grid_error(sim, obs_train))
+
     candidates = []
-    for fs in param_grid.get("forcing_scale", [0.05]):
-        for mc in param_grid.get("macro_coupling", [0.2]):
-            for dmp in param_grid.get("damping", [0.02]):
-                params = dict(base_params)
-                params["forcing_scale"] = fs
-                params["macro_coupling"] = mc
-                params["damping"] = dmp
-                params["assimilation_strength"] = 0.0
-                params["assimilation_series"] = None
-                sim = simulate_abm_fn(params, steps, seed=seed)
-                err = _rmse(sim["p"], obs_train)
-                reg_penalty = regularization * (mc ** 2)
-                score = err + reg_penalty
-                candidates.append({
-                    "forcing_scale": fs,
-                    "macro_coupling": mc,
-                    "damping": dmp,
-                    "rmse": err,
-                    "score": score,
-                })
+    for err, (fs, mc, dmp) in zip(errors, combos):
+        reg_penalty = regularization * (mc ** 2)
+        score = err + reg_penalty
+        candidates.append({
+            "forcing_scale": fs,
+            "macro_coupling": mc,
+            "damping": dmp,
+            "rmse": err,
+            "score": score,
+        })
 
     candidates.sort(key=lambda x: x["score"])
     best = candidates[0]
@@ -116,48 +139,19 @@ def refine_abm_local(obs_train, base_params, steps, simulate_abm_fn,
     return best, best_err
 
 
-def calibrate_ode_params(obs, forcing, regularization=0.01):
+def calibrate_ode_params(obs, forcing, regularization=None):
     """
     Calibración ODE con regularización Tikhonov.
     dX/dt = alpha*(F - beta*X)
-    Resuelve por mínimos cuadrados regularizados.
+    Resuelve por mínimos cuadrados regularizados (ver ode_calibration).
 
-    regularization: lambda para penalización L2 (evita betas explosivos)
+    regularization: lambda para penalización L2 (evita betas explosivos);
+    una secuencia de lambdas o None (camino por defecto) se elige por
+    validación cruzada de origen móvil.
 
     Retorna: (alpha, beta)
     """
-    n = len(obs) - 1
-    if n < 2:
-        return 0.05, 0.02
-
-    sum_f2 = 0.0
-    sum_x2 = 0.0
-    sum_fx = 0.0
-    sum_fy = 0.0
-    sum_xy = 0.0
-
-    for t in range(n):
-        y = obs[t + 1] - obs[t]
-        f = forcing[t]
-        x = obs[t]
-        sum_f2 += f * f
-        sum_x2 += x * x
-        sum_fx += f * x
-        sum_fy += f * y
-        sum_xy += x * y
-
-    # Regularización Tikhonov: A'A + λI
-    reg = regularization * n
-    det = (sum_f2 + reg) * (sum_x2 + reg) - (sum_fx * sum_fx)
-    if abs(det) < 1e-15:
-        return 0.05, 0.02
-
-    a = (sum_fy * (sum_x2 + reg) - sum_xy * sum_fx) / det
-    b = ((sum_f2 + reg) * sum_xy - sum_fy * sum_fx) / det
-
-    alpha = max(0.001, min(a, 0.5))
-    beta = 0.02
-    if abs(alpha) > 1e-10:
-        beta = max(0.001, min(-b / alpha, 1.0))
-
-    return alpha, beta
+    from ode_calibration import fit_ode
+
+    fit = fit_ode(obs, forcing, regularization)
+    return fit["alpha"], fit["beta"]
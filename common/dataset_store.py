@@ -0,0 +1,260 @@
+"""
+dataset_store.py — Caché tipado en disco de las series de los casos.
+
+Cada caso guardaba sus datos reales como CSV en NN_caso_*/data/*.csv y los
+re-parseaba en cada corrida, sin esquema ni procedencia. Aquí cada serie se
+guarda como un arreglo estructurado de NumPy (.npy, columnas con su dtype:
+fechas datetime64, floats, enteros, texto de ancho fijo) junto a un .json
+con los metadatos:
+
+    {source, indicator, fetched_at, rows, columns: {nombre: dtype}, sha256, ...}
+
+El .npy se carga con mmap y sin parseo. La API recibe la ruta del CSV que
+ya usaba cada data.py; el store vive al lado (mismo nombre, .npy/.json) y
+un CSV existente se migra automáticamente en la primera lectura:
+
+    if cache_exists(cache_path):
+        df = read_cache(cache_path)
+    ...
+    write_cache(cache_path, df, source="World Bank", indicator=INDICATOR)
+
+Cada fuente tiene una vigencia por defecto (SOURCE_MAX_AGE, p.ej. 30 días
+para el World Bank y 1 día para Wikimedia): cache_exists compara el
+fetched_at guardado con ella y un store vencido se vuelve a descargar.
+SIMULACION_DATA_MAX_AGE la sustituye para todas las fuentes ("inf" para no
+vencer nunca); los respaldos ante un fallo de red usan max_age=ANY_AGE.
+
+preload_all recorre los data/ de todos los casos (migra los CSV que
+queden y verifica los hashes) en una pasada; el orquestador lo expone
+con --preload.
+"""
+
+import glob
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+STORE_VERSION = 1
+
+DAY = 86400.0
+
+# Vigencia por defecto (segundos) del store según su fuente, ajustada a la
+# cadencia con que cada API publica datos nuevos. Una fuente desconocida
+# (o un CSV migrado sin fuente) no vence nunca.
+SOURCE_MAX_AGE = {
+    "World Bank": 30 * DAY,
+    "World Bank WGI": 90 * DAY,
+    "OWID": 7 * DAY,
+    "OPSD": 30 * DAY,
+    "Meteostat": 30 * DAY,
+    "OpenAlex": 30 * DAY,
+    "MTA": 7 * DAY,
+    "Wikimedia": 1 * DAY,
+    "Yahoo Finance": 1 * DAY,
+}
+
+# max_age para aceptar el store sin importar su antigüedad (p.ej. como
+# respaldo cuando la descarga falla).
+ANY_AGE = math.inf
+
+
+def store_paths(cache_path):
+    """(.npy, .json) del store correspondiente a la ruta de caché (CSV) de un caso."""
+    base = os.path.splitext(os.path.abspath(cache_path))[0]
+    return base + ".npy", base + ".json"
+
+
+def _column_dtype(series):
+    """dtype de NumPy con que se guarda una columna, y su tipo lógico."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_convert(None)
+        return series.to_numpy(dtype="datetime64[ns]"), "datetime"
+    if pd.api.types.is_bool_dtype(series) and not series.isna().any():
+        return series.to_numpy(dtype=bool), "bool"
+    if pd.api.types.is_integer_dtype(series) and not series.isna().any():
+        return series.to_numpy(dtype=np.int64), "int"
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan), "float"
+    values = series.astype(object).where(series.notna(), "")
+    return np.asarray(values.astype(str).to_numpy(), dtype=str), "str"
+
+
+def _to_records(df):
+    columns, kinds = [], {}
+    for name in df.columns:
+        values, kind = _column_dtype(df[name])
+        columns.append((str(name), values))
+        kinds[str(name)] = kind
+    dtype = [(name, values.dtype) for name, values in columns]
+    records = np.empty(len(df), dtype=dtype)
+    for name, values in columns:
+        records[name] = values
+    return records, kinds
+
+
+def _content_hash(records):
+    h = hashlib.sha256()
+    h.update(str(records.dtype.descr).encode("utf-8"))
+    h.update(np.ascontiguousarray(records).tobytes())
+    return h.hexdigest()
+
+
+def write_cache(cache_path, df, source=None, indicator=None, **extra):
+    """
+    Guarda df en el store de cache_path (escritura atómica del .npy y .json).
+
+    Returns:
+        dict de metadatos escritos
+    """
+    npy_path, meta_path = store_paths(cache_path)
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    records, kinds = _to_records(df.reset_index(drop=True))
+    meta = {
+        "version": STORE_VERSION,
+        "source": source,
+        "indicator": indicator,
+        "fetched_at": extra.pop("fetched_at", time.time()),
+        "rows": int(len(records)),
+        "columns": kinds,
+        "dtype": [[name, records.dtype[name].str] for name in records.dtype.names],
+        "sha256": _content_hash(records),
+    }
+    meta.update(extra)
+    tmp = npy_path + ".tmp.npy"
+    np.save(tmp, records, allow_pickle=False)
+    os.replace(tmp, npy_path)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+
+def read_meta(cache_path):
+    """Metadatos del store de cache_path, o None si no existe."""
+    _, meta_path = store_paths(cache_path)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def load_records(cache_path, mmap=True, verify=False):
+    """
+    Arreglo estructurado del store (memmap de solo lectura con mmap=True).
+
+    Raises:
+        ValueError si verify=True y el contenido no coincide con el sha256
+    """
+    npy_path, _ = store_paths(cache_path)
+    records = np.load(npy_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    if verify:
+        meta = read_meta(cache_path)
+        if meta is None or _content_hash(records) != meta.get("sha256"):
+            raise ValueError(f"hash del store no coincide: {npy_path}")
+    return records
+
+
+def _records_to_frame(records, kinds):
+    data = {}
+    for name in records.dtype.names:
+        values = records[name]
+        kind = kinds.get(name)
+        if kind == "str":
+            data[name] = pd.Series(values.astype(object), dtype=object).replace("", np.nan)
+        else:
+            data[name] = np.array(values)
+    return pd.DataFrame(data)
+
+
+def migrate_csv(cache_path, parse_dates=("date",), source=None, indicator=None):
+    """Convierte el CSV de cache_path al store (conserva el CSV); devuelve los metadatos."""
+    df = pd.read_csv(cache_path)
+    for col in parse_dates:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return write_cache(cache_path, df, source=source, indicator=indicator,
+                       fetched_at=os.path.getmtime(cache_path), migrated_from="csv")
+
+
+def default_max_age(meta):
+    """
+    Vigencia (segundos) del store descrito por meta: SIMULACION_DATA_MAX_AGE
+    si está definida (segundos o "inf"), si no SOURCE_MAX_AGE[meta["source"]].
+    """
+    env = os.environ.get("SIMULACION_DATA_MAX_AGE", "")
+    if env:
+        return float(env)
+    return SOURCE_MAX_AGE.get((meta or {}).get("source"), ANY_AGE)
+
+
+def cache_exists(cache_path, max_age=None):
+    """
+    True si hay datos cacheados vigentes para cache_path (store o CSV por
+    migrar). Un store más viejo que max_age (segundos; por defecto el de su
+    fuente, ver default_max_age, leído del fetched_at guardado) cuenta como
+    ausente. Con max_age=ANY_AGE basta con que exista.
+    """
+    npy_path, _ = store_paths(cache_path)
+    if os.path.exists(npy_path):
+        meta = read_meta(cache_path) or {}
+        if max_age is None:
+            max_age = default_max_age(meta)
+        if math.isinf(max_age):
+            return True
+        return time.time() - meta.get("fetched_at", 0.0) <= max_age
+    return os.path.exists(cache_path)
+
+
+def read_cache(cache_path, parse_dates=("date",), verify=False):
+    """
+    DataFrame cacheado en cache_path, desde el store binario. Si solo existe
+    el CSV de antes, se migra primero (parse_dates se aplica al migrarlo).
+    """
+    npy_path, _ = store_paths(cache_path)
+    if not os.path.exists(npy_path):
+        migrate_csv(cache_path, parse_dates=parse_dates)
+    meta = read_meta(cache_path) or {}
+    records = load_records(cache_path, verify=verify)
+    return _records_to_frame(records, meta.get("columns", {}))
+
+
+def case_data_dirs(root, include_archive=True):
+    patterns = [os.path.join(root, "[0-9][0-9]_caso_*", "data")]
+    if include_archive:
+        patterns.append(os.path.join(root, "archive", "[0-9][0-9]_caso_*", "data"))
+    return sorted(d for p in patterns for d in glob.glob(p) if os.path.isdir(d))
+
+
+def preload_all(root, include_archive=True, verify=True):
+    """
+    Recorre los data/ de todos los casos en una pasada: migra los CSV sin
+    store, verifica el hash de cada store y mapea su contenido.
+
+    Returns:
+        {ruta del store (.npy): metadatos (+ "error" si falló)}
+    """
+    inventory = {}
+    for data_dir in case_data_dirs(root, include_archive):
+        for csv_path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+            if not os.path.exists(store_paths(csv_path)[0]):
+                try:
+                    migrate_csv(csv_path)
+                except Exception as exc:
+                    inventory[csv_path] = {"error": f"{type(exc).__name__}: {exc}"}
+        for npy_path in sorted(glob.glob(os.path.join(data_dir, "*.npy"))):
+            if not os.path.exists(os.path.splitext(npy_path)[0] + ".json"):
+                continue
+            meta = dict(read_meta(npy_path) or {})
+            try:
+                load_records(npy_path, verify=verify)
+            except Exception as exc:
+                meta["error"] = f"{type(exc).__name__}: {exc}"
+            inventory[npy_path] = meta
+    return inventory
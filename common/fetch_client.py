@@ -0,0 +1,433 @@
+"""
+fetch_client.py — Cliente HTTP compartido para las fuentes de los casos.
+
+Los data.py de los casos hacían requests.get sueltos (una conexión nueva
+por pedido), con reintentos propios y, en Wikimedia, artículos en serie con
+time.sleep(0.2). FetchClient centraliza:
+
+  - una requests.Session con pool de conexiones (keep-alive),
+  - pedidos en paralelo con concurrencia acotada (map),
+  - backoff ante 429/5xx que respeta Retry-After; un 429 pausa a todos los
+    hilos del cliente, no solo al que lo recibió,
+  - caché en disco unificado (JSON por URL + parámetros) con frescura
+    max_age y revalidación condicional (If-None-Match / If-Modified-Since);
+    si la fuente falla, se devuelve la última respuesta cacheada.
+
+    from fetch_client import default_client, wikimedia_pageviews, worldbank_indicator
+    payload = default_client().get_json(url, params={"format": "json"})
+    csv_text = default_client().get_text(csv_url)
+    rows = wikimedia_pageviews(["Bitcoin", "Ethereum"], start, end, "daily")
+    data = worldbank_indicator("WLD", "AG.LND.FRST.ZS", params={"per_page": 500})
+
+El caché en disco es opcional: se activa con cache_dir o con la variable
+$SIMULACION_HTTP_CACHE (que lo comparte entre los procesos del
+orquestador); sin ninguno de los dos no se escribe nada fuera del repo.
+LocalStandInServer sirve respuestas fijas en 127.0.0.1 para probar sin
+red (ver su docstring).
+"""
+
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlsplit
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+
+WORLDBANK_API = "https://api.worldbank.org/v2"
+WIKIMEDIA_PAGEVIEWS = "https://wikimedia.org/api/rest_v1/metrics/pageviews/per-article"
+DEFAULT_UA = "SimulacionClimatica/0.1"
+WIKIMEDIA_UA = "SimulacionClimatica/1.0 (contact: local@example.com)"
+
+# Estados que se reintentan (con backoff); el resto de los >= 400 se propaga
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class FetchClient:
+    """
+    Cliente HTTP con pool de conexiones, reintentos y caché en disco.
+
+    Args:
+        cache_dir: directorio del caché (None → $SIMULACION_HTTP_CACHE si
+                   está definida, si no sin caché; "" → sin caché)
+        max_workers: pedidos simultáneos en map (y tamaño del pool)
+        retries: reintentos ante errores de red, 429 y 5xx
+        backoff: espera base (s) del backoff exponencial sin Retry-After
+        max_backoff: tope de cada espera (s)
+        timeout: timeout de cada pedido (s)
+        max_age: segundos en que una respuesta cacheada se usa sin consultar
+                 la fuente; pasado ese plazo se revalida con un pedido condicional
+        rewrite: {prefijo de URL: reemplazo}, p. ej. para apuntar
+                 WORLDBANK_API a un LocalStandInServer
+    """
+    def __init__(self, cache_dir=None, max_workers=8, retries=4, backoff=1.0,
+                 max_backoff=60.0, timeout=30, max_age=86400.0, rewrite=None):
+        if not REQUESTS_AVAILABLE:
+            raise ImportError("FetchClient requiere requests")
+        if cache_dir is None:
+            cache_dir = os.environ.get("SIMULACION_HTTP_CACHE", "")
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_age = max_age
+        self.rewrite = dict(rewrite or {})
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0,
+                      "retries": 0, "stale": 0}
+
+    # ── caché ──
+
+    def _cache_path(self, url, params):
+        if not self.cache_dir:
+            return None
+        query = urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+        key = hashlib.sha1(f"{url}?{query}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    @staticmethod
+    def _load_entry(path):
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _store_entry(path, entry):
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    # ── reintentos ──
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _delay(self, attempt, resp=None):
+        """Espera antes del reintento: Retry-After si viene, si no backoff exponencial."""
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        delay = None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    parsed = email.utils.parsedate_to_datetime(retry_after)
+                except (TypeError, ValueError):
+                    # Retry-After malformado: backoff exponencial
+                    parsed = None
+                if parsed is not None:
+                    delay = parsed.timestamp() - time.time()
+        if delay is None:
+            delay = self.backoff * (2 ** attempt)
+        return min(self.max_backoff, max(0.0, delay))
+
+    def _pause(self, delay):
+        """Pausa compartida: ningún hilo pide antes de now + delay."""
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + delay)
+
+    def _wait(self):
+        while True:
+            with self._lock:
+                remaining = self._pause_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _resolve(self, url):
+        for prefix, target in self.rewrite.items():
+            if url.startswith(prefix):
+                return target + url[len(prefix):]
+        return url
+
+    # ── pedidos ──
+
+    def get_json(self, url, params=None, headers=None, max_age=None):
+        """
+        GET que devuelve el cuerpo JSON, pasando por el caché.
+
+        Returns:
+            el JSON decodificado (el cacheado si está fresco, si la fuente
+            respondió 304 o si falló tras los reintentos)
+        """
+        return self._get(url, params, headers, max_age, lambda resp: resp.json())
+
+    def get_text(self, url, params=None, headers=None, max_age=None):
+        """Como get_json, para cuerpos de texto (p. ej. CSV)."""
+        return self._get(url, params, headers, max_age, lambda resp: resp.text)
+
+    def _get(self, url, params, headers, max_age, decode):
+        params = dict(params or {})
+        path = self._cache_path(url, params)
+        entry = self._load_entry(path)
+        max_age = self.max_age if max_age is None else max_age
+        if entry is not None and time.time() - entry.get("fetched", 0.0) < max_age:
+            self._count("cache_hits")
+            return entry["body"]
+
+        req_headers = {"User-Agent": DEFAULT_UA}
+        req_headers.update(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                req_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                req_headers["If-Modified-Since"] = entry["last_modified"]
+
+        target = self._resolve(url)
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            self._wait()
+            self._count("requests")
+            try:
+                resp = self.session.get(target, params=params or None,
+                                        headers=req_headers, timeout=self.timeout)
+            except requests.RequestException:
+                if not last:
+                    self._count("retries")
+                    time.sleep(self._delay(attempt))
+                    continue
+                if entry is not None:
+                    self._count("stale")
+                    return entry["body"]
+                raise
+
+            if resp.status_code == 304 and entry is not None:
+                self._count("not_modified")
+                entry["fetched"] = time.time()
+                self._store_entry(path, entry)
+                return entry["body"]
+            if resp.status_code in RETRY_STATUS:
+                if not last:
+                    self._count("retries")
+                    delay = self._delay(attempt, resp)
+                    if resp.status_code == 429:
+                        self._pause(delay)
+                    else:
+                        time.sleep(delay)
+                    continue
+                if entry is not None:
+                    self._count("stale")
+                    return entry["body"]
+            resp.raise_for_status()
+            try:
+                body = decode(resp)
+            except ValueError:
+                if not last:
+                    self._count("retries")
+                    time.sleep(self._delay(attempt))
+                    continue
+                raise
+
+            self._store_entry(path, {
+                "url": url,
+                "params": params,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "body": body,
+            })
+            return body
+
+    def map(self, fn, items):
+        """[fn(item) for item in items] con hasta max_workers en paralelo (mismo orden)."""
+        items = list(items)
+        if len(items) <= 1 or self.max_workers <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+
+    def get_json_many(self, requests_list, headers=None):
+        """Varios get_json en paralelo; requests_list = [(url, params), ...]."""
+        return self.map(lambda req: self.get_json(req[0], params=req[1], headers=headers),
+                        requests_list)
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """FetchClient compartido del proceso (se crea al primer uso)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = FetchClient()
+        return _default_client
+
+
+def set_default_client(client):
+    """Reemplaza el cliente compartido (p. ej. uno apuntado a LocalStandInServer)."""
+    global _default_client
+    with _default_lock:
+        _default_client = client
+
+
+def worldbank_indicator(country, indicator, params=None, user_agent=None, client=None,
+                        max_age=None):
+    """
+    JSON [meta, entries] de un indicador del API del World Bank para un país.
+
+    Args:
+        params: parámetros extra del pedido (per_page, date, ...); format=json
+                se agrega siempre
+        user_agent: default $WORLDBANK_USER_AGENT o DEFAULT_UA
+        max_age: frescura del caché (0 fuerza revalidar)
+    """
+    client = client or default_client()
+    headers = {"User-Agent": user_agent or os.environ.get("WORLDBANK_USER_AGENT", DEFAULT_UA)}
+    query = {"format": "json"}
+    query.update(params or {})
+    url = f"{WORLDBANK_API}/country/{country}/indicator/{indicator}"
+    return client.get_json(url, params=query, headers=headers, max_age=max_age)
+
+
+def wikimedia_pageviews(articles, start, end, granularity="monthly", user_agent=None,
+                        client=None, project="en.wikipedia.org", access="all-access",
+                        agent="user"):
+    """
+    Pageviews de varios artículos de Wikimedia, pedidos en paralelo.
+
+    Args:
+        articles: títulos de artículo
+        start, end: timestamps YYYYMMDDHH
+        granularity: "daily" o "monthly"
+        user_agent: default $WIKIMEDIA_USER_AGENT o WIKIMEDIA_UA
+
+    Returns:
+        lista de {"date": datetime, "views": int}, artículo por artículo
+        en el orden de `articles`
+    """
+    from datetime import datetime
+
+    client = client or default_client()
+    headers = {"User-Agent": user_agent or os.environ.get("WIKIMEDIA_USER_AGENT", WIKIMEDIA_UA)}
+
+    def fetch(article):
+        url = f"{WIKIMEDIA_PAGEVIEWS}/{project}/{access}/{agent}/{article}/{granularity}/{start}/{end}"
+        data = client.get_json(url, headers=headers)
+        rows = []
+        for item in data.get("items", []):
+            ts = item.get("timestamp")
+            views = item.get("views")
+            if not ts or views is None:
+                continue
+            rows.append({"date": datetime.strptime(ts[:8], "%Y%m%d"), "views": int(views)})
+        return rows
+
+    return [row for rows in client.map(fetch, articles) for row in rows]
+
+
+class LocalStandInServer:
+    """
+    Servidor HTTP local con respuestas JSON fijas, para probar sin red.
+
+        routes = {"/v2/country/WLD/indicator/IS.AIR.DPRT": [meta, entries]}
+        with LocalStandInServer(routes, throttle={"/v2/...": 2}) as server:
+            client = FetchClient(cache_dir=tmp, rewrite={WORLDBANK_API: server.url + "/v2"})
+
+    Las rutas se comparan sin query string. Cada respuesta lleva ETag (y
+    responde 304 a un If-None-Match que coincida); throttle[ruta] hace que
+    los primeros pedidos de esa ruta reciban 429 con Retry-After
+    (retry_after segundos); latency demora cada respuesta; hits cuenta los
+    pedidos por ruta.
+    """
+    def __init__(self, routes, throttle=None, retry_after=0, latency=0.0):
+        self.routes = {path: json.dumps(body).encode("utf-8") for path, body in routes.items()}
+        self.throttle = dict(throttle or {})
+        self.retry_after = retry_after
+        self.latency = latency
+        self.hits = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                with server._lock:
+                    server.hits[path] = server.hits.get(path, 0) + 1
+                    throttled = server.throttle.get(path, 0) > 0
+                    if throttled:
+                        server.throttle[path] -= 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if throttled:
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(server.retry_after))
+                    self.end_headers()
+                    return
+                body = server.routes.get(path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,83 @@
+"""
+gradient_calibration.py — Refinamiento de calibrate_abm por gradiente.
+
+La actualización del ABM es lineal en la grilla y diferenciable en
+forcing_scale, macro_coupling y damping (salvo en las celdas que tocan el
+clip). Con el ruido fijo por la semilla, el RMSE de entrenamiento es una
+función determinista de esos tres parámetros cuyo gradiente sale exacto de
+las sensibilidades forward-mode del kernel
+(abm_numpy.simulate_kernel_sensitivities, expuesto por cada caso como
+simulate_abm_sensitivities):
+
+    r = serie - obs,  RMSE = sqrt(mean(r²)),  ∇RMSE = Jᵀ r / (n · RMSE)
+
+En lugar de las ~5000 propuestas aleatorias del refinamiento de
+calibrate_abm, se corre L-BFGS-B (scipy.optimize) desde los mejores puntos
+del grid; converge en decenas de evaluaciones (cada una ≈ 4 simulaciones).
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from scipy.optimize import minimize
+    LBFGS_AVAILABLE = True
+except ImportError:
+    LBFGS_AVAILABLE = False
+
+
+# Cotas de (forcing_scale, macro_coupling, damping): las del refinamiento aleatorio
+REFINE_BOUNDS = ((0.001, 1.5), (0.1, 1.0), (0.0, 0.9))
+
+
+def rmse_and_gradient(sensitivity_fn, make_params, obs, steps, seed, theta):
+    """
+    (RMSE, gradiente (3,)) del candidato theta = (fs, mc, dmp).
+
+    sensitivity_fn(params, steps, seed) → (serie (steps,), jac (steps, 3))
+    make_params(fs, mc, dmp) → dict de parámetros del candidato
+    """
+    obs = np.asarray(obs, dtype=np.float64)
+    n = len(obs)
+    series, jac = sensitivity_fn(make_params(*theta), steps, seed)
+    r = np.asarray(series[:n]) - obs
+    rmse = float(np.sqrt(np.mean(r ** 2)))
+    if rmse == 0.0 or not math.isfinite(rmse):
+        return rmse, np.zeros(3)
+    return rmse, (r @ np.asarray(jac)[:n]) / (n * rmse)
+
+
+def lbfgs_refine(sensitivity_fn, make_params, obs, steps, starts, seed=2,
+                 bounds=REFINE_BOUNDS, maxiter=30):
+    """
+    L-BFGS-B desde cada punto de `starts` [(fs, mc, dmp), ...].
+
+    Returns:
+        (best_params dict, best_err, n_evals): el mejor punto evaluado en
+        cualquiera de las corridas y el total de evaluaciones
+    """
+    if not LBFGS_AVAILABLE:
+        raise ImportError("lbfgs_refine requiere scipy.optimize")
+    best = {"err": math.inf, "theta": None}
+    evals = [0]
+
+    def objective(theta):
+        evals[0] += 1
+        err, grad = rmse_and_gradient(sensitivity_fn, make_params, obs, steps, seed,
+                                      tuple(float(v) for v in theta))
+        if err < best["err"]:
+            best["err"], best["theta"] = err, tuple(float(v) for v in theta)
+        if not math.isfinite(err):
+            return 1e300, np.zeros(3)
+        return err, grad
+
+    for x0 in starts:
+        x0 = np.clip(np.asarray(x0, dtype=np.float64),
+                     [lo for lo, _ in bounds], [hi for _, hi in bounds])
+        minimize(objective, x0, jac=True, method="L-BFGS-B", bounds=bounds,
+                 options={"maxiter": maxiter})
+
+    fs, mc, dmp = best["theta"]
+    return ({"forcing_scale": fs, "macro_coupling": mc, "damping": dmp},
+            best["err"], evals[0])
@@ -0,0 +1,96 @@
+"""
+grid_history.py — Historial compacto de la grilla ABM (T, N, N).
+
+Antes cada simulación guardaba el grid completo como lista de listas de
+floats de Python (grid.tolist() por paso): para una grilla 25×25 y 600
+pasos son ~375k floats en caja, que las métricas vuelven a convertir con
+np.array. GridHistory preasigna un único ndarray contiguo (float64 o
+float32), opcionalmente respaldado por un memmap .npy en disco para
+corridas grandes, y se comporta como la lista anterior:
+
+    len(h), h[t][i][j], for g in h, bool(h)  → igual que con listas
+    np.asarray(h)                            → (T, N, N) sin copia
+    h.tolist()                               → lista de listas legacy
+"""
+
+import numpy as np
+
+
+class GridHistory:
+    """
+    Historial (T, N, N) preasignado con vista compatible con listas.
+
+    Args:
+        steps: número de pasos T
+        n: lado de la grilla N
+        dtype: np.float64 (default) o np.float32 (mitad de memoria)
+        path: si se indica, el historial vive en un memmap .npy en esa ruta
+    """
+    def __init__(self, steps, n, dtype=np.float64, path=None):
+        shape = (steps, n, n)
+        if path is not None:
+            self.array = np.lib.format.open_memmap(path, mode="w+",
+                                                   dtype=dtype, shape=shape)
+        else:
+            self.array = np.empty(shape, dtype=dtype)
+        self.path = path
+        self._length = 0
+
+    @classmethod
+    def from_array(cls, array):
+        """Envuelve un historial (T, N, N) ya calculado, sin copiarlo."""
+        history = cls.__new__(cls)
+        history.array = array
+        history.path = None
+        history._length = len(array)
+        return history
+
+    def append(self, grid):
+        """Copia la grilla del paso siguiente en el buffer preasignado."""
+        np.copyto(self.array[self._length], grid, casting="same_kind")
+        self._length += 1
+
+    @property
+    def data(self):
+        """Vista (T, N, N) de los pasos almacenados."""
+        return self.array[:self._length]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.data
+        if dtype is not None and data.dtype != dtype:
+            return data.astype(dtype)
+        return data.copy() if copy else data
+
+    def tolist(self):
+        """Historial como lista de listas de floats (formato legacy)."""
+        return self.data.tolist()
+
+    def flush(self):
+        """Sincroniza el memmap con el disco (no-op en memoria)."""
+        if self.path is not None:
+            self.array.flush()
+
+    def __repr__(self):
+        where = f", path={self.path!r}" if self.path is not None else ""
+        return (f"GridHistory(steps={self._length}, n={self.array.shape[1]}, "
+                f"dtype={self.array.dtype}{where})")
@@ -0,0 +1,81 @@
+"""
+grid_metrics.py — Correlaciones por celda sobre el cubo (T, N, N) del ABM.
+
+Motor común de Symploké (cohesión interna vs. externa) y no-localidad
+(dominance share). En lugar de un np.corrcoef por celda, todas las
+correlaciones celda-vs-referencia se calculan en una pasada: se centran
+las series sobre el eje temporal, se normalizan y se contrae el eje T.
+
+    cube = np.asarray(grid_series, dtype=np.float64)        # (T, N, N)
+    internas = cell_correlations(cube, neighbor_mean_cube(cube))
+    externas = cell_correlations(cube, forcing[:T])
+    regional = cell_correlations(cube, cube.mean(axis=(1, 2)))
+
+Celdas (o referencias) sin varianza (norma centrada <= tol) reciben
+correlación 0.0, igual que las implementaciones celda a celda.
+"""
+
+import numpy as np
+
+
+def neighbor_mean_cube(cube):
+    """
+    Promedio de los vecinos 4-conectados de cada celda en cada paso.
+
+    Bordes no periódicos; los vecinos se suman en el orden
+    arriba, abajo, izquierda, derecha, como en los loops originales.
+
+    Args:
+        cube: ndarray (T, N, N)
+
+    Returns:
+        ndarray (T, N, N)
+    """
+    n = cube.shape[1]
+    out = np.zeros_like(cube)
+    out[:, 1:, :] += cube[:, :-1, :]
+    out[:, :-1, :] += cube[:, 1:, :]
+    out[:, :, 1:] += cube[:, :, :-1]
+    out[:, :, :-1] += cube[:, :, 1:]
+    count = np.full((n, n), 4.0)
+    count[0, :] -= 1
+    count[-1, :] -= 1
+    count[:, 0] -= 1
+    count[:, -1] -= 1
+    out /= count
+    return out
+
+
+def _centered(x):
+    """Series centradas sobre el eje 0 y su norma euclídea."""
+    xc = x - x.mean(axis=0)
+    return xc, np.sqrt(np.einsum("t...,t...->...", xc, xc))
+
+
+def cell_correlations(cube, reference, tol=0.0, clamp=False):
+    """
+    Correlación de Pearson de la serie temporal de cada celda con una referencia.
+
+    Args:
+        cube: ndarray (T, N, N)
+        reference: serie común (T,) o una serie por celda (T, N, N)
+        tol: norma centrada mínima; por debajo (o igual) la correlación es 0.0
+        clamp: si True, acota el resultado a [-1, 1]
+
+    Returns:
+        ndarray (N, N) de correlaciones
+    """
+    reference = np.asarray(reference, dtype=cube.dtype)
+    xc, norm_x = _centered(cube)
+    rc, norm_r = _centered(reference)
+    if reference.ndim == 1:
+        num = np.tensordot(rc, xc, axes=(0, 0))
+    else:
+        num = np.einsum("tij,tij->ij", xc, rc)
+    den = norm_x * norm_r
+    valid = (norm_x > tol) & (norm_r > tol)
+    corr = np.zeros_like(num)
+    np.divide(num, den, out=corr, where=valid)
+    if clamp:
+        np.clip(corr, -1.0, 1.0, out=corr)
+    return corr
@@ -113,72 +113,40 @@ def bootstrap_edi(obs_val, abm_val, reduced_val, n_boot=500, ci=0.95, seed=42):
 
 
 def _kde_entropy(series, n_eval=50):
-    """Entropía via KDE (vectorizado con NumPy)."""
-    s_arr = np.asarray(series, dtype=np.float64)
-    n = len(s_arr)
-    if n < 2:
-        return 0.0
-    s = float(s_arr.std())
-    if s < 1e-15:
-        return 0.0
-    h = 1.06 * s * (n ** (-0.2))
-    if h < 1e-15:
-        h = float(s_arr.max() - s_arr.min()) / 10.0
-    margin = 3 * h
-    x_min = float(s_arr.min()) - margin
-    x_max = float(s_arr.max()) + margin
-    x_eval = np.linspace(x_min + (x_max - x_min) / (2 * n_eval),
-                         x_max - (x_max - x_min) / (2 * n_eval), n_eval)
-    dx = (x_max - x_min) / n_eval
-    # Vectorized KDE: shape (n_eval, n)
-    diff = (x_eval[:, None] - s_arr[None, :]) / h
-    density = np.exp(-0.5 * diff ** 2).mean(axis=1) / (h * np.sqrt(2 * np.pi))
-    mask = density > 1e-15
-    entropy = -np.sum(density[mask] * np.log(density[mask]) * dx)
-    return max(0.0, float(entropy))
+    """Entropía via KDE (exacta en series cortas, binneada en largas)."""
+    from kde_entropy import kde_entropy
+    return kde_entropy(series, n_eval=n_eval)
 
 
 def effective_information(obs, full_pred, reduced_pred):
     """EI = H(residuos_reducido) - H(residuos_completo)"""
-    res_full = [o - p for o, p in zip(obs, full_pred)]
-    res_reduced = [o - p for o, p in zip(obs, reduced_pred)]
+    obs_a = np.asarray(obs, dtype=np.float64)
+    n = min(len(obs_a), len(full_pred), len(reduced_pred))
+    res_full = obs_a[:n] - np.asarray(full_pred, dtype=np.float64)[:n]
+    res_reduced = obs_a[:n] - np.asarray(reduced_pred, dtype=np.float64)[:n]
     return _kde_entropy(res_reduced) - _kde_entropy(res_full)
 
 
 # ─── Cohesión y Symploké ─────────────────────────────────────────────────────
 
 def internal_vs_external_cohesion(grid_series, forcing_series):
-    """Cohesión interna vs externa — vectorizada con NumPy."""
+    """Cohesión interna vs externa — todas las celdas en una pasada sobre (T, N, N)."""
+    from grid_metrics import cell_correlations, neighbor_mean_cube
+
     steps = len(grid_series)
     if steps == 0:
         return 0.0, 0.0
-    n = len(grid_series[0])
-
-    # Convertir a array 3D: (steps, n, n)
-    gs = np.array(grid_series, dtype=np.float64)  # (T, N, N)
-    fs_arr = np.asarray(forcing_series[:steps], dtype=np.float64) if len(forcing_series) >= steps else None
-
-    # Cada celda es una serie temporal: gs[:, i, j] shape (T,)
-    # Vecinos: usar roll + máscara de bordes
-    int_corrs = []
-    ext_corrs = []
-
-    for i in range(n):
-        for j in range(n):
-            cell = gs[:, i, j]  # (T,)
-            # Promedio de vecinos por timestep
-            nb_list = []
-            if i > 0: nb_list.append(gs[:, i-1, j])
-            if i < n-1: nb_list.append(gs[:, i+1, j])
-            if j > 0: nb_list.append(gs[:, i, j-1])
-            if j < n-1: nb_list.append(gs[:, i, j+1])
-            nb_mean = np.mean(nb_list, axis=0)  # (T,)
-            int_corrs.append(float(np.corrcoef(cell, nb_mean)[0, 1]) if cell.std() > 1e-15 and nb_mean.std() > 1e-15 else 0.0)
-            if fs_arr is not None:
-                ext_corrs.append(float(np.corrcoef(cell, fs_arr)[0, 1]) if cell.std() > 1e-15 and fs_arr.std() > 1e-15 else 0.0)
 
+    gs = np.asarray(grid_series, dtype=np.float64)  # (T, N, N), sin copia si ya es ndarray
+    # std > 1e-15  ⇔  norma centrada > 1e-15·√T
+    tol = 1e-15 * math.sqrt(steps)
+
+    int_corrs = cell_correlations(gs, neighbor_mean_cube(gs), tol)
     internal = float(np.nanmean(int_corrs))
-    external = float(np.nanmean(ext_corrs)) if ext_corrs else 0.0
+    external = 0.0
+    if len(forcing_series) >= steps:
+        fs_arr = np.asarray(forcing_series[:steps], dtype=np.float64)
+        external = float(np.nanmean(cell_correlations(gs, fs_arr, tol)))
     return internal, external
 
 
@@ -190,22 +158,17 @@ def cohesion_ratio(internal, external):
 
 def dominance_share(grid_series):
     """Dominancia: qué celda controla más la dinámica global — vectorizada."""
+    from grid_metrics import cell_correlations
+
     steps = len(grid_series)
     if steps == 0:
         return 1.0
-    n = len(grid_series[0])
-    gs = np.array(grid_series, dtype=np.float64)  # (T, N, N)
+    gs = np.asarray(grid_series, dtype=np.float64)  # (T, N, N), sin copia si ya es ndarray
+    n = gs.shape[1]
     regional = gs.mean(axis=(1, 2))  # (T,)
     if regional.std() < 1e-15:
         return 1.0 / (n * n)
-    scores = np.zeros(n * n)
-    for i in range(n):
-        for j in range(n):
-            cell = gs[:, i, j]
-            if cell.std() < 1e-15:
-                scores[i * n + j] = 0.0
-            else:
-                scores[i * n + j] = abs(float(np.corrcoef(cell, regional)[0, 1]))
+    scores = np.abs(cell_correlations(gs, regional, 1e-15 * math.sqrt(steps)))
     total_s = scores.sum()
     if total_s < 1e-15:
         return 1.0 / (n * n)
@@ -224,41 +187,88 @@ def build_forcing_from_training(train_values, total_steps):
     return trend, (slope, intercept)
 
 
-def calibrate_ode(obs_train, forcing_train, regularization=0.01):
-    """ODE: dX/dt = alpha*(F - beta*X) con regularización Tikhonov."""
-    n = len(obs_train) - 1
-    if n < 2:
-        return 0.05, 0.02
+def calibrate_ode(obs_train, forcing_train, regularization=None):
+    """
+    ODE: dX/dt = alpha*(F - beta*X) con regularización Tikhonov.
 
-    sf2, sx2, sfx, sfy, sxy = 0.0, 0.0, 0.0, 0.0, 0.0
-    for t in range(n):
-        y = obs_train[t + 1] - obs_train[t]
-        f, x = forcing_train[t], obs_train[t]
-        sf2 += f * f
-        sx2 += x * x
-        sfx += f * x
-        sfy += f * y
-        sxy += x * y
+    regularization: λ fijo, o un camino de λ (None → el de
+    ode_calibration.DEFAULT_REGULARIZATIONS) elegido por validación
+    cruzada de origen móvil sobre el tramo de entrenamiento.
+    """
+    from ode_calibration import fit_ode
 
-    reg = regularization * n
-    det = (sf2 + reg) * (sx2 + reg) - sfx * sfx
-    if abs(det) < 1e-15:
-        return 0.05, 0.02
+    fit = fit_ode(obs_train, forcing_train, regularization)
+    return fit["alpha"], fit["beta"]
 
-    a = (sfy * (sx2 + reg) - sxy * sfx) / det
-    b = ((sf2 + reg) * sxy - sfy * sfx) / det
 
-    alpha = max(0.001, min(a, 0.5))
-    beta = max(0.001, min(-b / alpha if abs(alpha) > 1e-10 else 0.02, 1.0))
-    return alpha, beta
+def ode_surrogate_reduced_fn(forcing_series, n_train, steps, regularization, noise, seed=3):
+    """
+    reduced_fn para ironclad.surrogate_edi_test: re-ajusta la ODE lineal
+    base (forma "balance") a los primeros n_train pasos de cada fila con
+    los estadísticos suficientes de ode_calibration y la integra en lote
+    sobre steps pasos (ode_ensemble.simulate_linear_ode_ensemble).
+    """
+    from ode_calibration import fit_ode_rows
+    from ode_ensemble import LinearODE, simulate_linear_ode_ensemble
+
+    model = LinearODE("x", state_key="x0")
+
+    def reduced_fn(rows):
+        rows = np.atleast_2d(rows)
+        alpha, beta = fit_ode_rows(rows[:, :n_train], forcing_series[:n_train], regularization)
+        params_list = [{"ode_alpha": a, "ode_beta": b, "ode_noise": noise, "x0": row[0],
+                        "forcing_series": forcing_series}
+                       for a, b, row in zip(alpha, beta, rows)]
+        sims = simulate_linear_ode_ensemble(model, params_list, steps, [seed] * len(rows))
+        return np.array([sim["x"] for sim in sims])
+    return reduced_fn
 
 
 def calibrate_abm(obs_train, base_params, steps, simulate_abm_fn,
-                   param_grid=None, seed=2, n_refine=5000):
+                   param_grid=None, seed=2, n_refine=5000,
+                   n_workers=None, screening=False, screen_budget=None,
+                   simulate_chunks_fn=None, halving=False, halving_eta=3,
+                   sensitivity_fn=None, refine="random", macro_fn=None,
+                   mean_field=False, refine_batch=1):
     """
     Grid search masivo + refinamiento local con early stopping.
     Fase 1: Grid coarse (~6000 combos) con podado por percentil.
     Fase 2: Refinamiento adaptativo alrededor de top 10 candidates con 5000 iters.
+
+    Con refine_batch = K > 1 cada ronda del refinamiento propone K
+    candidatos alrededor del centro vigente y los evalúa juntos (con
+    simulate_chunks_fn, en un único lote de iter_kernel_ensemble con aborto
+    en el mejor error vigente); al final de la ronda se recentra en el
+    mejor de ella si mejora. refine_batch=1 es el refinamiento secuencial.
+
+    Con n_workers > 1 el grid de la Fase 1 se reparte en un pool de procesos
+    (ver parallel_grid), también con simulate_chunks_fn (cada worker con su
+    propio aborto temprano); el top-5 es bit-idéntico al camino secuencial.
+
+    Con screening=True la Fase 1 simula solo screen_budget puntos del grid
+    (default: 1/16) elegidos por un emulador RBF del error (ver
+    surrogate_screen); top_5 conserva el formato, sobre los puntos simulados.
+
+    Si se provee simulate_chunks_fn(params_list, steps, seeds, chunk) (el
+    simulate_abm_chunks del caso, ver abm_numpy.iter_kernel_ensemble), el
+    grid se simula por lotes con aborto temprano: un candidato se trunca en
+    cuanto su RMSE parcial ya no puede entrar entre los 10 mejores, y en el
+    refinamiento en cuanto no puede mejorar al mejor vigente; el resultado
+    es el mismo que sin aborto. Con halving=True la Fase 1 usa successive
+    halving (prefijos cada vez más largos, sigue 1/halving_eta por escalón),
+    que es aproximado. Ver successive_halving.
+
+    Con refine="lbfgs" y sensitivity_fn(params, steps, seed) → (serie, jac)
+    (el simulate_abm_sensitivities del caso) la Fase 2 es L-BFGS-B con el
+    gradiente exacto del RMSE desde los 3 mejores puntos del grid, en vez
+    del refinamiento aleatorio (ver gradient_calibration).
+
+    Con mean_field=True y macro_fn(params_list, steps, seeds) → (B, steps)
+    (el simulate_abm_macro del caso) el grid se evalúa con la reducción de
+    campo medio: la fluctuación de la grilla se simula una vez por
+    (macro_coupling + damping) y cada candidato es una recurrencia escalar;
+    los que tocan el clip se simulan con la grilla completa. Mismo
+    resultado salvo redondeo (ver abm_numpy.mean_field_macro).
     """
     if param_grid is None:
         param_grid = {
@@ -272,30 +282,48 @@ def calibrate_abm(obs_train, base_params, steps, simulate_abm_fn,
         }
 
     obs_arr = np.asarray(obs_train, dtype=np.float64)
-    n_obs = len(obs_train)
-
-    # Fase 1: Grid search completo
-    candidates = []
-    for fs in param_grid["forcing_scale"]:
-        for mc in param_grid["macro_coupling"]:
-            for dmp in param_grid["damping"]:
-                params = dict(base_params)
-                params["forcing_scale"] = fs
-                params["macro_coupling"] = mc
-                params["damping"] = dmp
-                params["assimilation_strength"] = 0.0
-                params["assimilation_series"] = None
-                params["_store_grid"] = False
-                sim = simulate_abm_fn(params, steps, seed=seed)
-                key = _get_series_key(sim)
-                pred = np.asarray(sim[key][:n_obs], dtype=np.float64)
-                err = float(np.sqrt(np.mean((pred - obs_arr) ** 2)))
-                candidates.append((err, fs, mc, dmp))
-                del sim
+
+    evaluator = None
+    if simulate_chunks_fn is not None:
+        from successive_halving import EarlyAbortEvaluator, successive_halving_errors
+        start = _chunked_start(simulate_chunks_fn, base_params, len(obs_arr), seed)
+        evaluator = EarlyAbortEvaluator(start, obs_arr, k=10)
+
+    def grid_errors(combos):
+        if mean_field and macro_fn is not None:
+            return _macro_errors(macro_fn, base_params, obs_arr, seed, combos)
+        if evaluator is not None:
+            if halving:
+                return successive_halving_errors(start, obs_arr, combos, eta=halving_eta)[0]
+            if n_workers is not None and n_workers > 1:
+                from parallel_grid import parallel_early_abort_errors
+                return parallel_early_abort_errors(obs_arr, base_params, simulate_chunks_fn,
+                                                   combos, _chunked_start, seed=seed,
+                                                   n_workers=n_workers, k=evaluator.k)
+            return evaluator(combos)
+        if n_workers is not None and n_workers > 1:
+            from parallel_grid import parallel_grid_errors
+            return parallel_grid_errors(obs_train, base_params, steps, simulate_abm_fn,
+                                        combos, _calibration_params, _calibration_error,
+                                        seed=seed, n_workers=n_workers)
+        errors = []
+        for fs, mc, dmp in combos:
+            params = _calibration_params(base_params, fs, mc, dmp)
+            sim = simulate_abm_fn(params, steps, seed=seed)
+            errors.append(_calibration_error(sim, obs_arr))
+            del sim
+        return errors
+
+    # Fase 1: Grid search completo (o pre-seleccionado por el emulador)
+    combos, errors = _grid_phase(param_grid, grid_errors, seed, screening, screen_budget)
+    candidates = [(float(err), fs, mc, dmp) for err, (fs, mc, dmp) in zip(errors, combos)]
 
     candidates.sort(key=lambda x: x[0])
     best = candidates[0]
 
+    if refine == "lbfgs" and sensitivity_fn is not None:
+        return _refine_lbfgs(obs_arr, base_params, steps, sensitivity_fn, candidates, seed)
+
     # Fase 2: Refinamiento adaptativo multi-punto
     # Tomar top 10 candidates y refinar alrededor de cada uno
     top_k = min(10, len(candidates))
@@ -307,39 +335,39 @@ def calibrate_abm(obs_train, base_params, steps, simulate_abm_fn,
     stalled = 0
     refine_per_point = n_refine // top_k
     
+    def refine_errors(proposals):
+        sets = [(c["forcing_scale"], c["macro_coupling"], c["damping"]) for c in proposals]
+        if evaluator is not None:
+            # Abortado ⇒ err > best_err: la decisión es la misma
+            return [float(e) for e in evaluator(sets, threshold=best_err)]
+        errors = []
+        for fs, mc, dmp in sets:
+            sim = simulate_abm_fn(_calibration_params(base_params, fs, mc, dmp), steps, seed=seed)
+            errors.append(_calibration_error(sim, obs_arr))
+            del sim
+        return errors
+
+    refine_batch = max(1, int(refine_batch))
     for rank in range(top_k):
         center = candidates[rank]
         center_p = {"forcing_scale": center[1], "macro_coupling": center[2], "damping": center[3]}
-        radius_fs = 0.1
-        radius_mc = 0.15
-        radius_dmp = 0.1
-        
-        for i in range(refine_per_point):
-            # Reducir radio progresivamente
-            decay = 1.0 / (1.0 + i * 0.005)
-            candidate = {
-                "forcing_scale": max(0.001, min(1.5, center_p["forcing_scale"] + rng.uniform(-radius_fs, radius_fs) * decay)),
-                "macro_coupling": max(0.1, min(1.0, center_p["macro_coupling"] + rng.uniform(-radius_mc, radius_mc) * decay)),
-                "damping": max(0.0, min(0.9, center_p["damping"] + rng.uniform(-radius_dmp, radius_dmp) * decay)),
-            }
-            params = dict(base_params)
-            params.update(candidate)
-            params["assimilation_strength"] = 0.0
-            params["assimilation_series"] = None
-            params["_store_grid"] = False
-            sim = simulate_abm_fn(params, steps, seed=seed)
-            key = _get_series_key(sim)
-            pred = np.asarray(sim[key][:n_obs], dtype=np.float64)
-            err = float(np.sqrt(np.mean((pred - obs_arr) ** 2)))
-            del sim
-            if err < best_err:
-                best_params = candidate
-                best_err = err
-                center_p = dict(candidate)  # Recentrar
+
+        i = 0
+        while i < refine_per_point:
+            # Ronda: K propuestas alrededor del centro vigente, evaluadas juntas
+            k = min(refine_batch, refine_per_point - i)
+            proposals = [_refine_candidate(rng, center_p, i + j) for j in range(k)]
+            errors = refine_errors(proposals)
+            i += k
+            j = int(np.argmin(errors))
+            if errors[j] < best_err:
+                best_params = proposals[j]
+                best_err = errors[j]
+                center_p = dict(proposals[j])  # Recentrar
                 stalled = 0
             else:
-                stalled += 1
-            # Early stop si no mejora en 300 iteraciones consecutivas
+                stalled += k
+            # Early stop si no mejora en 300 propuestas consecutivas
             if stalled > 300:
                 break
         if stalled > 300:
@@ -348,6 +376,85 @@ def calibrate_abm(obs_train, base_params, steps, simulate_abm_fn,
     return best_params, best_err, candidates[:5]
 
 
+def _grid_phase(param_grid, grid_errors, seed, screening, screen_budget):
+    """(combos, errores) de la Fase 1: el grid completo o el subconjunto del screening."""
+    axes = [param_grid["forcing_scale"], param_grid["macro_coupling"], param_grid["damping"]]
+    if screening:
+        from surrogate_screen import screen_grid
+        return screen_grid(axes, grid_errors, budget=screen_budget, seed=seed)
+    combos = [(fs, mc, dmp) for fs in axes[0] for mc in axes[1] for dmp in axes[2]]
+    return combos, grid_errors(combos)
+
+
+def _refine_lbfgs(obs_arr, base_params, steps, sensitivity_fn, candidates, seed, n_starts=3):
+    """Fase 2 por L-BFGS-B desde los mejores candidatos del grid."""
+    from gradient_calibration import lbfgs_refine
+
+    def make_params(fs, mc, dmp):
+        return _calibration_params(base_params, fs, mc, dmp)
+
+    best = candidates[0]
+    best_params = {"forcing_scale": best[1], "macro_coupling": best[2], "damping": best[3]}
+    best_err = best[0]
+    starts = [c[1:] for c in candidates[:n_starts]]
+    params, err, _ = lbfgs_refine(sensitivity_fn, make_params, obs_arr, steps, starts, seed=seed)
+    if err < best_err:
+        best_params, best_err = params, err
+    return best_params, best_err, candidates[:5]
+
+
+def _macro_errors(macro_fn, base_params, obs_arr, seed, combos, lot_size=1024):
+    """RMSE de calibración de cada candidato con la serie macro por lotes."""
+    n_obs = len(obs_arr)
+    errors = np.empty(len(combos))
+    for a in range(0, len(combos), lot_size):
+        params_list = [_calibration_params(base_params, fs, mc, dmp)
+                       for fs, mc, dmp in combos[a:a + lot_size]]
+        series = macro_fn(params_list, n_obs, [seed] * len(params_list))
+        errors[a:a + len(params_list)] = np.sqrt(np.mean((series - obs_arr) ** 2, axis=1))
+    return errors
+
+
+def _chunked_start(simulate_chunks_fn, base_params, steps, seed):
+    """start(param_sets) → generador por tramos de los candidatos (ver successive_halving)."""
+    chunk = max(4, steps // 16)
+
+    def start(param_sets):
+        params_list = [_calibration_params(base_params, fs, mc, dmp) for fs, mc, dmp in param_sets]
+        return simulate_chunks_fn(params_list, steps, [seed] * len(params_list), chunk=chunk)
+    return start
+
+
+def _calibration_params(base_params, fs, mc, dmp):
+    """Parámetros de un candidato de calibración (sin asimilación ni grid)."""
+    params = dict(base_params)
+    params["forcing_scale"] = fs
+    params["macro_coupling"] = mc
+    params["damping"] = dmp
+    params["assimilation_strength"] = 0.0
+    params["assimilation_series"] = None
+    params["_store_grid"] = False
+    return params
+
+
+def _calibration_error(sim, obs):
+    """RMSE de la serie principal de sim contra obs (primeros len(obs) pasos)."""
+    obs_arr = np.asarray(obs, dtype=np.float64)
+    key = _get_series_key(sim)
+    pred = np.asarray(sim[key][:len(obs_arr)], dtype=np.float64)
+    return float(np.sqrt(np.mean((pred - obs_arr) ** 2)))
+
+
+def _refine_candidate(rng, center_p, i, radius_fs=0.1, radius_mc=0.15, radius_dmp=0.1):
+    """Propuesta i-ésima del refinamiento alrededor de center_p (radio decreciente)."""
+    decay = 1.0 / (1.0 + i * 0.005)
+    return {
+        "forcing_scale": max(0.001, min(1.5, center_p["forcing_scale"] + rng.uniform(-radius_fs, radius_fs) * decay)),
+        "macro_coupling": max(0.1, min(1.0, center_p["macro_coupling"] + rng.uniform(-radius_mc, radius_mc) * decay)),
+        "damping": max(0.0, min(0.9, center_p["damping"] + rng.uniform(-radius_dmp, radius_dmp) * decay)),
+    }
+
+
 def _get_series_key(sim_result):
     """Detecta la clave de la serie principal del resultado."""
     for k in ["p", "tbar", "x", "e", "m", "w", "incidence", "share", "d", "u",
@@ -393,20 +500,59 @@ def evaluate_c1(abm_val, ode_val, obs_val, obs_std,
     }
 
 
-def evaluate_c2(base_params, eval_params, steps, val_start,
-                simulate_abm_fn, series_key, n_pert=5, pct=0.1, seed_base=10):
-    sim_base = simulate_abm_fn(eval_params, steps, seed=2)
-    base_mean = mean(sim_base[series_key][val_start:])
-    base_var = variance(sim_base[series_key][val_start:])
-    del sim_base
-    deltas_m, deltas_v = [], []
+def _c2_runs(base_params, eval_params, n_pert=5, pct=0.1, seed_base=10):
+    """Corridas (params, seed) de C2: base + n_pert perturbaciones."""
+    runs = [(eval_params, 2)]
     for i in range(n_pert):
         p = perturb_params(base_params, pct, seed=seed_base + i)
         p["assimilation_series"] = None
         p["assimilation_strength"] = 0.0
         if "forcing_series" in eval_params:
             p["forcing_series"] = eval_params["forcing_series"]
-        sim = simulate_abm_fn(p, steps, seed=2 + i + 10)
+        runs.append((p, 2 + i + 10))
+    return runs
+
+
+def _c3_runs(eval_params, seed_1=2, seed_2=6):
+    """Corridas de C3: mismos parámetros, dos semillas."""
+    return [(eval_params, seed_1), (eval_params, seed_2)]
+
+
+def _c4_runs(eval_params, base_params, seed=7, factor=1.2):
+    """Corridas de C4: base sin asimilación + forcing escalado."""
+    p_base = dict(eval_params)
+    p_base["assimilation_strength"] = 0.0
+    p_base["assimilation_series"] = None
+    p_alt = dict(p_base)
+    if "forcing_series" in base_params:
+        p_alt["forcing_series"] = [x * factor for x in base_params["forcing_series"]]
+    return [(p_base, seed), (p_alt, seed + 1)]
+
+
+def _c5_runs(base_params, eval_params, n_runs=5, pct=0.1):
+    """Corridas de C5: n_runs perturbaciones con semillas propias."""
+    runs = []
+    for i in range(n_runs):
+        p = perturb_params(base_params, pct, seed=20 + i)
+        p["assimilation_series"] = None
+        p["assimilation_strength"] = 0.0
+        if "forcing_series" in eval_params:
+            p["forcing_series"] = eval_params["forcing_series"]
+        runs.append((p, 30 + i))
+    return runs
+
+
+def evaluate_c2(base_params, eval_params, steps, val_start,
+                simulate_abm_fn, series_key, n_pert=5, pct=0.1, seed_base=10):
+    (base_p, base_seed), *perturbed = _c2_runs(base_params, eval_params,
+                                              n_pert, pct, seed_base)
+    sim_base = simulate_abm_fn(base_p, steps, seed=base_seed)
+    base_mean = mean(sim_base[series_key][val_start:])
+    base_var = variance(sim_base[series_key][val_start:])
+    del sim_base
+    deltas_m, deltas_v = [], []
+    for p, seed in perturbed:
+        sim = simulate_abm_fn(p, steps, seed=seed)
         deltas_m.append(abs(mean(sim[series_key][val_start:]) - base_mean))
         deltas_v.append(abs(variance(sim[series_key][val_start:]) - base_var))
         del sim
@@ -423,8 +569,9 @@ def evaluate_c2(base_params, eval_params, steps, val_start,
 
 def evaluate_c3(eval_params, steps, val_start, simulate_abm_fn,
                 series_key, seed_1=2, seed_2=6, window=5):
-    s1 = simulate_abm_fn(eval_params, steps, seed=seed_1)
-    s2 = simulate_abm_fn(eval_params, steps, seed=seed_2)
+    (p1_params, s1_seed), (p2_params, s2_seed) = _c3_runs(eval_params, seed_1, seed_2)
+    s1 = simulate_abm_fn(p1_params, steps, seed=s1_seed)
+    s2 = simulate_abm_fn(p2_params, steps, seed=s2_seed)
     p1 = window_variance(s1[series_key][val_start:], window)
     p2 = window_variance(s2[series_key][val_start:], window)
     return abs(p1 - p2) < 0.3, {"persistence_1": p1, "persistence_2": p2}
@@ -432,14 +579,9 @@ def evaluate_c3(eval_params, steps, val_start, simulate_abm_fn,
 
 def evaluate_c4(eval_params, base_params, steps, val_start,
                 simulate_abm_fn, series_key, seed=7, factor=1.2):
-    p_base = dict(eval_params)
-    p_base["assimilation_strength"] = 0.0
-    p_base["assimilation_series"] = None
-    sim_b = simulate_abm_fn(p_base, steps, seed=seed)
-    p_alt = dict(p_base)
-    if "forcing_series" in base_params:
-        p_alt["forcing_series"] = [x * factor for x in base_params["forcing_series"]]
-    sim_a = simulate_abm_fn(p_alt, steps, seed=seed + 1)
+    (p_base, seed_b), (p_alt, seed_a) = _c4_runs(eval_params, base_params, seed, factor)
+    sim_b = simulate_abm_fn(p_base, steps, seed=seed_b)
+    sim_a = simulate_abm_fn(p_alt, steps, seed=seed_a)
     diff = abs(mean(sim_a[series_key][val_start:]) - mean(sim_b[series_key][val_start:]))
     return diff > 0.001, {"diff": diff}
 
@@ -447,13 +589,8 @@ def evaluate_c4(eval_params, base_params, steps, val_start,
 def evaluate_c5(base_params, eval_params, steps, val_start,
                 simulate_abm_fn, series_key, n_runs=5, pct=0.1):
     means = []
-    for i in range(n_runs):
-        p = perturb_params(base_params, pct, seed=20 + i)
-        p["assimilation_series"] = None
-        p["assimilation_strength"] = 0.0
-        if "forcing_series" in eval_params:
-            p["forcing_series"] = eval_params["forcing_series"]
-        sim = simulate_abm_fn(p, steps, seed=30 + i)
+    for p, seed in _c5_runs(base_params, eval_params, n_runs, pct):
+        sim = simulate_abm_fn(p, steps, seed=seed)
         means.append(mean(sim[series_key][val_start:]))
         del sim
     rng = max(means) - min(means) if means else 0.0
@@ -466,6 +603,19 @@ def evaluate_c5(base_params, eval_params, steps, val_start,
     }
 
 
+def plan_criteria_runs(scheduler, base_params, eval_params):
+    """
+    Registra en `scheduler` todas las corridas de C2-C5 con sus semillas
+    por defecto (las mismas que usan evaluate_c2..evaluate_c5).
+    """
+    runs = (_c2_runs(base_params, eval_params)
+            + _c3_runs(eval_params)
+            + _c4_runs(eval_params, base_params)
+            + _c5_runs(base_params, eval_params))
+    for p, seed in runs:
+        scheduler.request(p, seed)
+
+
 # ─── Pipeline Principal ──────────────────────────────────────────────────────
 
 class CaseConfig:
@@ -478,7 +628,13 @@ class CaseConfig:
                  real_split="2006-01-01",
                  ode_noise=0.001, base_noise=0.001,
                  corr_threshold=0.7, threshold_factor=1.0,
-                 extra_base_params=None):
+                 extra_base_params=None, calibration_workers=None,
+                 sim_cache_dir=None, ode_regularization=None,
+                 calibration_screening=False, calibration_screen_budget=None,
+                 calibration_halving=False, calibration_halving_eta=3,
+                 calibration_refine="random", calibration_mean_field=False,
+                 calibration_refine_batch=1, edi_surrogates=0,
+                 edi_surrogate_method="phase"):
         self.case_name = case_name
         self.value_col = value_col
         self.series_key = series_key
@@ -495,12 +651,59 @@ class CaseConfig:
         self.corr_threshold = corr_threshold
         self.threshold_factor = threshold_factor
         self.extra_base_params = extra_base_params or {}
+        # Procesos para el grid de calibración (1 = secuencial; None →
+        # $SIMULACION_CALIBRATION_WORKERS o, si no está, las CPUs disponibles)
+        if calibration_workers is None:
+            from parallel_grid import default_workers
+            env_workers = os.environ.get("SIMULACION_CALIBRATION_WORKERS", "")
+            calibration_workers = int(env_workers) if env_workers else default_workers()
+        self.calibration_workers = calibration_workers
+        # Carpeta de la caché de simulaciones post-calibración
+        # (None → $SIMULACION_SIM_CACHE si está definida; si no, sin caché)
+        self.sim_cache_dir = sim_cache_dir
+        # λ Tikhonov de la ODE: fijo, camino a validar o None (camino por defecto)
+        self.ode_regularization = ode_regularization
+        # Pre-selección del grid ABM con emulador (ver surrogate_screen)
+        self.calibration_screening = calibration_screening
+        self.calibration_screen_budget = calibration_screen_budget
+        # Successive halving en la Fase 1 (requiere simulate_abm_chunks)
+        self.calibration_halving = calibration_halving
+        self.calibration_halving_eta = calibration_halving_eta
+        # Refinamiento de la Fase 2: "random" o "lbfgs" (requiere
+        # simulate_abm_sensitivities)
+        self.calibration_refine = calibration_refine
+        # Grid de calibración por campo medio (requiere simulate_abm_macro)
+        self.calibration_mean_field = calibration_mean_field
+        # Propuestas por ronda del refinamiento aleatorio (1 = secuencial)
+        self.calibration_refine_batch = calibration_refine_batch
+        # Test del EDI contra surrogates con la ODE lineal re-ajustada por
+        # surrogate como modelo reducido (0 = sin test; ver
+        # ode_surrogate_reduced_fn e ironclad.surrogate_edi_test)
+        self.edi_surrogates = edi_surrogates
+        self.edi_surrogate_method = edi_surrogate_method
 
 
 def evaluate_phase(config, df, start_date, end_date, split_date,
                    simulate_abm_fn, simulate_ode_fn,
-                   synthetic_meta=None, param_grid=None):
-    """Evalúa una fase completa (sintética o real)."""
+                   synthetic_meta=None, param_grid=None,
+                   simulate_abm_ensemble_fn=None, sim_cache=None,
+                   simulate_abm_chunks_fn=None, simulate_abm_sensitivity_fn=None,
+                   simulate_abm_macro_fn=None):
+    """
+    Evalúa una fase completa (sintética o real).
+
+    sim_cache (opcional): sim_cache.SimulationCache para memoizar las
+    corridas ABM/ODE posteriores a la calibración.
+    simulate_abm_chunks_fn (opcional): simulador por tramos del caso para
+    la calibración con aborto temprano (ver calibrate_abm).
+    simulate_abm_sensitivity_fn (opcional): sensibilidades del caso para el
+    refinamiento por gradiente (config.calibration_refine = "lbfgs").
+    simulate_abm_macro_fn (opcional): serie macro por lotes del caso para el
+    grid por campo medio (config.calibration_mean_field).
+    """
+    from ode_calibration import fit_ode
+    from sim_scheduler import SimulationScheduler
+
     phase_name = "synthetic" if synthetic_meta else "real"
 
     if df.empty or len(df) < 10:
@@ -572,16 +775,49 @@ def evaluate_phase(config, df, start_date, end_date, split_date,
     }
     base_params.update(config.extra_base_params)
 
-    # Calibración ODE
-    alpha, beta = calibrate_ode(obs[:val_start], forcing_series[:val_start])
+    # Calibración ODE (λ por validación cruzada de origen móvil)
+    ode_fit = fit_ode(obs[:val_start], forcing_series[:val_start], config.ode_regularization)
+    alpha, beta = ode_fit["alpha"], ode_fit["beta"]
     base_params["ode_alpha"] = alpha
     base_params["ode_beta"] = beta
 
-    # Calibración ABM
-    best_abm, best_err, top_5 = calibrate_abm(
-        obs[:val_start], base_params, val_start, simulate_abm_fn,
-        param_grid=param_grid, seed=2
-    )
+    # Calibración ABM (memoizada en sim_cache si está activa)
+    calibration_options = {
+        "screening": config.calibration_screening,
+        "screen_budget": config.calibration_screen_budget,
+        "halving": config.calibration_halving,
+        "halving_eta": config.calibration_halving_eta,
+        "refine": config.calibration_refine,
+        "mean_field": config.calibration_mean_field,
+        "refine_batch": config.calibration_refine_batch,
+        "chunks": simulate_abm_chunks_fn is not None,
+        "sensitivities": simulate_abm_sensitivity_fn is not None,
+        "macro": simulate_abm_macro_fn is not None,
+    }
+    calibration = None
+    if sim_cache is not None:
+        calibration_key = _calibration_key(sim_cache, simulate_abm_fn, obs[:val_start],
+                                           base_params, param_grid, calibration_options)
+        calibration = _decode_calibration(sim_cache.get(calibration_key))
+    if calibration is None:
+        calibration = calibrate_abm(
+            obs[:val_start], base_params, val_start, simulate_abm_fn,
+            param_grid=param_grid, seed=2,
+            n_workers=config.calibration_workers,
+            screening=config.calibration_screening,
+            screen_budget=config.calibration_screen_budget,
+            simulate_chunks_fn=simulate_abm_chunks_fn,
+            halving=config.calibration_halving,
+            halving_eta=config.calibration_halving_eta,
+            sensitivity_fn=simulate_abm_sensitivity_fn,
+            refine=config.calibration_refine,
+            macro_fn=simulate_abm_macro_fn,
+            mean_field=config.calibration_mean_field,
+            refine_batch=config.calibration_refine_batch,
+        )
+        if sim_cache is not None:
+            sim_cache.put(calibration_key, _encode_calibration(calibration))
+    best_abm, best_err, top_5 = calibration
     base_params.update(best_abm)
 
     # Parámetros de evaluación (sin assimilación)
@@ -589,15 +825,28 @@ def evaluate_phase(config, df, start_date, end_date, split_date,
     eval_params["assimilation_strength"] = 0.0
     eval_params["assimilation_series"] = None
 
-    # Simulaciones
-    abm = simulate_abm_fn(eval_params, steps, seed=2)
-    ode = simulate_ode_fn(eval_params, steps, seed=3)
-
-    # Modelo reducido (sin acoplamiento macro)
+    # Simulaciones: la corrida principal, el modelo reducido (sin acoplamiento
+    # macro) y todas las de C2-C5 se deduplican y se ejecutan en un solo lote.
     reduced_params = dict(eval_params)
     reduced_params["macro_coupling"] = 0.0
     reduced_params["forcing_scale"] = 0.0
-    abm_reduced = simulate_abm_fn(reduced_params, steps, seed=4)
+    post_abm_fn, post_ode_fn = simulate_abm_fn, simulate_ode_fn
+    post_ensemble_fn = simulate_abm_ensemble_fn
+    if sim_cache is not None:
+        post_abm_fn = sim_cache.wrap(simulate_abm_fn, "abm")
+        post_ode_fn = sim_cache.wrap(simulate_ode_fn, "ode")
+        if simulate_abm_ensemble_fn is not None:
+            post_ensemble_fn = sim_cache.wrap_ensemble(simulate_abm_ensemble_fn, "abm")
+    scheduler = SimulationScheduler(post_abm_fn, steps, post_ensemble_fn)
+    scheduler.request(eval_params, 2, store_grid=True)
+    scheduler.request(reduced_params, 4)
+    plan_criteria_runs(scheduler, base_params, eval_params)
+    scheduler.run()
+    simulate_cached = scheduler.simulate
+
+    abm = simulate_cached(eval_params, steps, seed=2)
+    ode = post_ode_fn(eval_params, steps, seed=3)
+    abm_reduced = simulate_cached(reduced_params, steps, seed=4)
 
     sk = config.series_key
     ode_key = _get_ode_key(ode)
@@ -613,6 +862,20 @@ def evaluate_phase(config, df, start_date, end_date, split_date,
     # EDI con bootstrap
     edi_val = compute_edi(err_abm, err_reduced)
     edi_mean, edi_lo, edi_hi = bootstrap_edi(obs_val, abm_val, reduced_val)
+    edi_surrogate = None
+    if config.edi_surrogates:
+        from ironclad import surrogate_edi_test
+        lam = ode_fit["regularization"]
+        reduced_fn = ode_surrogate_reduced_fn(
+            forcing_series, val_start, steps,
+            0.01 if lam is None else lam, config.ode_noise,
+        )
+        edi_surr, p_surr, _ = surrogate_edi_test(
+            obs, abm[sk], reduced_fn, n_surrogates=config.edi_surrogates,
+            method=config.edi_surrogate_method, seed=5, score_from=val_start,
+        )
+        edi_surrogate = {"n": config.edi_surrogates, "method": config.edi_surrogate_method,
+                         "reduced": "ode", "edi": edi_surr, "p_value": p_surr}
 
     # Effective Information
     ei = effective_information(obs_val, abm_val, reduced_val)
@@ -621,13 +884,13 @@ def evaluate_phase(config, df, start_date, end_date, split_date,
     c1, c1_detail = evaluate_c1(abm_val, ode_val, obs_val, obs_std,
                                  config.threshold_factor, config.corr_threshold)
     c2, c2_detail = evaluate_c2(base_params, eval_params, steps, val_start,
-                                 simulate_abm_fn, sk)
-    c3, c3_detail = evaluate_c3(eval_params, steps, val_start, simulate_abm_fn,
+                                 simulate_cached, sk)
+    c3, c3_detail = evaluate_c3(eval_params, steps, val_start, simulate_cached,
                                  sk, window=config.persistence_window)
     c4, c4_detail = evaluate_c4(eval_params, base_params, steps, val_start,
-                                 simulate_abm_fn, sk)
+                                 simulate_cached, sk)
     c5, c5_detail = evaluate_c5(base_params, eval_params, steps, val_start,
-                                 simulate_abm_fn, sk)
+                                 simulate_cached, sk)
 
     # Symploké, non-locality, persistence
     internal, external = internal_vs_external_cohesion(abm.get("grid", []), abm.get("forcing", []))
@@ -675,6 +938,7 @@ def evaluate_phase(config, df, start_date, end_date, split_date,
             "damping": base_params.get("damping", 0.0),
             "ode_alpha": alpha,
             "ode_beta": beta,
+            "ode_regularization": ode_fit["regularization"],
             "assimilation_strength": 0.0,
             "calibration_rmse": best_err,
         },
@@ -733,12 +997,56 @@ def evaluate_phase(config, df, start_date, end_date, split_date,
         "c5_detail": c5_detail,
     }
 
+    if edi_surrogate:
+        results["edi"]["surrogate"] = edi_surrogate
     if synthetic_meta:
         results["synthetic_meta"] = synthetic_meta
 
     return results
 
 
+# Módulos cuyo código (además de hybrid_validator y del simulador del caso)
+# define el resultado de calibrate_abm
+_CALIBRATION_FILES = ("successive_halving.py", "parallel_grid.py", "surrogate_screen.py",
+                      "gradient_calibration.py")
+
+
+def _calibration_key(sim_cache, simulate_abm_fn, obs_train, base_params, param_grid, options):
+    """
+    Clave de caché de calibrate_abm: obs de entrenamiento, parámetros base,
+    grid, opciones y el código de la calibración y del simulador. n_workers
+    no entra (el resultado no depende de él).
+    """
+    from sim_cache import cache_key, source_digest
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    version = source_digest(simulate_abm_fn, os.path.abspath(__file__),
+                            *(os.path.join(here, name) for name in _CALIBRATION_FILES))
+    spec = {"obs_train": obs_train, "base_params": base_params,
+            "param_grid": param_grid, "options": options}
+    return cache_key(spec, len(obs_train), 2, f"{sim_cache.version}|{version}", "calibrate_abm")
+
+
+def _encode_calibration(calibration):
+    best_params, best_err, top_5 = calibration
+    return {
+        "best": [best_params["forcing_scale"], best_params["macro_coupling"],
+                 best_params["damping"]],
+        "best_err": [best_err],
+        "top_5": np.asarray(top_5, dtype=np.float64).reshape(-1, 4),
+    }
+
+
+def _decode_calibration(entry):
+    """(best_params, best_err, top_5) de una entrada de caché, o None."""
+    if entry is None:
+        return None
+    fs, mc, dmp = (float(v) for v in entry["best"])
+    top_5 = [tuple(float(v) for v in row) for row in np.asarray(entry["top_5"]).tolist()]
+    return ({"forcing_scale": fs, "macro_coupling": mc, "damping": dmp},
+            float(entry["best_err"][0]), top_5)
+
+
 def _get_ode_key(ode_result):
     for k in ["p", "share", "price", "tbar", "x", "e", "m", "w", "incidence"]:
         if k in ode_result:
@@ -762,11 +1070,36 @@ def _empty_phase(phase_name, start, end, split, reason):
 
 def run_full_validation(config, load_real_data_fn, make_synthetic_fn,
                         simulate_abm_fn, simulate_ode_fn,
-                        param_grid=None):
+                        param_grid=None, simulate_abm_ensemble_fn=None,
+                        simulate_abm_chunks_fn=None, simulate_abm_sensitivity_fn=None,
+                        simulate_abm_macro_fn=None):
     """
     Ejecuta validación completa: sintético → real (con gating).
     Retorna dict con ambas fases + metadata.
+
+    simulate_abm_ensemble_fn (opcional): ensemble(params_list, steps, seeds)
+    del caso para ejecutar en un lote las corridas post-calibración
+    (ver abm_numpy.simulate_kernel_ensemble).
+    simulate_abm_chunks_fn (opcional): simulate_abm_chunks del caso, para
+    calibrar con aborto temprano (ver calibrate_abm).
+    simulate_abm_sensitivity_fn (opcional): simulate_abm_sensitivities del
+    caso, para el refinamiento por gradiente.
+    simulate_abm_macro_fn (opcional): simulate_abm_macro del caso, para el
+    grid por campo medio.
+    Si config.sim_cache_dir (o $SIMULACION_SIM_CACHE) está definido, el
+    resultado de calibrate_abm y las corridas posteriores se memoizan en
+    disco con una versión derivada del código de los simuladores y de la
+    calibración (ver sim_cache): re-validar sin cambios no recalibra.
     """
+    sim_cache = None
+    cache_dir = config.sim_cache_dir or os.environ.get("SIMULACION_SIM_CACHE", "")
+    if cache_dir:
+        from sim_cache import SimulationCache, source_digest
+        sim_cache = SimulationCache(
+            cache_dir,
+            version=source_digest(simulate_abm_fn, simulate_ode_fn),
+        )
+
     # Fase sintética
     synth_df, synth_meta = make_synthetic_fn(
         config.synthetic_start, config.synthetic_end, seed=101
@@ -774,7 +1107,12 @@ def run_full_validation(config, load_real_data_fn, make_synthetic_fn,
     synthetic = evaluate_phase(
         config, synth_df, config.synthetic_start, config.synthetic_end,
         config.synthetic_split, simulate_abm_fn, simulate_ode_fn,
-        synthetic_meta=synth_meta, param_grid=param_grid
+        synthetic_meta=synth_meta, param_grid=param_grid,
+        simulate_abm_ensemble_fn=simulate_abm_ensemble_fn,
+        sim_cache=sim_cache,
+        simulate_abm_chunks_fn=simulate_abm_chunks_fn,
+        simulate_abm_sensitivity_fn=simulate_abm_sensitivity_fn,
+        simulate_abm_macro_fn=simulate_abm_macro_fn,
     )
 
     # Fase real
@@ -782,7 +1120,12 @@ def run_full_validation(config, load_real_data_fn, make_synthetic_fn,
     real = evaluate_phase(
         config, real_df, config.real_start, config.real_end,
         config.real_split, simulate_abm_fn, simulate_ode_fn,
-        param_grid=param_grid
+        param_grid=param_grid,
+        simulate_abm_ensemble_fn=simulate_abm_ensemble_fn,
+        sim_cache=sim_cache,
+        simulate_abm_chunks_fn=simulate_abm_chunks_fn,
+        simulate_abm_sensitivity_fn=simulate_abm_sensitivity_fn,
+        simulate_abm_macro_fn=simulate_abm_macro_fn,
     )
 
     # Gating: si sintético falla condiciones ESTRUCTURALES (C2-C4), real falla.
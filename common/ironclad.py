@@ -1,25 +1,147 @@
+"""
+ironclad.py — Significancia del EDI contra datos sustitutos (surrogates).
+
+Los surrogates se generan como una matriz (n_surrogates, T) de una vez,
+desde un np.random.Generator con semilla:
+
+  - "shuffle": permutación de cada fila (conserva la distribución,
+    destruye toda la estructura temporal),
+  - "phase": aleatorización de fases de Fourier (conserva el espectro de
+    potencia, es decir, la autocorrelación lineal),
+  - "aaft": amplitude-adjusted Fourier transform (conserva la distribución
+    y, aproximadamente, el espectro).
+
+surrogate_edi_test evalúa el EDI de todos los surrogates en lote: cada
+surrogate reemplaza a la serie observada, reduced_fn re-ajusta el modelo
+reducido a cada fila de la matriz (en un solo llamado por trozo) y los
+RMSE del modelo completo y del reducido se reducen por fila. Con trozos de
+a lo sumo CHUNK_ELEMS elementos, 1.000–10.000 surrogates caben en una
+corrida de validación.
+
+    reduced_fn = ode_surrogate_reduced_fn(forcing, val_start, steps, lam, noise)
+    real, p, edis = surrogate_edi_test(obs, abm, reduced_fn, 5000, score_from=val_start)
+"""
+
 import numpy as np
 
-def generate_surrogates(data, n_surrogates=100):
+
+SURROGATE_METHODS = ("shuffle", "phase", "aaft")
+# Elementos (surrogates × T) por trozo en surrogate_edi_test
+CHUNK_ELEMS = 1 << 22
+
+
+def _phase_randomize(rows, rng):
+    """Surrogates de fase de cada fila de rows (S, T), con fases propias."""
+    n_steps = rows.shape[1]
+    spectrum = np.fft.rfft(rows, axis=1)
+    phases = rng.uniform(0.0, 2.0 * np.pi, size=spectrum.shape)
+    phases[:, 0] = 0.0
+    if n_steps % 2 == 0:
+        # El bin de Nyquist debe seguir siendo real
+        phases[:, -1] = 0.0
+    return np.fft.irfft(spectrum * np.exp(1j * phases), n=n_steps, axis=1)
+
+
+def _ranks(rows):
+    return np.argsort(np.argsort(rows, axis=-1, kind="stable"), axis=-1, kind="stable")
+
+
+def generate_surrogate_matrix(data, n_surrogates=100, method="shuffle", seed=None, rng=None):
+    """
+    Matriz (n_surrogates, T) de surrogates de la serie data.
+
+    Args:
+        method: "shuffle", "phase" o "aaft"
+        seed: semilla del Generator (ignorada si se pasa rng)
+        rng: np.random.Generator a reusar
+    """
+    if method not in SURROGATE_METHODS:
+        raise ValueError(f"method debe ser uno de {SURROGATE_METHODS}: {method!r}")
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    x = np.asarray(data, dtype=np.float64)
+    rows = np.broadcast_to(x, (n_surrogates, len(x)))
+
+    if method == "shuffle":
+        return rng.permuted(rows, axis=1)
+    if method == "phase":
+        return _phase_randomize(rows, rng)
+
+    # AAFT: gaussianas con el orden de data, aleatorización de fases y
+    # re-escalado por rangos a los valores originales
+    gauss = np.sort(rng.standard_normal(rows.shape), axis=1)[:, _ranks(x)]
+    shuffled = _phase_randomize(gauss, rng)
+    return np.sort(x)[_ranks(shuffled)]
+
+
+def generate_surrogates(data, n_surrogates=100, method="shuffle", seed=None):
     """Genera series de tiempo barajadas manteniendo la distribución."""
-    surrogates = []
-    for _ in range(n_surrogates):
-        s = data.copy()
-        np.random.shuffle(s)
-        surrogates.append(s)
-    return surrogates
+    return list(generate_surrogate_matrix(data, n_surrogates, method=method, seed=seed))
+
 
 def edi_significance_test(real_edi, surrogate_edis):
     """
     Calcula el p-valor de la eficacia causal.
     Si p < 0.05, el hiperobjeto es estadísticamente significativo.
     """
-    count = sum(1 for s_edi in surrogate_edis if s_edi >= real_edi)
+    surrogate_edis = np.asarray(surrogate_edis, dtype=np.float64)
+    count = int(np.count_nonzero(surrogate_edis >= real_edi))
     p_value = count / len(surrogate_edis)
     return p_value
 
+
 def calculate_ironclad_edi(rmse_reduced, rmse_full):
     """EDI ajustado para evitar sobreajuste."""
     if rmse_reduced == 0: return 0.0
     raw_edi = (rmse_reduced - rmse_full) / rmse_reduced
     return max(0.0, raw_edi)
+
+
+def batched_edi(obs, full_pred, reduced_pred, clamp=False):
+    """
+    EDI de cada fila de obs (S, T) contra predicciones (T,) o (S, T).
+    Filas con rmse_reduced = 0 dan 0; clamp=True aplica max(0, ·) como
+    calculate_ironclad_edi.
+    """
+    obs = np.atleast_2d(np.asarray(obs, dtype=np.float64))
+    rmse_full = np.sqrt(np.mean((np.asarray(full_pred, dtype=np.float64) - obs) ** 2, axis=1))
+    rmse_reduced = np.sqrt(np.mean((np.asarray(reduced_pred, dtype=np.float64) - obs) ** 2, axis=1))
+    ok = rmse_reduced != 0
+    edi = np.zeros(len(obs))
+    edi[ok] = (rmse_reduced[ok] - rmse_full[ok]) / rmse_reduced[ok]
+    return np.maximum(edi, 0.0) if clamp else edi
+
+
+def surrogate_edi_test(obs, full_pred, reduced_fn, n_surrogates=1000, method="phase",
+                       seed=0, score_from=0, chunk_elems=CHUNK_ELEMS):
+    """
+    Test de significancia del EDI contra surrogates de la serie observada.
+
+    El EDI real (obs vs. full_pred y reduced_fn(obs)) se compara con el
+    EDI de cada surrogate en el lugar de obs. reduced_fn(matriz (S, T))
+    debe devolver en lote las predicciones (S, T) del modelo reducido
+    re-ajustado a cada fila; con predicciones fijas el test no contrasta
+    el EDI bajo la hipótesis nula, por eso es obligatorio.
+
+    Args:
+        score_from: primer paso que entra en los RMSE (p. ej. el inicio de
+                    la validación); los anteriores solo sirven para re-ajustar
+
+    Returns:
+        (real_edi, p_value, surrogate_edis ndarray (n_surrogates,))
+    """
+    if reduced_fn is None:
+        raise ValueError("reduced_fn es obligatorio: el modelo reducido debe re-ajustarse a cada surrogate")
+    obs = np.asarray(obs, dtype=np.float64)
+    full_pred = np.asarray(full_pred, dtype=np.float64)[score_from:]
+    rng = np.random.default_rng(seed)
+    real_reduced = reduced_fn(obs[None, :])[:, score_from:]
+    real_edi = float(batched_edi(obs[score_from:], full_pred, real_reduced)[0])
+
+    edis = np.empty(n_surrogates)
+    size = max(1, chunk_elems // max(len(obs), 1))
+    for start in range(0, n_surrogates, size):
+        count = min(size, n_surrogates - start)
+        surrogates = generate_surrogate_matrix(obs, count, method=method, rng=rng)
+        reduced = reduced_fn(surrogates)[:, score_from:]
+        edis[start:start + count] = batched_edi(surrogates[:, score_from:], full_pred, reduced)
+    return real_edi, edi_significance_test(real_edi, edis), edis
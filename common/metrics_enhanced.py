@@ -4,13 +4,13 @@ metrics_enhanced.py — Métricas robustas para validación de hiperobjetos.
 Mejoras sobre metrics.py original:
 - EDI con bootstrap CI (intervalos de confianza)
 - Effective Information (EI) con KDE en lugar de bins duros
-- Tests estadísticos de significancia
+- Tests estadísticos de significancia (bootstrap y permutación vectorizados,
+  ver resampling.py)
 - Cohesion Ratio (CR) como métrica unificada
 - Window variance con soporte multi-escala
 """
 
 import math
-import random
 
 
 def mean(xs):
@@ -72,74 +72,51 @@ def compute_edi(rmse_abm, rmse_reduced):
     return edi
 
 
-def bootstrap_edi(obs_val, abm_val, reduced_val, n_boot=500, ci=0.95, seed=42):
+def _squared_errors(pred, obs):
+    import numpy as np
+    return (np.asarray(pred, dtype=np.float64) - np.asarray(obs, dtype=np.float64)) ** 2
+
+
+def bootstrap_edi(obs_val, abm_val, reduced_val, n_boot=500, ci=0.95, seed=42,
+                  block=1, resampler=None):
     """
     Bootstrap CI para EDI. Remuestrea los residuos y recalcula EDI n_boot veces.
+    block > 1 usa bootstrap por bloques (series autocorrelacionadas);
+    resampler permite compartir el stream con otras pruebas.
     Retorna: (edi_mean, edi_lo, edi_hi, edi_samples)
     """
-    rng = random.Random(seed)
+    import numpy as np
+    from resampling import Resampler
+
     n = len(obs_val)
     if n < 4:
         edi = compute_edi(rmse(abm_val, obs_val), rmse(reduced_val, obs_val))
         return edi, edi, edi, [edi]
 
-    edi_samples = []
-    for _ in range(n_boot):
-        indices = [rng.randint(0, n - 1) for _ in range(n)]
-        obs_b = [obs_val[i] for i in indices]
-        abm_b = [abm_val[i] for i in indices]
-        red_b = [reduced_val[i] for i in indices]
-        r_abm = rmse(abm_b, obs_b)
-        r_red = rmse(red_b, obs_b)
-        edi_samples.append(compute_edi(r_abm, r_red))
-
-    edi_samples.sort()
+    rs = resampler or Resampler(seed)
+    sq = np.vstack([_squared_errors(abm_val, obs_val), _squared_errors(reduced_val, obs_val)])
+    r_abm, r_red = np.sqrt(rs.bootstrap_means(sq, n_boot, block)).T
+    ok = r_red >= 1e-15
+    samples = np.zeros(n_boot)
+    samples[ok] = (r_red[ok] - r_abm[ok]) / r_red[ok]
+    samples.sort()
+
     alpha = (1.0 - ci) / 2.0
     lo_idx = max(0, int(alpha * n_boot))
     hi_idx = min(n_boot - 1, int((1.0 - alpha) * n_boot))
-    return mean(edi_samples), edi_samples[lo_idx], edi_samples[hi_idx], edi_samples
+    return float(samples.mean()), float(samples[lo_idx]), float(samples[hi_idx]), samples.tolist()
 
 
 # --- Effective Information (EI) via KDE-like approach ---
 
-def _gaussian_kernel(x, mu, h):
-    """Kernel gaussiano para estimación de densidad."""
-    z = (x - mu) / h
-    return math.exp(-0.5 * z * z) / (h * math.sqrt(2 * math.pi))
-
-
 def _kde_entropy(series, n_eval=50, bandwidth=None):
     """
     Entropía Shannon estimada via KDE (Kernel Density Estimation).
-    Más robusta que bins duros para series cortas.
+    Más robusta que bins duros para series cortas. En series largas la
+    densidad se obtiene por binning lineal (ver kde_entropy.py).
     """
-    n = len(series)
-    if n < 2:
-        return 0.0
-
-    s_min, s_max = min(series), max(series)
-    s_range = s_max - s_min
-    if s_range < 1e-15:
-        return 0.0
-
-    if bandwidth is None:
-        bandwidth = 1.06 * std(series) * (n ** (-0.2))
-    if bandwidth < 1e-15:
-        bandwidth = s_range / 10.0
-
-    margin = 3 * bandwidth
-    eval_min = s_min - margin
-    eval_max = s_max + margin
-    dx = (eval_max - eval_min) / n_eval
-
-    entropy = 0.0
-    for k in range(n_eval):
-        x = eval_min + (k + 0.5) * dx
-        density = sum(_gaussian_kernel(x, s, bandwidth) for s in series) / n
-        if density > 1e-15:
-            entropy -= density * math.log(density) * dx
-
-    return max(0.0, entropy)
+    from kde_entropy import kde_entropy
+    return kde_entropy(series, n_eval=n_eval, bandwidth=bandwidth)
 
 
 def effective_information(full_series, reduced_series):
@@ -158,8 +135,12 @@ def effective_information_residuals(obs, full_pred, reduced_pred):
     EI basado en residuos: H(residuos_reducido) - H(residuos_completo).
     Más informativo que comparar series directamente.
     """
-    res_full = [o - p for o, p in zip(obs, full_pred)]
-    res_reduced = [o - p for o, p in zip(obs, reduced_pred)]
+    import numpy as np
+
+    obs_a = np.asarray(obs, dtype=np.float64)
+    n = min(len(obs_a), len(full_pred), len(reduced_pred))
+    res_full = obs_a[:n] - np.asarray(full_pred, dtype=np.float64)[:n]
+    res_reduced = obs_a[:n] - np.asarray(reduced_pred, dtype=np.float64)[:n]
     return effective_information(res_full, res_reduced)
 
 
@@ -169,36 +150,23 @@ def internal_vs_external_cohesion(grid_series, forcing_series):
     """
     Cohesión interna (correlación entre celdas vecinas) vs.
     cohesión externa (correlación celdas-forcing).
+
+    Todas las celdas se evalúan en una pasada sobre el cubo (T, N, N).
     """
+    import numpy as np
+    from grid_metrics import cell_correlations, neighbor_mean_cube
+
     steps = len(grid_series)
     if steps == 0:
         return 0.0, 0.0
-    n = len(grid_series[0])
-
-    internal_corrs = []
-    external_corrs = []
-    for i in range(n):
-        for j in range(n):
-            cell_series = [grid_series[t][i][j] for t in range(steps)]
-            neighbors = []
-            for t in range(steps):
-                nb = []
-                if i > 0:
-                    nb.append(grid_series[t][i - 1][j])
-                if i < n - 1:
-                    nb.append(grid_series[t][i + 1][j])
-                if j > 0:
-                    nb.append(grid_series[t][i][j - 1])
-                if j < n - 1:
-                    nb.append(grid_series[t][i][j + 1])
-                neighbors.append(sum(nb) / len(nb))
-
-            internal_corrs.append(correlation(cell_series, neighbors))
-            if len(forcing_series) == steps:
-                external_corrs.append(correlation(cell_series, forcing_series))
-
-    internal = mean(internal_corrs)
-    external = mean(external_corrs) if external_corrs else 0.0
+    cube = np.asarray(grid_series, dtype=np.float64)
+
+    internal = float(cell_correlations(cube, neighbor_mean_cube(cube),
+                                       1e-15, clamp=True).mean())
+    external = 0.0
+    if len(forcing_series) == steps:
+        external = float(cell_correlations(cube, forcing_series,
+                                           1e-15, clamp=True).mean())
     return internal, external
 
 
@@ -211,25 +179,21 @@ def cohesion_ratio(internal, external):
 
 def dominance_share(grid_series):
     """Proporción del agente más dominante. Non-locality si < 0.05."""
+    import numpy as np
+    from grid_metrics import cell_correlations
+
     steps = len(grid_series)
     if steps == 0:
         return 1.0
-    n = len(grid_series[0])
-    regional = []
-    for t in range(steps):
-        total = sum(sum(row) for row in grid_series[t])
-        regional.append(total / (n * n))
-
-    scores = []
-    for i in range(n):
-        for j in range(n):
-            cell_series = [grid_series[t][i][j] for t in range(steps)]
-            scores.append(abs(correlation(cell_series, regional)))
-
-    total_score = sum(scores) if scores else 1.0
+    cube = np.asarray(grid_series, dtype=np.float64)
+    n = cube.shape[1]
+    regional = cube.mean(axis=(1, 2))
+    scores = np.abs(cell_correlations(cube, regional, 1e-15, clamp=True))
+
+    total_score = float(scores.sum())
     if total_score < 1e-15:
         return 1.0 / (n * n)
-    return max(scores) / total_score
+    return float(scores.max()) / total_score
 
 
 # --- Tests estadísticos ---
@@ -241,42 +205,40 @@ def diebold_mariano_like(errors_1, errors_2):
     Retorna: (stat, significant_at_05)
     stat > 1.96 indica que model_1 es significativamente mejor.
     """
+    import numpy as np
+
     n = len(errors_1)
     if n < 10:
         return 0.0, False
-    d = [e2 ** 2 - e1 ** 2 for e1, e2 in zip(errors_1, errors_2)]
-    d_mean = mean(d)
-    d_var = variance(d)
+    e1 = np.asarray(errors_1, dtype=np.float64)
+    e2 = np.asarray(errors_2, dtype=np.float64)
+    d = e2 ** 2 - e1 ** 2
+    d_var = float(d.var())
     if d_var < 1e-15:
         return 0.0, False
-    stat = d_mean / math.sqrt(d_var / n)
+    stat = float(d.mean()) / math.sqrt(d_var / n)
     return stat, abs(stat) > 1.96
 
 
-def emergence_significance(obs, abm_pred, reduced_pred, n_perm=200, seed=42):
+def emergence_significance(obs, abm_pred, reduced_pred, n_perm=200, seed=42,
+                           block=1, resampler=None):
     """
     Test de permutación para significancia de emergencia.
-    Compara RMSE del modelo completo vs. reducido bajo permutaciones aleatorias.
+    Compara RMSE del modelo completo vs. reducido bajo permutaciones aleatorias
+    (intercambio par a par, o por bloques con block > 1).
     Retorna: (p_value, significant)
     """
-    rng = random.Random(seed)
-    observed_diff = rmse(reduced_pred, obs) - rmse(abm_pred, obs)
-
-    count = 0
-    combined = list(zip(abm_pred, reduced_pred))
-    for _ in range(n_perm):
-        perm_abm = []
-        perm_red = []
-        for a, r in combined:
-            if rng.random() < 0.5:
-                perm_abm.append(a)
-                perm_red.append(r)
-            else:
-                perm_abm.append(r)
-                perm_red.append(a)
-        perm_diff = rmse(perm_red, obs) - rmse(perm_abm, obs)
-        if perm_diff >= observed_diff:
-            count += 1
+    import numpy as np
+    from resampling import Resampler
+
+    rs = resampler or Resampler(seed)
+    sq_abm = _squared_errors(abm_pred, obs)
+    sq_red = _squared_errors(reduced_pred, obs)
+    observed_diff = math.sqrt(sq_red.mean()) - math.sqrt(sq_abm.mean())
+
+    perm_abm, perm_red = rs.swap_means(sq_abm, sq_red, n_perm, block)
+    perm_diff = np.sqrt(perm_red) - np.sqrt(perm_abm)
+    count = int(np.count_nonzero(perm_diff >= observed_diff))
 
     p_value = (count + 1) / (n_perm + 1)
     return p_value, p_value < 0.05
@@ -0,0 +1,181 @@
+"""
+ode_calibration.py — Calibración vectorizada de la ODE con camino Tikhonov.
+
+La ODE base dX = alpha * (F - beta * X) es lineal en (a, b) = (alpha, -alpha*beta):
+
+    y_t = X_{t+1} - X_t = a * F_t + b * X_t
+
+así que la regresión ridge depende solo de cinco estadísticos suficientes
+(sum F², sum X², sum F·X, sum F·y, sum X·y). Aquí se calculan con productos
+punto —o con sumas acumuladas, para todos los prefijos de la serie a la
+vez— y el sistema 2×2 (A'A + λ·n·I) se resuelve en forma cerrada para un
+vector completo de λ en una sola operación.
+
+λ se elige por validación cruzada de origen móvil dentro de la ventana de
+entrenamiento: para cada origen se ajusta con el prefijo y se mide el error
+de los incrementos de un paso del bloque siguiente. Como las estadísticas
+del prefijo son filas de la suma acumulada, la validación completa cuesta
+lo mismo que un ajuste.
+
+    fit = fit_ode(obs_train, forcing_train)        # λ por CV
+    fit["alpha"], fit["beta"], fit["regularization"]
+
+fit_ode_rows ajusta en lote una fila por serie (p. ej. los surrogates de
+ironclad) con un λ fijo, a partir de los mismos estadísticos por fila.
+"""
+
+import numpy as np
+
+
+# Camino de λ por defecto (incluye el 0.01 que se usaba fijo)
+DEFAULT_REGULARIZATIONS = np.logspace(-4, 1, 11)
+
+# (alpha, beta) cuando la serie es muy corta o el sistema es singular
+FALLBACK = (0.05, 0.02)
+
+
+def _pairs(obs, forcing):
+    """(f, x, y) de los n = len(obs) - 1 pasos."""
+    obs = np.asarray(obs, dtype=np.float64)
+    n = len(obs) - 1
+    x = obs[:-1]
+    y = np.diff(obs)
+    f = np.asarray(forcing[:n], dtype=np.float64)
+    return f, x, y
+
+
+def sufficient_stats(obs, forcing):
+    """(sum F², sum X², sum F·X, sum F·y, sum X·y) como array (5,)."""
+    f, x, y = _pairs(obs, forcing)
+    return np.array([f @ f, x @ x, f @ x, f @ y, x @ y])
+
+
+def prefix_stats(obs, forcing):
+    """Estadísticos de cada prefijo: fila k = los de los primeros k+1 pasos, (n, 5)."""
+    f, x, y = _pairs(obs, forcing)
+    return np.cumsum(np.stack([f * f, x * x, f * x, f * y, x * y], axis=-1), axis=0)
+
+
+def solve_path(stats, n, regularizations):
+    """
+    Resuelve el sistema regularizado para cada λ.
+
+    Args:
+        stats: estadísticos (..., 5)
+        n: pasos de cada conjunto de estadísticos, escalar o (...)
+        regularizations: λ, array (L,)
+
+    Returns:
+        (alpha, beta) arrays (..., L), ya acotados a [0.001, 0.5] y
+        [0.001, 1.0]; FALLBACK donde el sistema es singular
+    """
+    stats = np.asarray(stats, dtype=np.float64)
+    lam = np.asarray(regularizations, dtype=np.float64)
+    sf2, sx2, sfx, sfy, sxy = (stats[..., k, None] for k in range(5))
+    reg = lam * np.asarray(n, dtype=np.float64)[..., None]
+
+    det = (sf2 + reg) * (sx2 + reg) - sfx * sfx
+    ok = np.abs(det) >= 1e-15
+    safe = np.where(ok, det, 1.0)
+    a = (sfy * (sx2 + reg) - sxy * sfx) / safe
+    b = ((sf2 + reg) * sxy - sfy * sfx) / safe
+
+    alpha = np.clip(a, 0.001, 0.5)
+    beta = np.clip(-b / alpha, 0.001, 1.0)
+    ok &= np.isfinite(a) & np.isfinite(b)
+    return np.where(ok, alpha, FALLBACK[0]), np.where(ok, beta, FALLBACK[1])
+
+
+def rolling_origin_scores(obs, forcing, regularizations, n_folds=5, min_train=None):
+    """
+    Error cuadrático medio de un paso por λ, con validación de origen móvil.
+
+    El tramo posterior a min_train (default: la mitad de los pasos) se
+    parte en n_folds bloques; el bloque k se predice con los parámetros
+    ajustados sobre todo lo anterior a él.
+
+    Returns:
+        array (L,) de errores medios por λ, o None si no hay pasos suficientes
+    """
+    f, x, y = _pairs(obs, forcing)
+    n = len(y)
+    if min_train is None:
+        min_train = max(8, n // 2)
+    if n - min_train < n_folds or min_train < 2:
+        return None
+
+    origins = np.linspace(min_train, n, n_folds + 1).astype(int)
+    cum = prefix_stats(obs, forcing)
+    alpha, beta = solve_path(cum[origins[:-1] - 1], origins[:-1], regularizations)
+
+    scores = np.zeros(len(np.atleast_1d(regularizations)))
+    for k in range(n_folds):
+        block = slice(origins[k], origins[k + 1])
+        pred = alpha[k, :, None] * (f[None, block] - beta[k, :, None] * x[None, block])
+        scores += np.mean((y[None, block] - pred) ** 2, axis=1)
+    return scores / n_folds
+
+
+def fit_ode_rows(obs_rows, forcing, regularization):
+    """
+    (alpha, beta) de cada fila de obs_rows (S, T) con un λ fijo y un
+    forcing compartido; arrays (S,).
+    """
+    rows = np.atleast_2d(np.asarray(obs_rows, dtype=np.float64))
+    S, T = rows.shape
+    n = T - 1
+    if n < 2:
+        return np.full(S, FALLBACK[0]), np.full(S, FALLBACK[1])
+    x = rows[:, :-1]
+    y = np.diff(rows, axis=1)
+    f = np.asarray(forcing[:n], dtype=np.float64)
+    stats = np.stack([np.full(S, f @ f), np.einsum("ij,ij->i", x, x), x @ f,
+                      y @ f, np.einsum("ij,ij->i", x, y)], axis=-1)
+    alpha, beta = solve_path(stats, n, [regularization])
+    return alpha[:, 0], beta[:, 0]
+
+
+def fit_ode(obs, forcing, regularization=None, n_folds=5):
+    """
+    Ajusta (alpha, beta) de la ODE base.
+
+    Args:
+        obs, forcing: serie observada y forcing del tramo de entrenamiento
+        regularization: λ fijo (escalar), camino de λ a validar (secuencia),
+                        o None → DEFAULT_REGULARIZATIONS
+        n_folds: bloques de la validación de origen móvil
+
+    Returns:
+        dict {alpha, beta, regularization, path: {regularization, alpha,
+        beta, cv_score}}; con un λ fijo o pocos datos para validar, la
+        elección es el λ fijo / el del camino más cercano a 0.01
+    """
+    n = len(obs) - 1
+    if n < 2:
+        return {"alpha": FALLBACK[0], "beta": FALLBACK[1],
+                "regularization": None, "path": None}
+
+    if regularization is None:
+        regularization = DEFAULT_REGULARIZATIONS
+    lam = np.atleast_1d(np.asarray(regularization, dtype=np.float64))
+    alpha, beta = solve_path(sufficient_stats(obs, forcing), n, lam)
+
+    scores = None
+    if len(lam) > 1:
+        scores = rolling_origin_scores(obs, forcing, lam, n_folds=n_folds)
+    if scores is not None and np.all(np.isfinite(scores)):
+        best = int(np.argmin(scores))
+    else:
+        best = int(np.argmin(np.abs(np.log(lam + 1e-300) - np.log(0.01))))
+
+    return {
+        "alpha": float(alpha[best]),
+        "beta": float(beta[best]),
+        "regularization": float(lam[best]),
+        "path": {
+            "regularization": lam.tolist(),
+            "alpha": alpha.tolist(),
+            "beta": beta.tolist(),
+            "cv_score": None if scores is None else scores.tolist(),
+        },
+    }
@@ -0,0 +1,296 @@
+"""
+ode_ensemble.py — Integración vectorizada de ensembles de las ODE de los casos.
+
+Cada caso integra una recurrencia escalar con ruido random.uniform. Aquí
+se integran B miembros a la vez, cada uno con sus propios parámetros y
+semilla, sobre un forcing compartido (T,) o por miembro (B, T):
+
+  forma "balance" (clima, contaminación, energía, finanzas, ...):
+      x' = x + alpha * (f - beta * x) + u
+  forma "relax" (kessler, deforestación, falsación, ...):
+      x' = x + (alpha * (f - x) - beta * x) + u
+  SEIR (epidemiología):
+      beta_t = max(0, beta + f); incidencia = sigma * e + u
+
+El ruido u de cada miembro es el mismo flujo que random.seed(seed) +
+random.uniform(-noise, noise) (ver rng_compat.legacy_uniform_rows), y el método "loop" repite
+la aritmética de los loops originales, así que es bit-idéntico a ellos.
+
+Ambas formas lineales son un filtro IIR de primer orden:
+      x' = a * x + (alpha * f + u),  a = 1 - alpha*beta  |  1 - alpha - beta
+por lo que, sin asimilación, el método "lfilter" integra cada miembro con
+scipy.signal.lfilter (un llamado por coeficiente distinto), con
+diferencias de redondeo respecto del loop.
+
+Uso en ode.py:
+    MODEL = LinearODE("p", state_key="p0")
+
+    def simulate_ode(params, steps, seed):
+        return simulate_linear_ode(MODEL, params, steps, seed)
+"""
+
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+    LFILTER_AVAILABLE = True
+except ImportError:
+    LFILTER_AVAILABLE = False
+
+# Costo de un llamado a lfilter medido en pasos del loop vectorizado
+_LFILTER_CALL_STEPS = 25
+
+
+def _column(values, B):
+    """Escalar o secuencia → array (B,) float64."""
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (B,)).copy()
+
+
+def _forcing_matrix(forcing, B, steps):
+    """Forcing (T,) o (B, T) → vista (B, steps)."""
+    arr = np.asarray(forcing, dtype=np.float64)
+    if arr.shape[-1] < steps:
+        raise IndexError("forcing_series más corta que steps")
+    return np.broadcast_to(arr[..., :steps], (B, steps))
+
+
+def uniform_noise(noise, seeds, steps):
+    """
+    Ruido (B, steps): fila b = random.seed(seeds[b]) seguido de
+    steps llamadas a random.uniform(-noise[b], noise[b]).
+    """
+    from rng_compat import legacy_uniform_rows
+
+    noise = _column(noise, len(seeds))
+    return legacy_uniform_rows(seeds, -noise, noise, steps)
+
+
+def _assimilation_targets(assimilation_series, B, steps):
+    """(targets (B, steps) con NaN donde no hay dato, o None si no hay asimilación)."""
+    if assimilation_series is None:
+        return None
+    series = list(assimilation_series)
+    if series and isinstance(series[0], (list, tuple, np.ndarray)):
+        rows = series
+    else:
+        rows = [series] * B
+    targets = np.full((B, steps), np.nan)
+    for b, row in enumerate(rows):
+        for t, v in enumerate(row[:steps]):
+            if v is not None:
+                targets[b, t] = v
+    return targets
+
+
+def integrate_linear(alpha, beta, noise, x0, forcing, steps, seeds, form="balance",
+                     assimilation_series=None, assimilation_strength=0.0,
+                     method="auto"):
+    """
+    Integra B miembros de la ODE lineal en una pasada.
+
+    Args:
+        alpha, beta, noise, x0: escalares o arrays (B,)
+        forcing: serie compartida (T,) o una por miembro (B, T)
+        steps: pasos
+        seeds: una semilla por miembro (define B)
+        form: "balance" o "relax" (ver docstring del módulo)
+        assimilation_series: serie (T,) compartida, una por miembro, o None
+        assimilation_strength: escalar o array (B,)
+        method: "loop" (bit-idéntico a los ode.py), "lfilter" o "auto"
+                (lfilter si scipy está disponible, no hay asimilación y
+                hay pocos coeficientes distintos para la longitud de la serie)
+
+    Returns:
+        ndarray (B, steps) con el estado tras cada paso
+    """
+    if form not in ("balance", "relax"):
+        raise ValueError(f"form desconocida: {form}")
+    B = len(seeds)
+    alpha = _column(alpha, B)
+    beta = _column(beta, B)
+    x = _column(x0, B)
+    f_mat = _forcing_matrix(forcing, B, steps)
+    u = uniform_noise(noise, seeds, steps)
+    targets = _assimilation_targets(assimilation_series, B, steps)
+
+    coef = 1.0 - alpha * beta if form == "balance" else 1.0 - alpha - beta
+    distinct = np.unique(coef)
+    if method == "auto":
+        # Un llamado a lfilter por coeficiente distinto frente a un paso
+        # vectorizado por t: lfilter gana con series largas o parámetros
+        # compartidos (réplicas de ruido de un mismo punto).
+        use_lfilter = (LFILTER_AVAILABLE and targets is None
+                       and len(distinct) * _LFILTER_CALL_STEPS <= steps)
+        method = "lfilter" if use_lfilter else "loop"
+    if method == "lfilter":
+        if targets is not None:
+            raise ValueError("lfilter no admite asimilación; use method='loop'")
+        if not LFILTER_AVAILABLE:
+            raise ImportError("scipy.signal no está disponible")
+        drive = alpha[:, None] * f_mat + u
+        out = np.empty((B, steps))
+        for a in distinct:
+            rows = np.flatnonzero(coef == a)
+            zi = (a * x[rows])[:, None]
+            out[rows], _ = lfilter([1.0], [1.0, -a], drive[rows], axis=-1, zi=zi)
+        return out
+    if method != "loop":
+        raise ValueError(f"method desconocido: {method}")
+
+    strength = _column(assimilation_strength, B)
+    out = np.empty((B, steps))
+    for t in range(steps):
+        f = f_mat[:, t]
+        if form == "balance":
+            x = x + alpha * (f - beta * x) + u[:, t]
+        else:
+            x = x + (alpha * (f - x) - beta * x) + u[:, t]
+        if targets is not None:
+            target = targets[:, t]
+            has = ~np.isnan(target)
+            if has.any():
+                x = np.where(has, x + strength * (target - x), x)
+        out[:, t] = x
+    return out
+
+
+def integrate_seir(beta, sigma, gamma, noise, forcing, steps, seeds,
+                   s0=0.999, e0=0.001, i0=0.0, r0=0.0,
+                   assimilation_series=None, assimilation_strength=0.0):
+    """
+    Integra B miembros del SEIR discreto de epidemiología en una pasada.
+
+    Args:
+        beta, sigma, gamma, noise, s0, e0, i0, r0: escalares o arrays (B,)
+        forcing: serie compartida (T,) o una por miembro (B, T)
+        steps: pasos
+        seeds: una semilla por miembro (define B)
+        assimilation_series / assimilation_strength: como en integrate_linear
+
+    Returns:
+        ndarray (B, steps) con la incidencia (sigma * e + ruido) por paso
+    """
+    B = len(seeds)
+    beta = _column(beta, B)
+    sigma = _column(sigma, B)
+    gamma = _column(gamma, B)
+    s, e, i, r = (_column(v, B) for v in (s0, e0, i0, r0))
+    f_mat = _forcing_matrix(forcing, B, steps)
+    u = uniform_noise(noise, seeds, steps)
+    targets = _assimilation_targets(assimilation_series, B, steps)
+    strength = _column(assimilation_strength, B)
+
+    out = np.empty((B, steps))
+    for t in range(steps):
+        beta_t = np.maximum(0.0, beta + f_mat[:, t])
+        new_e = beta_t * s * i
+        new_i = sigma * e
+        new_r = gamma * i
+
+        s = np.maximum(0.0, s - new_e)
+        e = np.maximum(0.0, e + new_e - new_i)
+        i = np.maximum(0.0, i + new_i - new_r)
+        r = np.maximum(0.0, r + new_r)
+
+        inc = new_i + u[:, t]
+        if targets is not None:
+            target = targets[:, t]
+            has = ~np.isnan(target)
+            if has.any():
+                inc = np.where(has, inc + strength * (target - inc), inc)
+        out[:, t] = inc
+    return out
+
+
+class LinearODE:
+    """
+    Descripción de la ODE lineal de un caso (nombres de parámetros y forma).
+
+    Args:
+        series_key: nombre de la serie en el resultado ("p", "tbar", ...)
+        state_key: parámetro con el estado inicial ("p0", "t0", ...)
+        form: "balance" o "relax"
+        param_keys: nombres de (alpha, beta, noise) en params
+        defaults: valores por defecto de esos parámetros y del estado
+                  inicial (None → son obligatorios)
+    """
+    def __init__(self, series_key, state_key, form="balance",
+                 param_keys=("ode_alpha", "ode_beta", "ode_noise"), defaults=None):
+        self.series_key = series_key
+        self.state_key = state_key
+        self.form = form
+        self.param_keys = tuple(param_keys)
+        self.defaults = dict(defaults or {})
+
+    def _get(self, params, key):
+        if key in self.defaults:
+            return params.get(key, self.defaults[key])
+        return params[key]
+
+    def member(self, params):
+        """(alpha, beta, noise, x0) de un dict de parámetros."""
+        return tuple(self._get(params, k) for k in self.param_keys + (self.state_key,))
+
+
+def simulate_linear_ode_ensemble(model, params_list, steps, seeds, method="loop"):
+    """
+    Simula una lista de dicts de parámetros como un ensemble.
+
+    Cada miembro puede tener su propio forcing_series y su propia
+    asimilación; method="loop" reproduce exactamente simulate_ode del caso.
+
+    Returns:
+        lista de dicts {model.series_key: serie, "forcing": forcing}
+    """
+    if not params_list:
+        return []
+    members = np.array([model.member(p) for p in params_list], dtype=np.float64)
+    forcings = [p["forcing_series"] for p in params_list]
+    forcing = np.array([np.asarray(f[:steps], dtype=np.float64) for f in forcings])
+    assim = [p.get("assimilation_series") for p in params_list]
+    has_assim = any(a is not None for a in assim)
+    series = integrate_linear(
+        members[:, 0], members[:, 1], members[:, 2], members[:, 3],
+        forcing, steps, seeds, form=model.form,
+        assimilation_series=[a if a is not None else [] for a in assim] if has_assim else None,
+        assimilation_strength=[p.get("assimilation_strength", 0.0) for p in params_list],
+        method=method,
+    )
+    return [{model.series_key: row.tolist(), "forcing": f}
+            for row, f in zip(series, forcings)]
+
+
+def simulate_linear_ode(model, params, steps, seed):
+    """Una corrida de la ODE del caso (interfaz simulate_ode(params, steps, seed))."""
+    return simulate_linear_ode_ensemble(model, [params], steps, [seed])[0]
+
+
+_SEIR_DEFAULTS = (("s0", 0.999), ("e0", 0.001), ("i0", 0.0), ("r0", 0.0))
+
+
+def simulate_seir_ensemble(params_list, steps, seeds):
+    """
+    Ensemble de simulate_seir (epidemiología): una lista de dicts con
+    beta, sigma, gamma, noise y opcionalmente s0/e0/i0/r0.
+
+    Returns:
+        lista de dicts {"incidence": serie, "forcing": forcing}
+    """
+    if not params_list:
+        return []
+    def col(key, default=None):
+        return [p[key] if default is None else p.get(key, default) for p in params_list]
+
+    forcings = [p["forcing_series"] for p in params_list]
+    forcing = np.array([np.asarray(f[:steps], dtype=np.float64) for f in forcings])
+    assim = [p.get("assimilation_series") for p in params_list]
+    has_assim = any(a is not None for a in assim)
+    initial = {k: col(k, d) for k, d in _SEIR_DEFAULTS}
+    series = integrate_seir(
+        col("beta"), col("sigma"), col("gamma"), col("noise"),
+        forcing, steps, seeds, **initial,
+        assimilation_series=[a if a is not None else [] for a in assim] if has_assim else None,
+        assimilation_strength=col("assimilation_strength", 0.0),
+    )
+    return [{"incidence": row.tolist(), "forcing": f}
+            for row, f in zip(series, forcings)]
@@ -0,0 +1,152 @@
+"""
+online_metrics.py — Métricas de grilla acumuladas durante la simulación.
+
+Symploké (cohesión interna vs. externa), dominancia y persistencia se
+calculaban al final sobre el historial (T, N, N) completo de la grilla,
+que había que guardar en memoria (o en un memmap). GridMoments es un
+observador del loop de pasos de abm_numpy: en cada paso recibe la grilla
+del lote (B, N, N), el forcing y la serie principal del paso, y actualiza
+con Welford, por celda,
+
+  - media y M2 de la celda, del promedio de sus vecinos, del forcing y de
+    la media regional de la grilla,
+  - los co-momentos celda×vecinos, celda×forcing y celda×regional,
+
+más un buffer circular de los últimos `window` valores de la serie
+principal. La memoria es O(B·N²), independiente de T, así que grillas
+grandes y horizontes largos no necesitan store_grid:
+
+    moments = GridMoments(window=config.persistence_window)
+    res = simulate_abm_numpy(params, steps, store_grid=False, observers=[moments])
+    internal, external = moments.internal_vs_external_cohesion()
+    dom = moments.dominance_share()
+
+Los resultados coinciden (salvo redondeo) con internal_vs_external_cohesion
+y dominance_share de hybrid_validator sobre el historial completo, y
+persistence() con window_variance de la serie principal.
+
+Un observador es cualquier objeto con update(grid, forcing, macro) y
+select(rows) (llamado cuando el lote descarta miembros).
+"""
+
+import math
+
+import numpy as np
+
+
+class GridMoments:
+    """
+    Momentos por celda de un lote de simulaciones, acumulados paso a paso.
+
+    Args:
+        window: pasos de la ventana de persistencia (window_variance)
+    """
+
+    def __init__(self, window=5):
+        self.window = window
+        self.count = 0
+        self._state = None
+
+    def _allocate(self, grid):
+        B = grid.shape[0]
+        cells = np.zeros_like(grid, dtype=np.float64)
+        scalars = np.zeros(B)
+        self._state = {
+            "mean_x": cells.copy(), "m2_x": cells.copy(),
+            "mean_nb": cells.copy(), "m2_nb": cells.copy(),
+            "c_x_nb": cells.copy(), "c_x_f": cells.copy(), "c_x_reg": cells.copy(),
+            "mean_f": scalars.copy(), "m2_f": scalars.copy(),
+            "mean_reg": scalars.copy(), "m2_reg": scalars.copy(),
+            "recent": np.zeros((self.window, B)),
+        }
+
+    def update(self, grid, forcing, macro):
+        """
+        Incorpora un paso: grid (B, N, N) tras la actualización, forcing (B,)
+        del paso y macro (B,) el valor de la serie principal.
+        """
+        from grid_metrics import neighbor_mean_cube
+
+        if self._state is None:
+            self._allocate(grid)
+        s = self._state
+        self.count += 1
+        k = self.count
+        x = np.asarray(grid, dtype=np.float64)
+        nb = neighbor_mean_cube(x)
+        f = np.asarray(forcing, dtype=np.float64)
+        reg = x.reshape(len(x), -1).mean(axis=1)
+
+        dx = x - s["mean_x"]
+        dnb = nb - s["mean_nb"]
+        df = f - s["mean_f"]
+        dreg = reg - s["mean_reg"]
+        s["mean_x"] += dx / k
+        s["mean_nb"] += dnb / k
+        s["mean_f"] += df / k
+        s["mean_reg"] += dreg / k
+
+        # Welford: M2 += δ_antes · δ_después; co-momento con la otra media ya actualizada
+        s["m2_x"] += dx * (x - s["mean_x"])
+        s["m2_nb"] += dnb * (nb - s["mean_nb"])
+        s["m2_f"] += df * (f - s["mean_f"])
+        s["m2_reg"] += dreg * (reg - s["mean_reg"])
+        s["c_x_nb"] += dx * (nb - s["mean_nb"])
+        s["c_x_f"] += dx * (f - s["mean_f"])[:, None, None]
+        s["c_x_reg"] += dx * (reg - s["mean_reg"])[:, None, None]
+
+        s["recent"][(k - 1) % self.window] = macro
+
+    def select(self, rows):
+        """Conserva solo las filas `rows` del lote."""
+        if self._state is None:
+            return
+        for name, value in self._state.items():
+            self._state[name] = value[:, rows] if name == "recent" else value[rows]
+
+    def _tol(self):
+        # std > 1e-15  ⇔  norma centrada > 1e-15·√T
+        return 1e-15 * math.sqrt(self.count)
+
+    def _correlations(self, co, m2_x, m2_ref):
+        norm_x = np.sqrt(m2_x)
+        norm_ref = np.sqrt(m2_ref)
+        tol = self._tol()
+        valid = (norm_x > tol) & (norm_ref > tol)
+        corr = np.zeros_like(co)
+        np.divide(co, norm_x * norm_ref, out=corr, where=valid)
+        return corr
+
+    def cell_variance(self):
+        """Varianza temporal de cada celda (B, N, N)."""
+        return self._state["m2_x"] / max(self.count, 1)
+
+    def internal_vs_external_cohesion(self, row=0):
+        """(interna, externa): correlación media celda-vecinos y celda-forcing."""
+        if self.count == 0:
+            return 0.0, 0.0
+        s = self._state
+        internal = self._correlations(s["c_x_nb"][row], s["m2_x"][row], s["m2_nb"][row])
+        external = self._correlations(s["c_x_f"][row], s["m2_x"][row], s["m2_f"][row])
+        return float(internal.mean()), float(external.mean())
+
+    def dominance_share(self, row=0):
+        """Proporción de la celda con mayor |correlación| con la media regional."""
+        if self.count == 0:
+            return 1.0
+        s = self._state
+        n = s["m2_x"].shape[-1]
+        if math.sqrt(s["m2_reg"][row] / self.count) < 1e-15:
+            return 1.0 / (n * n)
+        scores = np.abs(self._correlations(s["c_x_reg"][row], s["m2_x"][row], s["m2_reg"][row]))
+        total = scores.sum()
+        if total < 1e-15:
+            return 1.0 / (n * n)
+        return float(scores.max() / total)
+
+    def persistence(self, row=0):
+        """Varianza (poblacional) de los últimos `window` valores de la serie principal."""
+        if self.count == 0:
+            return 0.0
+        recent = self._state["recent"][:min(self.count, self.window), row]
+        return float(recent.var())
@@ -0,0 +1,323 @@
+"""
+orchestrator.py — Ejecución de todos los casos en paralelo, reanudable.
+
+Descubre cada NN_caso_*/src/validate.py (y opcionalmente archive/*), los
+ejecuta como subprocesos en un pool de workers con timeout por caso y
+registra el resultado de cada caso apenas termina. Al final escribe el
+agregado mega_run_results.json en la raíz del repo:
+
+    {timestamp, total, pass, fail, na, time_s,
+     details: {caso_xxx: {time_s, metrics: {synthetic: {...}, real: {...}}, rc}}}
+
+El estado por caso (hash de código + entradas, rc, métricas) se guarda en
+mega_run_state.json tras cada caso. Si la corrida se interrumpe, la
+siguiente salta los casos exitosos cuyo hash no cambió.
+
+Usage:
+    python common/orchestrator.py --workers 4 --timeout 1800
+    python common/orchestrator.py --archive --force
+    python common/orchestrator.py --preload
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+COMMON_DIR = os.path.join(REPO_ROOT, "common")
+RESULTS_FILE = "mega_run_results.json"
+STATE_FILE = "mega_run_state.json"
+# rc registrado cuando falla el orquestador (no el subproceso) en un caso
+ORCHESTRATOR_ERROR_RC = -2
+
+
+def discover_cases(root=REPO_ROOT, include_archive=False):
+    """Rutas de los directorios de caso con src/validate.py, ordenadas."""
+    patterns = [os.path.join(root, "[0-9][0-9]_caso_*", "src", "validate.py")]
+    if include_archive:
+        patterns.append(os.path.join(root, "archive", "[0-9][0-9]_caso_*", "src", "validate.py"))
+    cases = []
+    for pattern in patterns:
+        cases.extend(os.path.dirname(os.path.dirname(p)) for p in sorted(glob.glob(pattern)))
+    return cases
+
+
+def case_key(case_dir):
+    """'01_caso_clima' → 'caso_clima' (clave de details)."""
+    return re.sub(r"^\d+_", "", os.path.basename(case_dir))
+
+
+def _iter_files(directory, exclude_dirs=("__pycache__", "outputs")):
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if d not in exclude_dirs)
+        for name in sorted(filenames):
+            if not name.endswith((".pyc", ".tmp")):
+                yield os.path.join(dirpath, name)
+
+
+def case_hash(case_dir):
+    """
+    Hash del código del caso (src/), sus entradas cacheadas (data/) y el
+    código común. Si no cambia, el resultado previo del caso sigue vigente.
+    """
+    h = hashlib.sha256()
+    for base in (os.path.join(case_dir, "src"), os.path.join(case_dir, "data"), COMMON_DIR):
+        if not os.path.isdir(base):
+            continue
+        for path in _iter_files(base):
+            h.update(os.path.relpath(path, REPO_ROOT).encode())
+            with open(path, "rb") as fh:
+                h.update(hashlib.sha256(fh.read()).digest())
+    return h.hexdigest()
+
+
+def _phase_summary(phase):
+    """Resumen de una fase de metrics.json con las claves de mega_run_results."""
+    return {
+        "edi": phase.get("edi", {}).get("value", 0.0),
+        "corr": phase.get("correlations", {}).get("abm_obs"),
+        "rmse": phase.get("errors", {}).get("rmse_abm"),
+        "c1": phase.get("c1_convergence", False),
+        "c2": phase.get("c2_robustness", False),
+        "c3": phase.get("c3_replication", False),
+        "c4": phase.get("c4_validity", False),
+        "c5": phase.get("c5_uncertainty", False),
+        "emergence": phase.get("emergence", {}).get("pass", False),
+        "symploke": phase.get("symploke", {}).get("pass", False),
+        "non_locality": phase.get("non_locality", {}).get("pass", False),
+        "coupling": phase.get("coupling_check", False),
+        "overall": phase.get("overall_pass", False),
+        "gated": phase.get("gated_by_synthetic", False),
+    }
+
+
+def read_case_metrics(case_dir, since=None):
+    """
+    Resumen de outputs/metrics.json del caso, o None si no existe (o si es
+    anterior al instante `since`, es decir, de una corrida previa).
+    """
+    path = os.path.join(case_dir, "outputs", "metrics.json")
+    try:
+        if since is not None and os.path.getmtime(path) < since:
+            return None
+        with open(path) as fh:
+            results = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return {name: _phase_summary(phase)
+            for name, phase in results.get("phases", {}).items()}
+
+
+def run_case(case_dir, timeout=None, env=None):
+    """
+    Ejecuta src/validate.py del caso en un subproceso.
+
+    El metrics.json previo no se borra: si la corrida falla conserva las
+    últimas métricas buenas, y solo se leen si rc == 0 y el archivo es
+    posterior al inicio de esta corrida.
+
+    Returns:
+        dict {time_s, metrics, rc}; rc = -1 si se agotó el timeout
+    """
+    src = os.path.join(case_dir, "src")
+    t0 = time.time()
+    try:
+        proc = subprocess.run(
+            [sys.executable, "validate.py"], cwd=src, env=env, timeout=timeout,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        rc = proc.returncode
+        log = proc.stdout
+    except subprocess.TimeoutExpired as exc:
+        rc = -1
+        log = exc.stdout if isinstance(exc.stdout, str) else ""
+        log += f"\n[timeout tras {timeout} s]\n"
+    elapsed = round(time.time() - t0, 1)
+
+    os.makedirs(os.path.join(case_dir, "outputs"), exist_ok=True)
+    with open(os.path.join(case_dir, "outputs", "run.log"), "w") as fh:
+        fh.write(log)
+    return {
+        "time_s": elapsed,
+        "metrics": read_case_metrics(case_dir, since=t0) if rc == 0 else {},
+        "rc": rc,
+    }
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def _load_state(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def classify(entry):
+    """'pass' | 'fail' | 'na' de un caso según su fase real."""
+    if entry.get("rc") != 0 or not entry.get("metrics"):
+        return "na"
+    real = entry["metrics"].get("real") or {}
+    return "pass" if real.get("overall") else "fail"
+
+
+def aggregate(details, time_s):
+    """Estructura final de mega_run_results.json."""
+    counts = {"pass": 0, "fail": 0, "na": 0}
+    for entry in details.values():
+        counts[classify(entry)] += 1
+    return {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total": len(details),
+        "pass": counts["pass"],
+        "fail": counts["fail"],
+        "na": counts["na"],
+        "time_s": round(time_s, 1),
+        "details": details,
+    }
+
+
+def preload_datasets(root=REPO_ROOT, include_archive=False, log=print):
+    """
+    Migra y verifica en una pasada los datos cacheados de todos los casos
+    (ver dataset_store.preload_all). Devuelve el inventario.
+    """
+    from dataset_store import preload_all
+
+    inventory = preload_all(root, include_archive=include_archive)
+    errors = {path: meta["error"] for path, meta in inventory.items() if "error" in meta}
+    rows = sum(meta.get("rows", 0) for path, meta in inventory.items() if path not in errors)
+    log(f"  preload: {len(inventory) - len(errors)} datasets ({rows} filas), {len(errors)} con error")
+    for path, err in errors.items():
+        log(f"    {os.path.relpath(path, root)}: {err}")
+    return inventory
+
+
+def run_all(workers=None, timeout=None, include_archive=False, force=False,
+            root=REPO_ROOT, results_path=None, state_path=None, log=print,
+            preload=False):
+    """
+    Ejecuta todos los casos y escribe mega_run_results.json.
+
+    Args:
+        workers: casos en paralelo (default: CPUs disponibles)
+        timeout: segundos máximos por caso (None = sin límite)
+        include_archive: incluir archive/*
+        force: ignorar el estado previo y re-ejecutar todo
+        results_path / state_path: rutas de salida (default: raíz del repo)
+        preload: migrar/verificar antes los datos cacheados (preload_datasets)
+
+    Returns:
+        dict agregado (el mismo que se escribe en results_path)
+    """
+    results_path = results_path or os.path.join(root, RESULTS_FILE)
+    state_path = state_path or os.path.join(root, STATE_FILE)
+    if workers is None:
+        from parallel_grid import default_workers
+        workers = default_workers()
+
+    if preload:
+        # Antes de calcular los hashes: la migración agrega archivos a data/
+        preload_datasets(root, include_archive, log=log)
+
+    cases = discover_cases(root, include_archive)
+    state = {} if force else _load_state(state_path)
+    lock = threading.Lock()
+    t0 = time.time()
+
+    # Cada caso corre en su propio proceso; con varios en paralelo se limita
+    # el threading de BLAS y el pool de calibración para no sobresuscribir
+    # los núcleos.
+    env = dict(os.environ)
+    if workers > 1:
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                    "SIMULACION_CALIBRATION_WORKERS"):
+            env.setdefault(var, "1")
+
+    pending = []
+    for case_dir in cases:
+        key = case_key(case_dir)
+        digest = case_hash(case_dir)
+        prev = state.get(key)
+        if prev and prev.get("hash") == digest and prev.get("rc") == 0:
+            log(f"  {key}: sin cambios, se reutiliza el resultado previo")
+            continue
+        pending.append((case_dir, key))
+
+    def _job(case_dir, key):
+        entry = run_case(case_dir, timeout=timeout, env=env)
+        # Hash posterior a la corrida: incluye los datos que el caso descargó
+        entry["hash"] = case_hash(case_dir)
+        with lock:
+            state[key] = entry
+            _write_json(state_path, state)
+        return key, entry
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_job, *job): job[1] for job in pending}
+        for future in as_completed(futures):
+            try:
+                key, entry = future.result()
+            except Exception as exc:
+                # Un error del propio orquestador (p. ej. al escribir run.log)
+                # cuenta como fallo del caso, no aborta la corrida
+                key = futures[future]
+                entry = {"time_s": 0.0, "metrics": {}, "rc": ORCHESTRATOR_ERROR_RC,
+                         "error": f"{type(exc).__name__}: {exc}"}
+                with lock:
+                    state[key] = entry
+                    try:
+                        _write_json(state_path, state)
+                    except OSError:
+                        pass
+            log(f"  {key}: rc={entry['rc']} {entry['time_s']:.1f}s [{classify(entry)}]")
+
+    details = {}
+    for case_dir in cases:
+        key = case_key(case_dir)
+        if key in state:
+            details[key] = {k: state[key][k] for k in ("time_s", "metrics", "rc")}
+    summary = aggregate(details, time.time() - t0)
+    _write_json(results_path, summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta la validación de todos los casos.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="casos en paralelo (default: CPUs disponibles)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="segundos máximos por caso")
+    parser.add_argument("--archive", action="store_true",
+                        help="incluir los casos de archive/")
+    parser.add_argument("--force", action="store_true",
+                        help="re-ejecutar aunque el hash del caso no haya cambiado")
+    parser.add_argument("--preload", action="store_true",
+                        help="migrar y verificar los datos cacheados antes de ejecutar")
+    args = parser.parse_args(argv)
+
+    summary = run_all(workers=args.workers, timeout=args.timeout,
+                      include_archive=args.archive, force=args.force,
+                      preload=args.preload)
+    print(f"Total={summary['total']} pass={summary['pass']} fail={summary['fail']} "
+          f"na={summary['na']} time={summary['time_s']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+parallel_grid.py — Grid search paralelo con ProcessPoolExecutor.
+
+forcing_series y obs_train se publican una sola vez en memoria compartida
+(multiprocessing.shared_memory). Cada worker los adjunta en su initializer
+y reconstruye los parámetros base; las tareas solo transportan los combos
+del grid y devuelven un error por combo.
+
+Cada combo se simula con la misma semilla y la misma función de error que
+el camino secuencial, y los resultados se devuelven en el orden del grid,
+de modo que el ranking (top-5 de metrics.json) es bit-idéntico.
+
+parallel_early_abort_errors combina el pool con la simulación por tramos
+del caso (simulate_abm_chunks): cada worker mantiene su propio
+successive_halving.EarlyAbortEvaluator, que simula sus combos en lotes y
+aborta los que superan su k-ésimo mejor RMSE local. Ese umbral nunca es
+menor que el global, así que los k mejores del grid se calculan completos
+y el top-5 es el mismo que en el camino secuencial; los abortados
+reportan su cota inferior.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+_WORKER = {}
+
+
+def _publish(values):
+    """Copia una serie a un bloque de memoria compartida; retorna (shm, len)."""
+    arr = np.asarray(values, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 8))
+    np.ndarray(arr.shape, dtype=np.float64, buffer=shm.buf)[:] = arr
+    return shm, len(arr)
+
+
+def _attach(name, length):
+    """Lee una serie publicada con _publish como lista de floats."""
+    shm = shared_memory.SharedMemory(name=name)
+    values = np.ndarray((length,), dtype=np.float64, buffer=shm.buf).tolist()
+    shm.close()
+    return values
+
+
+def _init_worker(base_params, forcing_ref, obs_ref, steps, seed,
+                 simulate_abm_fn, params_fn, error_fn):
+    base = dict(base_params)
+    if forcing_ref is not None:
+        base["forcing_series"] = _attach(*forcing_ref)
+    _WORKER.update({
+        "base": base,
+        "obs": _attach(*obs_ref),
+        "steps": steps,
+        "seed": seed,
+        "simulate": simulate_abm_fn,
+        "params_fn": params_fn,
+        "error_fn": error_fn,
+    })
+
+
+def _init_early_abort_worker(base_params, forcing_ref, obs_ref, steps, seed,
+                             simulate_chunks_fn, start_fn, k):
+    from successive_halving import EarlyAbortEvaluator
+
+    base = dict(base_params)
+    if forcing_ref is not None:
+        base["forcing_series"] = _attach(*forcing_ref)
+    obs = _attach(*obs_ref)
+    start = start_fn(simulate_chunks_fn, base, steps, seed)
+    # El evaluador persiste entre las tareas del proceso: su umbral solo baja
+    _WORKER["evaluator"] = EarlyAbortEvaluator(start, obs, k=k)
+
+
+def _eval_chunk_early_abort(combos):
+    return _WORKER["evaluator"](combos).tolist()
+
+
+def _eval_chunk(combos):
+    w = _WORKER
+    errors = []
+    for combo in combos:
+        params = w["params_fn"](w["base"], *combo)
+        sim = w["simulate"](params, w["steps"], seed=w["seed"])
+        errors.append(w["error_fn"](sim, w["obs"]))
+        del sim
+    return errors
+
+
+def default_workers():
+    """Número de workers por defecto: CPUs disponibles para el proceso."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def parallel_grid_errors(obs_train, base_params, steps, simulate_abm_fn, combos,
+                         params_fn, error_fn, seed=2, n_workers=None,
+                         chunks_per_worker=4):
+    """
+    Evalúa error_fn(simulate_abm_fn(params_fn(base_params, *combo)), obs) para
+    cada combo del grid en un pool de procesos.
+
+    Args:
+        obs_train: serie observada de entrenamiento (se comparte, no se picklea)
+        base_params: dict base; su forcing_series se comparte
+        steps: pasos de cada simulación
+        simulate_abm_fn: simulate_abm(params, steps, seed) del caso
+        combos: lista de tuplas de parámetros (p.ej. (fs, mc, dmp))
+        params_fn: función (base_params, *combo) → params (a nivel de módulo)
+        error_fn: función (sim, obs_list) → float (a nivel de módulo)
+        seed: semilla de cada simulación
+        n_workers: procesos (default: CPUs disponibles)
+
+    Returns:
+        lista de errores en el mismo orden que combos
+    """
+    combos = list(combos)
+    if not combos:
+        return []
+    n_workers = n_workers or default_workers()
+    n_chunks = max(1, min(len(combos), n_workers * chunks_per_worker))
+    size = -(-len(combos) // n_chunks)
+    chunks = [combos[i:i + size] for i in range(0, len(combos), size)]
+
+    return _run_pool(base_params, obs_train, chunks, n_workers, _eval_chunk,
+                     _init_worker, (steps, seed, simulate_abm_fn, params_fn, error_fn))
+
+
+def parallel_early_abort_errors(obs_train, base_params, simulate_chunks_fn, combos,
+                                start_fn, seed=2, n_workers=None, k=10,
+                                chunks_per_worker=4):
+    """
+    Errores de calibración de cada combo con aborto temprano, en un pool.
+
+    Args:
+        obs_train, base_params, combos, seed, n_workers: como en
+            parallel_grid_errors
+        simulate_chunks_fn: simulate_abm_chunks del caso (a nivel de módulo)
+        start_fn: función (simulate_chunks_fn, base_params, steps, seed) →
+            start(param_sets) (ver hybrid_validator._chunked_start)
+        k: candidatos que cada worker calcula siempre completos
+
+    Returns:
+        lista de errores (cota inferior para los abortados) en el orden de combos
+    """
+    combos = list(combos)
+    if not combos:
+        return []
+    n_workers = n_workers or default_workers()
+    n_chunks = max(1, min(len(combos), n_workers * chunks_per_worker))
+    size = -(-len(combos) // n_chunks)
+    chunks = [combos[i:i + size] for i in range(0, len(combos), size)]
+    return _run_pool(base_params, obs_train, chunks, n_workers, _eval_chunk_early_abort,
+                     _init_early_abort_worker,
+                     (len(obs_train), seed, simulate_chunks_fn, start_fn, k))
+
+
+def _run_pool(base_params, obs_train, chunks, n_workers, task, initializer, extra_args):
+    """Publica forcing y obs, reparte chunks en el pool y concatena los errores."""
+    base = dict(base_params)
+    forcing = base.pop("forcing_series", None)
+    blocks = []
+    try:
+        forcing_ref = None
+        if forcing is not None:
+            shm_f, n_f = _publish(forcing)
+            blocks.append(shm_f)
+            forcing_ref = (shm_f.name, n_f)
+        shm_o, n_o = _publish(obs_train)
+        blocks.append(shm_o)
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=initializer,
+            initargs=(base, forcing_ref, (shm_o.name, n_o)) + tuple(extra_args),
+        ) as pool:
+            errors = []
+            for chunk_errors in pool.map(task, chunks):
+                errors.extend(chunk_errors)
+        return errors
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,111 @@
+"""
+resampling.py — Motor vectorizado de bootstrap y permutación.
+
+Las pruebas de metrics_enhanced (bootstrap del EDI, permutación de la
+emergencia) sorteaban índice a índice con random.Random y recalculaban el
+RMSE sobre listas. Aquí cada lote de remuestras es una matriz:
+
+  - bootstrap: índices (B, n), i.i.d. o por bloques circulares de largo
+    fijo (moving block bootstrap) para series autocorrelacionadas,
+  - permutación: máscara (P, n) de intercambio entre dos series, también
+    por bloques si se pide,
+
+y las estadísticas se reducen por fila. Todas salen de un único
+np.random.Generator del Resampler, así que varias pruebas encadenadas
+sobre el mismo objeto consumen un solo stream reproducible. Los lotes se
+parten en trozos de a lo sumo CHUNK_ELEMS elementos, de modo que 10k+
+remuestras no crecen en memoria con B.
+
+    rs = Resampler(seed=42)
+    means = rs.bootstrap_means(np.vstack([sq_err_a, sq_err_b]), 10000, block=8)
+    keep_a, keep_b = rs.swap_means(sq_err_a, sq_err_b, 5000)
+"""
+
+import numpy as np
+
+
+# Elementos (remuestras × n) por trozo: ~32 MB en float64
+CHUNK_ELEMS = 1 << 22
+
+
+class Resampler:
+    """
+    Fuente de matrices de remuestreo sobre un único Generator.
+
+    Args:
+        seed: semilla del Generator (ignorada si se pasa rng)
+        rng: np.random.Generator a reusar
+        chunk_elems: tamaño máximo (remuestras × n) de cada trozo
+    """
+
+    def __init__(self, seed=42, rng=None, chunk_elems=CHUNK_ELEMS):
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.chunk_elems = chunk_elems
+
+    def _chunks(self, total, n):
+        size = max(1, self.chunk_elems // max(n, 1))
+        for start in range(0, total, size):
+            yield min(size, total - start)
+
+    def bootstrap_indices(self, n, n_boot, block=1):
+        """
+        Índices (n_boot, n) de remuestras con reposición. Con block > 1 se
+        concatenan bloques circulares de largo block con inicio uniforme.
+        """
+        if block <= 1:
+            return self.rng.integers(0, n, size=(n_boot, n))
+        block = min(block, n)
+        n_blocks = -(-n // block)
+        starts = self.rng.integers(0, n, size=(n_boot, n_blocks, 1))
+        idx = (starts + np.arange(block)) % n
+        return idx.reshape(n_boot, n_blocks * block)[:, :n]
+
+    def swap_mask(self, n, n_perm, block=1):
+        """
+        Máscara booleana (n_perm, n): True conserva el par original, False lo
+        intercambia (probabilidad 1/2). Con block > 1 se sortea por bloques
+        contiguos.
+        """
+        if block <= 1:
+            return self.rng.random((n_perm, n)) < 0.5
+        n_blocks = -(-n // block)
+        keep = self.rng.random((n_perm, n_blocks)) < 0.5
+        return np.repeat(keep, block, axis=1)[:, :n]
+
+    def bootstrap_means(self, values, n_boot, block=1):
+        """
+        Media de cada fila de values (k, n) bajo n_boot remuestras; las k
+        filas comparten los índices de cada remuestra.
+
+        Returns:
+            ndarray (n_boot, k)
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        n = values.shape[1]
+        out = np.empty((n_boot, values.shape[0]))
+        row = 0
+        for size in self._chunks(n_boot, n):
+            idx = self.bootstrap_indices(n, size, block)
+            out[row:row + size] = values[:, idx].mean(axis=2).T
+            row += size
+        return out
+
+    def swap_means(self, a, b, n_perm, block=1):
+        """
+        Medias de a y b (n,) tras intercambiar al azar sus elementos par a par.
+
+        Returns:
+            (means_a, means_b), cada uno ndarray (n_perm,)
+        """
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        n = a.shape[0]
+        means_a = np.empty(n_perm)
+        means_b = np.empty(n_perm)
+        row = 0
+        for size in self._chunks(n_perm, n):
+            keep = self.swap_mask(n, size, block)
+            means_a[row:row + size] = np.where(keep, a, b).mean(axis=1)
+            means_b[row:row + size] = np.where(keep, b, a).mean(axis=1)
+            row += size
+        return means_a, means_b
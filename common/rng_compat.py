@@ -0,0 +1,198 @@
+"""
+rng_compat.py — Compatibilidad de flujo aleatorio con los ABMs legacy.
+
+Los ABMs originales de cada caso hacen random.seed(seed) y luego llaman
+random.uniform(-noise, noise) celda por celda. Tanto el módulo `random` de
+Python como np.random.RandomState usan Mersenne Twister MT19937 y el mismo
+double de 53 bits (genrand_res53), así que basta transferir el estado
+(random.getstate → RandomState.set_state) para generar en bloque,
+vectorizado, exactamente la misma secuencia de draws:
+
+    random.seed(7); [random.uniform(-a, a) for _ in range(k)]
+    ==
+    LegacyUniformStream(7).uniform(-a, a, k)
+
+Los draws se consumen en orden C, igual que los loops (i, j) legacy.
+"""
+
+import random
+
+import numpy as np
+
+
+def _state_to_numpy(py_state):
+    """Estado de random.getstate() → estado de RandomState.set_state()."""
+    version, internal, _gauss = py_state
+    key = np.array(internal[:624], dtype=np.uint32)
+    pos = internal[624]
+    return ("MT19937", key, pos)
+
+
+class LegacyUniformStream:
+    """
+    Flujo de uniformes idéntico al de random.seed(seed) + random.uniform().
+
+    Args:
+        seed: semilla tal como se pasaba a random.seed (None → no determinista)
+        source: alternativa a seed, una instancia random.Random (o el módulo
+                random) cuyo estado actual se continúa
+    """
+    def __init__(self, seed=None, source=None):
+        if source is None:
+            source = random.Random(seed)
+        self._rs = np.random.RandomState()
+        self._rs.set_state(_state_to_numpy(source.getstate()))
+
+    def random(self, size=None):
+        """Equivalente a `size` llamadas sucesivas a random.random()."""
+        return self._rs.random_sample(size)
+
+    def uniform(self, low, high, size=None):
+        """Equivalente a `size` llamadas sucesivas a random.uniform(low, high)."""
+        # random.uniform(a, b) = a + (b - a) * random()
+        return low + (high - low) * self._rs.random_sample(size)
+
+    def getstate(self):
+        """Estado en formato random.setstate(), para continuar el flujo en Python."""
+        _name, key, pos = self._rs.get_state()[:3]
+        return (3, tuple(int(k) for k in key) + (int(pos),), None)
+
+
+# --- MT19937 vectorizado sobre varias semillas --------------------------------
+#
+# Crear un LegacyUniformStream cuesta ~0.3 ms (random.Random + RandomState),
+# lo que domina en ensembles de miles de miembros cortos. Para semillas
+# enteras se siembra y avanza el MT19937 de todos los miembros a la vez,
+# con la misma aritmética uint32 que random.seed (init_by_array) y
+# genrand_res53, así que las filas son idénticas a las de cada stream.
+
+_N, _M = 624, 397
+_MATRIX_A = np.uint32(0x9908B0DF)
+_UPPER = np.uint32(0x80000000)
+_LOWER = np.uint32(0x7FFFFFFF)
+
+# Sembrar en bloque tiene un costo fijo (~6 ms, el loop de init_by_array);
+# por debajo de este número de semillas conviene un stream por fila.
+_VECTOR_MIN_SEEDS = 32
+
+
+def _seed_key(seed):
+    """Clave de init_by_array que usa random.seed(int): palabras de 32 bits de |seed|."""
+    n = abs(seed)
+    key = []
+    while n:
+        key.append(n & 0xFFFFFFFF)
+        n >>= 32
+    return key or [0]
+
+
+def _init_genrand(s):
+    mt = [0] * _N
+    mt[0] = s
+    for i in range(1, _N):
+        mt[i] = (1812433253 * (mt[i - 1] ^ (mt[i - 1] >> 30)) + i) & 0xFFFFFFFF
+    return mt
+
+
+_GENRAND_BASE = np.array(_init_genrand(19650218), dtype=np.uint32)
+
+
+def _init_by_array(keys):
+    """init_by_array de MT19937 para claves (B, L) de igual longitud → estados (B, 624)."""
+    keys = np.asarray(keys, dtype=np.uint32)
+    B, L = keys.shape
+    mt = np.tile(_GENRAND_BASE, (B, 1))
+    i, j = 1, 0
+    with np.errstate(over="ignore"):
+        for _ in range(max(_N, L)):
+            prev = mt[:, i - 1]
+            mt[:, i] = ((mt[:, i] ^ ((prev ^ (prev >> np.uint32(30))) * np.uint32(1664525)))
+                        + keys[:, j] + np.uint32(j))
+            i += 1
+            j += 1
+            if i >= _N:
+                mt[:, 0] = mt[:, _N - 1]
+                i = 1
+            if j >= L:
+                j = 0
+        for _ in range(_N - 1):
+            prev = mt[:, i - 1]
+            mt[:, i] = ((mt[:, i] ^ ((prev ^ (prev >> np.uint32(30))) * np.uint32(1566083941)))
+                        - np.uint32(i))
+            i += 1
+            if i >= _N:
+                mt[:, 0] = mt[:, _N - 1]
+                i = 1
+    mt[:, 0] = _UPPER
+    return mt
+
+
+def _twist(mt):
+    """Regenera in-place los 624 words de cada fila (orden secuencial de MT19937)."""
+    def mix(dst, cur, nxt, far):
+        y = (mt[:, cur] & _UPPER) | (mt[:, nxt] & _LOWER)
+        mt[:, dst] = mt[:, far] ^ (y >> np.uint32(1)) ^ ((y & np.uint32(1)) * _MATRIX_A)
+
+    k = _N - _M
+    # mt[i + M] aún es el valor viejo para i < N - M; luego se usa el nuevo
+    # mt[i + M - N], que para cada tramo ya fue recalculado en el anterior.
+    mix(slice(0, k), slice(0, k), slice(1, k + 1), slice(_M, _N))
+    mix(slice(k, 2 * k), slice(k, 2 * k), slice(k + 1, 2 * k + 1), slice(0, k))
+    mix(slice(2 * k, _N - 1), slice(2 * k, _N - 1), slice(2 * k + 1, _N), slice(k, _N - 1 - k))
+    y = (mt[:, _N - 1] & _UPPER) | (mt[:, 0] & _LOWER)
+    mt[:, _N - 1] = mt[:, _M - 1] ^ (y >> np.uint32(1)) ^ ((y & np.uint32(1)) * _MATRIX_A)
+
+
+def _temper(y):
+    y = y ^ (y >> np.uint32(11))
+    y = y ^ ((y << np.uint32(7)) & np.uint32(0x9D2C5680))
+    y = y ^ ((y << np.uint32(15)) & np.uint32(0xEFC60000))
+    return y ^ (y >> np.uint32(18))
+
+
+def _random_rows(keys, size):
+    """(B, size) doubles genrand_res53 para claves de igual longitud."""
+    mt = _init_by_array(keys)
+    words = np.empty((len(mt), -(-2 * size // _N) * _N), dtype=np.uint32)
+    for block in range(words.shape[1] // _N):
+        _twist(mt)
+        words[:, block * _N:(block + 1) * _N] = _temper(mt)
+    a = (words[:, 0:2 * size:2] >> np.uint32(5)).astype(np.float64)
+    b = (words[:, 1:2 * size:2] >> np.uint32(6)).astype(np.float64)
+    return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0)
+
+
+def legacy_uniform_rows(seeds, low, high, size):
+    """
+    Fila b = random.seed(seeds[b]) + `size` llamadas a
+    random.uniform(low[b], high[b]), para todas las semillas a la vez.
+
+    Args:
+        seeds: secuencia de semillas (enteros → camino vectorizado si hay
+               al menos _VECTOR_MIN_SEEDS; el resto, un LegacyUniformStream
+               por fila)
+        low, high: escalares o arrays (B,)
+        size: draws por fila
+
+    Returns:
+        ndarray (B, size)
+    """
+    B = len(seeds)
+    low = np.broadcast_to(np.asarray(low, dtype=np.float64), (B,))
+    high = np.broadcast_to(np.asarray(high, dtype=np.float64), (B,))
+    out = np.empty((B, size))
+    groups = {}
+    for b, seed in enumerate(seeds):
+        if isinstance(seed, (int, np.integer)) and not isinstance(seed, bool):
+            key = _seed_key(int(seed))
+            groups.setdefault(len(key), []).append((b, key))
+        else:
+            out[b] = LegacyUniformStream(seed).random(size)
+    for members in groups.values():
+        rows = [b for b, _ in members]
+        if len(rows) >= _VECTOR_MIN_SEEDS:
+            out[rows] = _random_rows([key for _, key in members], size)
+        else:
+            for b in rows:
+                out[b] = LegacyUniformStream(int(seeds[b])).random(size)
+    return low[:, None] + (high - low)[:, None] * out
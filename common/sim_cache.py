@@ -0,0 +1,262 @@
+"""
+sim_cache.py — Caché de resultados de simulación direccionada por contenido.
+
+Las mismas corridas (params, steps, seed) se repiten dentro de una
+validación (fases sintéticas repetidas, criterios C2-C5) y entre
+ejecuciones. Este módulo memoiza simulate_abm / simulate_ode; en
+run_full_validation guarda además el resultado de calibrate_abm (mejores
+parámetros, error y top-5), así que re-validar sin cambios no vuelve a
+calibrar. Es opt-in: se activa con CaseConfig(sim_cache_dir=...) o
+$SIMULACION_SIM_CACHE.
+
+  - clave: SHA-256 de los parámetros (las series como forcing_series entran
+    por el digest de sus bytes float64), steps, seed y una versión de
+    caso/motor (digest del código fuente de los simuladores y del motor)
+  - nivel en memoria: LRU de resultados decodificados
+  - nivel en disco: un .npz comprimido por corrida, con expulsión LRU por
+    tamaño total (la fecha de modificación marca el último uso)
+
+    cache = SimulationCache(".sim_cache", version=source_digest(simulate_abm))
+    simulate_abm = cache.wrap(simulate_abm, "abm")
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Versión del formato de almacenamiento; se incluye en cada clave.
+ENGINE_VERSION = "1"
+
+# Módulos del motor común cuyo código también versiona la caché.
+_ENGINE_FILES = ("abm_numpy.py", "grid_history.py", "ode_ensemble.py", "rng_compat.py")
+
+# Claves que solo cambian cómo se almacena el resultado, no la dinámica
+_STORAGE_KEYS = ("_grid_dtype", "_grid_memmap")
+
+
+def source_digest(*sources):
+    """
+    Digest del código fuente de funciones/módulos/rutas más el motor común.
+    Cambiar cualquiera de esos archivos invalida las entradas previas.
+    """
+    h = hashlib.sha256(ENGINE_VERSION.encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = []
+    for src in sources:
+        if src is None:
+            continue
+        paths.append(src if isinstance(src, str) else inspect.getsourcefile(src))
+    paths.extend(os.path.join(here, name) for name in _ENGINE_FILES)
+    for path in paths:
+        with open(path, "rb") as fh:
+            h.update(hashlib.sha256(fh.read()).digest())
+    return h.hexdigest()[:16]
+
+
+def _qualified_name(fn):
+    return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+def _update_value(h, value):
+    """Alimenta el hash con una representación canónica de un valor de params."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        try:
+            arr = np.asarray(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            h.update(b"seq")
+            for v in value:
+                _update_value(h, v)
+            return
+        h.update(b"arr" + str(arr.shape).encode())
+        h.update(arr.tobytes())
+    elif isinstance(value, dict):
+        h.update(b"dict")
+        for k in sorted(value):
+            h.update(repr(k).encode())
+            _update_value(h, value[k])
+    else:
+        h.update(repr(value).encode())
+
+
+def cache_key(params, steps, seed, version="", name=""):
+    """
+    Clave SHA-256 de una corrida del simulador `name`.
+    El flag _store_grid forma parte de ella.
+    """
+    h = hashlib.sha256()
+    h.update(f"{version}|{name}|{steps}|{seed}|".encode())
+    h.update(b"grid" if params.get("_store_grid", True) else b"nogrid")
+    for k in sorted(params):
+        if k in _STORAGE_KEYS or k == "_store_grid":
+            continue
+        h.update(k.encode() + b"=")
+        _update_value(h, params[k])
+    return h.hexdigest()
+
+
+def _encode(result):
+    """dict de resultado → (arrays, meta) para np.savez_compressed."""
+    from grid_history import GridHistory
+
+    arrays, meta = {}, {}
+    for k, v in result.items():
+        if v is None:
+            meta[k] = "none"
+        elif isinstance(v, GridHistory):
+            arrays[k] = np.asarray(v)
+            meta[k] = "grid"
+        elif isinstance(v, np.ndarray):
+            arrays[k] = v
+            meta[k] = "array"
+        else:
+            arrays[k] = np.asarray(v, dtype=np.float64)
+            meta[k] = "list"
+    return arrays, meta
+
+
+def _decode(npz):
+    meta = json.loads(str(npz["__meta__"]))
+    result = {}
+    for k, kind in meta.items():
+        if kind == "none":
+            result[k] = None
+        elif kind == "grid":
+            from grid_history import GridHistory
+            result[k] = GridHistory.from_array(npz[k])
+        elif kind == "array":
+            result[k] = npz[k]
+        else:
+            result[k] = npz[k].tolist()
+    return result
+
+
+class SimulationCache:
+    """
+    Caché de dos niveles (memoria LRU + .npz comprimidos en disco).
+
+    Args:
+        directory: carpeta de la caché en disco (None → solo memoria)
+        version: versión de caso/motor (ver source_digest)
+        max_bytes: tamaño máximo de la carpeta; se expulsan las menos usadas
+        max_memory_items: resultados retenidos en memoria
+    """
+    def __init__(self, directory=None, version="", max_bytes=512 * 2 ** 20,
+                 max_memory_items=256):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, params, steps, seed, name=""):
+        return cache_key(params, steps, seed, self.version, name)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Resultado en caché o None."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+        if self.directory:
+            path = self._path(key)
+            try:
+                with np.load(path, allow_pickle=False) as npz:
+                    result = _decode(npz)
+            except (OSError, ValueError, KeyError):
+                result = None
+            if result is not None:
+                os.utime(path)
+                self._remember(key, result)
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        """Guarda un resultado en memoria y, si hay carpeta, en disco."""
+        self._remember(key, result)
+        if not self.directory:
+            return
+        arrays, meta = _encode(result)
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.savez_compressed(fh, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            st = os.stat(os.path.join(self.directory, name))
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self):
+        """Vacía ambos niveles."""
+        self._memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def wrap(self, simulate_fn, name=None):
+        """
+        simulate(params, steps, seed) memoizado. `name` separa simuladores
+        que comparten caché (default: módulo.nombre de la función).
+        """
+        name = name or _qualified_name(simulate_fn)
+
+        def cached_simulate(params, steps, seed=2):
+            key = self.key(params, steps, seed, name)
+            result = self.get(key)
+            if result is None:
+                result = simulate_fn(params, steps, seed)
+                self.put(key, result)
+            return result
+        return cached_simulate
+
+    def wrap_ensemble(self, ensemble_fn, name):
+        """
+        ensemble(params_list, steps, seeds) memoizado; simula solo los
+        faltantes. `name` debe ser el del simulate individual equivalente,
+        para compartir entradas con él.
+        """
+        def cached_ensemble(params_list, steps, seeds):
+            keys = [self.key(p, steps, s, name) for p, s in zip(params_list, seeds)]
+            results = [self.get(k) for k in keys]
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                fresh = ensemble_fn([params_list[i] for i in missing], steps,
+                                    [seeds[i] for i in missing])
+                for i, r in zip(missing, fresh):
+                    self.put(keys[i], r)
+                    results[i] = r
+            return results
+        return cached_ensemble
@@ -0,0 +1,110 @@
+"""
+sim_scheduler.py — Planificador de corridas ABM para los criterios C2-C5.
+
+Tras la calibración, evaluate_phase y los criterios C2-C5 piden ~17
+simulaciones completas, varias de ellas idénticas (la base de C2, la
+primera corrida de C3 y la base de C4 son la misma corrida que `abm`).
+El planificador:
+
+  1. recolecta todas las corridas (params, seed) que se van a necesitar,
+  2. descarta duplicados por huella de contenido de (params, seed),
+  3. las ejecuta juntas como un único ensemble (simulate_abm_ensemble del
+     caso) o, si el caso no lo provee, una por una,
+  4. sirve los resultados desde caché a través de la misma interfaz
+     simulate_abm(params, steps, seed), de modo que los criterios no cambian.
+
+    scheduler = SimulationScheduler(simulate_abm, steps, ensemble_fn)
+    scheduler.request(eval_params, 2, store_grid=True)
+    scheduler.request(p_alt, 8)
+    scheduler.run()
+    evaluate_c4(..., scheduler.simulate, ...)   # sin re-simular
+"""
+
+import numpy as np
+
+
+def _freeze(value):
+    """Versión hasheable y exacta de un valor de params."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Claves que solo cambian cómo se almacena el resultado, no la dinámica
+_STORAGE_KEYS = ("_store_grid", "_grid_dtype", "_grid_memmap")
+
+
+def run_key(params, seed):
+    """Huella de una corrida: todos los parámetros que afectan la dinámica + semilla."""
+    dynamic = {k: v for k, v in params.items() if k not in _STORAGE_KEYS}
+    return (_freeze(dynamic), seed)
+
+
+class SimulationScheduler:
+    """
+    Recolecta, deduplica y ejecuta en lote corridas de un simulate_abm.
+
+    Args:
+        simulate_abm_fn: simulate_abm(params, steps, seed) del caso
+        steps: pasos de todas las corridas
+        ensemble_fn: opcional, ensemble(params_list, steps, seeds) → lista de
+                     resultados, idénticos a los de simulate_abm_fn
+    """
+    def __init__(self, simulate_abm_fn, steps, ensemble_fn=None):
+        self.simulate_abm_fn = simulate_abm_fn
+        self.steps = steps
+        self.ensemble_fn = ensemble_fn
+        self._pending = {}
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, params, seed, store_grid=False):
+        """Registra una corrida; si ya está pedida o simulada no se repite."""
+        key = run_key(params, seed)
+        cached = self._cache.get(key)
+        if cached is not None and (cached.get("grid") is not None or not store_grid):
+            return key
+        if key in self._pending:
+            p, _ = self._pending[key]
+            p["_store_grid"] = p["_store_grid"] or store_grid
+        else:
+            p = dict(params)
+            p["_store_grid"] = store_grid
+            self._pending[key] = (p, seed)
+        return key
+
+    def run(self):
+        """Simula todas las corridas pendientes (como ensemble si es posible)."""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        params_list = [self._pending[k][0] for k in keys]
+        seeds = [self._pending[k][1] for k in keys]
+        self._pending.clear()
+        if self.ensemble_fn is not None:
+            results = self.ensemble_fn(params_list, self.steps, seeds)
+        else:
+            results = [self.simulate_abm_fn(p, self.steps, seed=s)
+                       for p, s in zip(params_list, seeds)]
+        self.misses += len(keys)
+        self._cache.update(zip(keys, results))
+
+    def simulate(self, params, steps, seed=2):
+        """
+        Misma interfaz que simulate_abm; responde desde caché cuando puede.
+        Un resultado en caché trae grid solo si alguien lo pidió en request().
+        """
+        if steps != self.steps:
+            return self.simulate_abm_fn(params, steps, seed=seed)
+        key = run_key(params, seed)
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+        self.request(params, seed, store_grid=params.get("_store_grid", True))
+        self.run()
+        return self._cache[key]
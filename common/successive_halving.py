@@ -0,0 +1,209 @@
+"""
+successive_halving.py — Calibración que trunca simulaciones sin chance.
+
+Cada candidato del grid de calibrate_abm corría los val_start pasos
+completos aunque su RMSE parcial ya superara holgadamente al mejor. Con un
+simulador que entrega la serie macro por tramos (abm_numpy.iter_kernel_ensemble,
+expuesto por cada caso como simulate_abm_chunks) se acumula el error
+cuadrático paso a paso y:
+
+  - aborto temprano (exacto): sqrt(SSE parcial / n) es una cota inferior
+    del RMSE final; en cuanto supera el k-ésimo mejor RMSE completado, el
+    candidato se descarta. Los k mejores (y su orden) son los mismos que
+    con el grid completo; los abortados reportan su cota.
+  - successive halving (aproximado): todos los candidatos se simulan
+    sobre un prefijo corto de la ventana, sigue el mejor 1/eta, y así hasta
+    la ventana completa. Los eliminados reportan RMSE = inf.
+
+Los candidatos se simulan en lotes (B, N, N) y los descartados dejan de
+simularse dentro del lote.
+
+    evaluate = EarlyAbortEvaluator(start, obs_train, k=10)
+    errors = evaluate(param_sets)
+
+donde start(param_sets) devuelve el generador por tramos de esos candidatos.
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+
+class _Lot:
+    """Un lote de candidatos que avanza por tramos (ver iter_kernel_ensemble)."""
+    def __init__(self, start, param_sets, n_obs):
+        self.gen = start(param_sets)
+        self.pred = np.empty((len(param_sets), n_obs))
+        self.members = np.arange(len(param_sets))
+        self.t = 0
+        self.done = len(param_sets) == 0
+        self._keep = None
+
+    def step(self):
+        """Avanza un tramo; devuelve (t0, t1) del tramo o None si terminó."""
+        if self.done:
+            return None
+        try:
+            members, block = self.gen.send(self._keep)
+        except StopIteration:
+            self.done = True
+            return None
+        self._keep = None
+        t0 = self.t
+        self.t += block.shape[1]
+        self.members = members
+        self.pred[members, t0:self.t] = block
+        return t0, self.t
+
+    def keep(self, members):
+        """Conserva solo `members` (índices del lote) desde el próximo tramo."""
+        self.members = members
+        if len(members) == 0:
+            self.done = True
+            self.gen.close()
+        else:
+            self._keep = members
+
+    def close(self):
+        self.gen.close()
+
+
+def _rmse(pred, obs):
+    """Mismo cálculo que hybrid_validator._calibration_error."""
+    return float(np.sqrt(np.mean((pred - obs) ** 2)))
+
+
+class EarlyAbortEvaluator:
+    """
+    RMSE de calibración por lotes con aborto temprano.
+
+    Args:
+        start: función(param_sets) → generador por tramos de esos candidatos
+               sobre len(obs) pasos
+        obs: serie observada de entrenamiento
+        k: los k mejores candidatos se calculan siempre completos
+        lot_size: candidatos simulados juntos
+
+    El estado (los k mejores errores completados) persiste entre llamadas,
+    así que sucesivas llamadas (rondas del screening) podan cada vez más.
+    """
+    def __init__(self, start, obs, k=10, lot_size=256):
+        self.start = start
+        self.obs = np.asarray(obs, dtype=np.float64)
+        self.k = k
+        self.lot_size = lot_size
+        self._best = []          # max-heap (negado) de los k mejores errores
+        self.simulated_steps = 0
+        self.aborted = 0
+
+    @property
+    def threshold(self):
+        """k-ésimo mejor RMSE completado (inf hasta tener k)."""
+        return -self._best[0] if len(self._best) >= self.k else math.inf
+
+    def _record(self, err):
+        if len(self._best) < self.k:
+            heapq.heappush(self._best, -err)
+        elif err < -self._best[0]:
+            heapq.heapreplace(self._best, -err)
+
+    def __call__(self, param_sets, threshold=None):
+        """
+        Errores de cada candidato (cota inferior para los abortados).
+
+        threshold: cota fija de aborto en vez del k-ésimo mejor (p. ej. el
+        mejor error vigente durante el refinamiento).
+        """
+        param_sets = list(param_sets)
+        n_obs = len(self.obs)
+        errors = np.empty(len(param_sets))
+        for a in range(0, len(param_sets), self.lot_size):
+            lot = _Lot(self.start, param_sets[a:a + self.lot_size], n_obs)
+            sse = np.zeros(len(lot.members))
+            while True:
+                span = lot.step()
+                if span is None:
+                    break
+                t0, t1 = span
+                m = lot.members
+                self.simulated_steps += len(m) * (t1 - t0)
+                sse[m] += np.sum((lot.pred[m, t0:t1] - self.obs[t0:t1]) ** 2, axis=1)
+                if t1 >= n_obs:
+                    break
+                bound = np.sqrt(sse[m] / n_obs)
+                limit = self.threshold if threshold is None else threshold
+                out = bound > limit
+                if out.any():
+                    errors[a + m[out]] = bound[out]
+                    self.aborted += int(out.sum())
+                    lot.keep(m[~out])
+            for i in lot.members:
+                err = _rmse(lot.pred[i], self.obs)
+                errors[a + i] = err
+                self._record(err)
+            lot.close()
+        return errors
+
+
+def successive_halving_errors(start, obs, param_sets, eta=3, min_horizon=None,
+                              keep_min=10, lot_size=256):
+    """
+    RMSE de calibración por successive halving.
+
+    Args:
+        start, obs, lot_size: como en EarlyAbortEvaluator
+        param_sets: candidatos
+        eta: en cada escalón sigue 1/eta de los candidatos y el horizonte
+             se multiplica por eta
+        min_horizon: pasos del primer escalón (default: n/eta² o 8)
+        keep_min: mínimo de candidatos que llegan a la ventana completa
+
+    Returns:
+        (errors, simulated_steps); errors = inf para los eliminados
+    """
+    obs = np.asarray(obs, dtype=np.float64)
+    n_obs = len(obs)
+    if min_horizon is None:
+        min_horizon = max(8, n_obs // (eta * eta))
+    horizons = []
+    h = n_obs
+    while h > min_horizon:
+        horizons.append(h)
+        h = int(math.ceil(h / eta))
+    horizons.append(max(1, min(h, n_obs)))
+    horizons = sorted(set(horizons))
+
+    param_sets = list(param_sets)
+    lots = [(a, _Lot(start, param_sets[a:a + lot_size], n_obs))
+            for a in range(0, len(param_sets), lot_size)]
+    errors = np.full(len(param_sets), math.inf)
+    simulated = 0
+
+    for h in horizons:
+        alive, partial = [], []
+        for a, lot in lots:
+            while lot.t < h:
+                span = lot.step()
+                if span is None:
+                    break
+                simulated += len(lot.members) * (span[1] - span[0])
+            for i in lot.members:
+                alive.append((a, lot, i))
+                partial.append(_rmse(lot.pred[i, :h], obs[:h]))
+        if h >= n_obs:
+            for (a, _, i), err in zip(alive, partial):
+                errors[a + i] = err
+            break
+        n_keep = max(keep_min, int(math.ceil(len(alive) / eta)))
+        kept = {}
+        for j in np.argsort(partial, kind="stable")[:n_keep]:
+            a, _, i = alive[j]
+            kept.setdefault(a, []).append(i)
+        for a, lot in lots:
+            if not lot.done:
+                lot.keep(np.asarray(sorted(kept.get(a, [])), dtype=np.intp))
+
+    for _, lot in lots:
+        lot.close()
+    return errors, simulated
@@ -0,0 +1,116 @@
+"""
+surrogate_screen.py — Pre-selección del grid de calibración con un emulador.
+
+La mayoría de los ~6400 puntos del grid forcing_scale × macro_coupling ×
+damping de calibrate_abm están lejos del óptimo, pero cada uno cuesta una
+simulación completa. Con screening:
+
+  1. se simula una muestra que llena el espacio (hipercubo latino o Sobol)
+     de puntos del propio grid,
+  2. se ajusta un emulador barato del log-RMSE de calibración (interpolación
+     RBF de placa delgada con suavizado) sobre las coordenadas de índice de
+     cada eje (los ejes son aproximadamente logarítmicos),
+  3. en rondas sucesivas se simulan los puntos aún no evaluados que el
+     emulador predice mejores, reajustándolo con cada ronda.
+
+Solo se devuelven puntos simulados, así que el ranking (err, fs, mc, dmp)
+del que salen best_err y top_5 tiene el mismo formato y significado que
+con el grid completo.
+
+    combos, errors = screen_grid(axes, evaluate, budget=400, seed=2)
+"""
+
+import numpy as np
+
+try:
+    from scipy.interpolate import RBFInterpolator
+    from scipy.stats import qmc
+    SURROGATE_AVAILABLE = True
+except ImportError:
+    SURROGATE_AVAILABLE = False
+
+
+# Fracción del presupuesto que va a la muestra inicial; el resto se reparte
+# en rondas guiadas por el emulador.
+INITIAL_FRACTION = 0.5
+ROUNDS = 4
+
+
+def default_budget(n_grid):
+    """Simulaciones del screening por defecto: 1/16 del grid (mínimo 64)."""
+    return min(n_grid, max(64, n_grid // 16))
+
+
+def _unit_samples(n, d, method, seed):
+    if method == "sobol":
+        m = int(np.ceil(np.log2(max(n, 2))))
+        return qmc.Sobol(d, scramble=True, seed=seed).random_base2(m)[:n]
+    return qmc.LatinHypercube(d, seed=seed).random(n)
+
+
+def _fit_predict(X, y, X_new, kernel):
+    """Predicción del emulador RBF ajustado en (X, y) sobre X_new."""
+    rbf = RBFInterpolator(X, y, kernel=kernel, degree=1, smoothing=1e-3 * len(y))
+    return rbf(X_new)
+
+
+def screen_grid(axes, evaluate, budget=None, seed=2, sampler="lhs",
+                kernel="thin_plate_spline"):
+    """
+    Evalúa un subconjunto prometedor del grid producto de `axes`.
+
+    Args:
+        axes: listas de valores de cada eje (en el orden de las tuplas)
+        evaluate: función(lista de tuplas) → lista/array de errores
+        budget: simulaciones totales (default: default_budget)
+        seed: semilla del muestreo
+        sampler: "lhs" (hipercubo latino) o "sobol"
+        kernel: kernel de scipy.interpolate.RBFInterpolator
+
+    Returns:
+        (combos, errors) de los puntos evaluados, en orden de evaluación
+    """
+    if not SURROGATE_AVAILABLE:
+        raise ImportError("screen_grid requiere scipy (interpolate, stats.qmc)")
+    sizes = np.array([len(a) for a in axes])
+    grid_idx = np.stack(np.meshgrid(*[np.arange(s) for s in sizes], indexing="ij"),
+                        axis=-1).reshape(-1, len(axes))
+    n_grid = len(grid_idx)
+    budget = default_budget(n_grid) if budget is None else min(budget, n_grid)
+    coords = grid_idx / np.maximum(sizes - 1, 1)
+    flat = np.ravel_multi_index(grid_idx.T, sizes)
+
+    # Muestra inicial: puntos del grid, sin repetir; se completa al azar
+    rng = np.random.default_rng(seed)
+    n_init = max(len(axes) + 2, int(budget * INITIAL_FRACTION))
+    u = _unit_samples(n_init, len(axes), sampler, seed)
+    picked = np.ravel_multi_index(np.minimum((u * sizes).astype(int), sizes - 1).T, sizes)
+    chosen = list(dict.fromkeys(picked.tolist()))
+    if len(chosen) < n_init:
+        rest = np.setdiff1d(flat, chosen)
+        chosen += rng.choice(rest, n_init - len(chosen), replace=False).tolist()
+
+    def combo(i):
+        return tuple(axes[k][grid_idx[i, k]] for k in range(len(axes)))
+
+    evaluated = np.zeros(n_grid, dtype=bool)
+    order, errors = [], []
+
+    def run(indices):
+        errs = evaluate([combo(i) for i in indices])
+        evaluated[indices] = True
+        order.extend(indices)
+        errors.extend(float(e) for e in errs)
+
+    run(chosen)
+    per_round = max(1, (budget - len(order)) // ROUNDS)
+    while len(order) < budget and not evaluated.all():
+        y = np.log(np.maximum(np.asarray(errors), 1e-12))
+        ok = np.isfinite(y)
+        X = coords[order][ok]
+        pred = _fit_predict(X, y[ok], coords, kernel)
+        pred[evaluated] = np.inf
+        k = min(per_round, budget - len(order), int((~evaluated).sum()))
+        run(np.argsort(pred, kind="stable")[:k].tolist())
+
+    return [combo(i) for i in order], errors